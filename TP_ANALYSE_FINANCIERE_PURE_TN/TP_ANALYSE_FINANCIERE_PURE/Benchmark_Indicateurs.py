@@ -0,0 +1,110 @@
+import time
+import numpy as np
+import pandas as pd
+import indicateurs_techniques as it
+
+############
+# BENCHMARK DES INDICATEURS TECHNIQUES (NOYAUX VECTORISÉS vs PANDAS)
+############
+
+# Panel synthétique (marche aléatoire géométrique) : aucun téléchargement nécessaire.
+# Référence : l'approche des scripts, un DataFrame par ticker et les appels pandas
+# rolling() / ewm() correspondants. Noyaux : un seul appel sur le panel (tickers, dates).
+NB_TICKERS = 200
+NB_SEANCES = 2520
+NB_REPETITIONS = 3
+
+generateur = np.random.default_rng(2024)
+close = 100 * np.exp(np.cumsum(generateur.normal(0, 0.02, (NB_TICKERS, NB_SEANCES)), axis=1))
+high = close * (1 + generateur.random((NB_TICKERS, NB_SEANCES)) * 0.02)
+low = close * (1 - generateur.random((NB_TICKERS, NB_SEANCES)) * 0.02)
+volume = generateur.integers(100_000, 10_000_000, (NB_TICKERS, NB_SEANCES)).astype(np.float64)
+frames = [pd.DataFrame({'High': high[i], 'Low': low[i], 'Close': close[i], 'Volume': volume[i]})
+          for i in range(NB_TICKERS)]
+
+
+# Références pandas, ticker par ticker
+def pandas_ema(data):
+    return data['Close'].ewm(span=12).mean()
+
+
+def pandas_rsi(data):
+    variation = data['Close'].diff()
+    hausses = variation.clip(lower=0).ewm(alpha=1 / 14).mean()
+    baisses = (-variation).clip(lower=0).ewm(alpha=1 / 14).mean()
+    return 100 - 100 / (1 + hausses / baisses)
+
+
+def pandas_macd(data):
+    ligne = data['Close'].ewm(span=12).mean() - data['Close'].ewm(span=26).mean()
+    return ligne - ligne.ewm(span=9).mean()
+
+
+def pandas_bollinger(data):
+    return data['Close'].rolling(window=20).mean() + 2 * data['Close'].rolling(window=20).std()
+
+
+def pandas_atr(data):
+    close_veille = data['Close'].shift(1)
+    range_vrai = pd.concat([data['High'] - data['Low'], (data['High'] - close_veille).abs(),
+                            (data['Low'] - close_veille).abs()], axis=1).max(axis=1)
+    return range_vrai.ewm(alpha=1 / 14).mean()
+
+
+def pandas_stochastique(data):
+    plus_haut = data['High'].rolling(window=14).max()
+    plus_bas = data['Low'].rolling(window=14).min()
+    return (100 * (data['Close'] - plus_bas) / (plus_haut - plus_bas)).rolling(window=3).mean()
+
+
+def pandas_obv(data):
+    return (np.sign(data['Close'].diff()).fillna(0) * data['Volume']).cumsum()
+
+
+# (nom, noyau sur le panel, référence pandas sur un ticker)
+INDICATEURS = [
+    ('EMA 12', lambda: it.ema(close, 12), pandas_ema),
+    ('RSI 14', lambda: it.rsi(close, 14), pandas_rsi),
+    ('MACD (histogramme)', lambda: it.macd(close)[2], pandas_macd),
+    ('Bollinger haute', lambda: it.bollinger(close)[1], pandas_bollinger),
+    ('ATR 14', lambda: it.atr(high, low, close, 14), pandas_atr),
+    ('Stochastique %D', lambda: it.stochastique(high, low, close)[1], pandas_stochastique),
+    ('OBV', lambda: it.obv(close, volume), pandas_obv),
+]
+
+
+def meilleur_temps(fonction):
+    meilleur = np.inf
+    resultat = None
+    for _ in range(NB_REPETITIONS):
+        debut = time.perf_counter()
+        resultat = fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur, resultat
+
+
+# Écart relatif maximal (relatif à max(1, |référence|)) ; les NaN doivent coïncider
+def ecart_max(calcule, reference):
+    if not np.array_equal(np.isnan(calcule), np.isnan(reference)):
+        return np.inf
+    definis = ~np.isnan(reference)
+    if not definis.any():
+        return 0.0
+    return float(np.max(np.abs(calcule[definis] - reference[definis]) / np.maximum(1.0, np.abs(reference[definis]))))
+
+
+print("=" * 80)
+print("BENCHMARK DES INDICATEURS TECHNIQUES")
+print("=" * 80)
+print(f"\n   Panel : {NB_TICKERS} tickers x {NB_SEANCES} séances ({NB_TICKERS * NB_SEANCES:,} valeurs)")
+print(f"   Meilleur temps sur {NB_REPETITIONS} exécutions\n")
+print(f"   {'Indicateur':20} {'pandas (s)':>11} {'noyau (s)':>10} {'pandas Mv/s':>12} {'noyau Mv/s':>11} {'gain':>7} {'écart max':>10}")
+print("   " + "-" * 86)
+
+nb_valeurs = NB_TICKERS * NB_SEANCES
+for nom, noyau, reference in INDICATEURS:
+    temps_pandas, series = meilleur_temps(lambda: [reference(data).to_numpy() for data in frames])
+    temps_noyau, calcule = meilleur_temps(noyau)
+    ecart = ecart_max(calcule, np.vstack(series))
+    print(f"   {nom:20} {temps_pandas:11.4f} {temps_noyau:10.4f} {nb_valeurs / temps_pandas / 1e6:12.1f} "
+          f"{nb_valeurs / temps_noyau / 1e6:11.1f} {temps_pandas / temps_noyau:6.1f}x {ecart:10.1e}")
@@ -1,47 +1,22 @@
-import yfinance as yf
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
-from datetime import datetime
-
-# Récupération et préparation des données (reprise de la partie 3)
-data = yf.download("MSFT", start="2010-01-01", end="2025-01-01")
+from variables_derivees import charger_donnees_enrichies
+from fournisseurs import detecter_prix_col
+from fenetres_temporelles import support_resistance
+from moteur_kpi import charger_kpi
+from croisements import IndexCroisements
+
+# Récupération des données enrichies (variables dérivées calculées une seule fois par le moteur partagé).
+# Seules les colonnes lues par cette partie sont chargées ou calculées.
+COLONNES_UTILISEES = ['Rendement_Quotidien', 'Annee', 'Mois', 'Jour_Semaine', 'Volatilite_30j',
+                      'SMA_20', 'SMA_50', 'SMA_200', 'Drawdown']
+data = charger_donnees_enrichies("MSFT", "2010-01-01", "2025-01-01", COLONNES_UTILISEES)
 
 if data is None or data.empty:
     print("Erreur de chargement")
     exit()
 
-if isinstance(data.columns, pd.MultiIndex):
-    data.columns = data.columns.droplevel(1)
-
-prix_col = None
-for col in data.columns:
-    if 'adj' in col.lower() and 'close' in col.lower():
-        prix_col = col
-        break
-if prix_col is None:
-    prix_col = 'Close'
-
-# Création des variables dérivées
-data['Rendement_Quotidien'] = data['Close'].pct_change() * 100
-data['Rendement_Cumule'] = ((data['Close'] / data['Close'].iloc[0]) - 1) * 100
-data['Log_Rendement'] = np.log(data['Close'] / data['Close'].shift(1))
-data['Annee'] = data.index.year
-data['Mois'] = data.index.month
-data['Jour_Semaine'] = data.index.dayofweek
-data['Jour_Semaine_Nom'] = data.index.day_name()
-data['Trimestre'] = data.index.quarter
-data['Volatilite_30j'] = data['Rendement_Quotidien'].rolling(window=30).std()
-data['Volatilite_90j'] = data['Rendement_Quotidien'].rolling(window=90).std()
-data['Range_Quotidien'] = ((data['High'] - data['Low']) / data['Close']) * 100
-data['SMA_20'] = data['Close'].rolling(window=20).mean()
-data['SMA_50'] = data['Close'].rolling(window=50).mean()
-data['SMA_200'] = data['Close'].rolling(window=200).mean()
-data['Distance_Max_Historique'] = ((data['Close'] - data['Close'].expanding().max()) / data['Close'].expanding().max()) * 100
-
-# Calcul du drawdown
-data['Max_Historique'] = data['Close'].expanding().max()
-data['Drawdown'] = ((data['Close'] - data['Max_Historique']) / data['Max_Historique']) * 100
+prix_col = detecter_prix_col(data)
 
 ############
 # PARTIE 4: EXPLORATION DES DONNÉES
@@ -314,22 +289,18 @@ else:
     print("   [-] DEATH CROSS actif : SMA 50 < SMA 200 -> signal baissier long terme")
 
 # Recherche des croisements récents
-data['SMA_50_prev'] = data['SMA_50'].shift(1)
-data['SMA_200_prev'] = data['SMA_200'].shift(1)
-data['Croisement'] = ((data['SMA_50'] > data['SMA_200']) & (data['SMA_50_prev'] <= data['SMA_200_prev'])) | \
-                     ((data['SMA_50'] < data['SMA_200']) & (data['SMA_50_prev'] >= data['SMA_200_prev']))
-
-croisements = data[data['Croisement']].tail(3)
+# Index des croisements SMA 50/200 (une passe, sans colonnes temporaires)
+index_croisements = IndexCroisements.depuis_series("MSFT", data.index, data['SMA_50'], data['SMA_200'])
+croisements = index_croisements.derniers("MSFT", 3)
 if len(croisements) > 0:
     print("\n   Derniers croisements SMA 50/200 :")
-    for idx, row in croisements.iterrows():
-        type_croisement = "Golden Cross" if row['SMA_50'] > row['SMA_200'] else "Death Cross"
+    for idx, type_croisement in zip(croisements.index, croisements['Type']):
         print(f"   • {idx.strftime('%d/%m/%Y')} : {type_croisement}")
 
 print("\nSUPPORT ET RÉSISTANCE :\n")
 
-prix_min_recents = data['Close'].tail(252).min()
-prix_max_recents = data['Close'].tail(252).max()
+# Fenêtre calendaire d'un an (indépendante du nombre de séances de l'année)
+prix_min_recents, prix_max_recents = support_resistance(data['Close'], data.index, '1Y')
 
 print(f"   Support (min 1 an)    : ${prix_min_recents:.2f}")
 print(f"   Résistance (max 1 an) : ${prix_max_recents:.2f}")
@@ -348,12 +319,14 @@ print("-"*80)
 
 print("\nDRAWDOWN (CHUTE DEPUIS LE PIC) :\n")
 
-drawdown_max = data['Drawdown'].min()
-date_drawdown_max = data['Drawdown'].idxmin()
-drawdown_actuel = data['Drawdown'].iloc[-1]
+# Pic, creux et récupération : résultat du moteur de KPI (partagé avec les parties 5 et 6)
+kpi = charger_kpi("MSFT", "2010-01-01", "2025-01-01")
+drawdown_max = kpi.drawdown_max
+date_drawdown_max = kpi.date_creux
+drawdown_actuel = kpi.drawdown_actuel
 
-prix_au_pic = data.loc[data['Drawdown'].idxmin(), 'Max_Historique']
-prix_au_creux = data.loc[data['Drawdown'].idxmin(), 'Close']
+prix_au_pic = kpi.prix_au_pic
+prix_au_creux = kpi.prix_au_creux
 
 print(f"   Drawdown maximum       : {drawdown_max:.2f}%")
 print(f"   Date du creux          : {date_drawdown_max.strftime('%d/%m/%Y')}")
@@ -363,13 +336,8 @@ print(f"   Drawdown actuel        : {drawdown_actuel:.2f}%")
 
 # Calcul du temps de récupération
 if drawdown_max < -5:
-    idx_creux = data['Drawdown'].idxmin()
-    data_apres_creux = data.loc[idx_creux:]
-    recuperation = data_apres_creux[data_apres_creux['Drawdown'] >= -0.5]
-    
-    if len(recuperation) > 0:
-        date_recuperation = recuperation.index[0]
-        jours_recuperation = (date_recuperation - idx_creux).days
+    if kpi.date_recuperation is not None:
+        jours_recuperation = kpi.jours_recuperation
         print(f"   Temps de récupération  : {jours_recuperation} jours ({jours_recuperation/30:.1f} mois)")
     else:
         print(f"   Temps de récupération  : Non encore récupéré")
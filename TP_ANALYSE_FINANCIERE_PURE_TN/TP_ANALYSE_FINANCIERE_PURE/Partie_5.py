@@ -1,42 +1,18 @@
-import yfinance as yf
-import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
-from datetime import datetime
+from variables_derivees import charger_donnees_enrichies
+from fournisseurs import detecter_prix_col
+from moteur_kpi import charger_kpi
 
-# Récupération et préparation des données (reprise des parties précédentes)
-data = yf.download("MSFT", start="2010-01-01", end="2025-01-01")
+# Récupération des données enrichies (variables dérivées calculées une seule fois par le moteur partagé).
+# Seules les colonnes lues par cette partie sont chargées ou calculées.
+COLONNES_UTILISEES = ['Drawdown']
+data = charger_donnees_enrichies("MSFT", "2010-01-01", "2025-01-01", COLONNES_UTILISEES)
 
 if data is None or data.empty:
     print("Erreur de chargement")
     exit()
 
-if isinstance(data.columns, pd.MultiIndex):
-    data.columns = data.columns.droplevel(1)
-
-prix_col = None
-for col in data.columns:
-    if 'adj' in col.lower() and 'close' in col.lower():
-        prix_col = col
-        break
-if prix_col is None:
-    prix_col = 'Close'
-
-# Création des variables dérivées
-data['Rendement_Quotidien'] = data['Close'].pct_change() * 100
-data['Rendement_Cumule'] = ((data['Close'] / data['Close'].iloc[0]) - 1) * 100
-data['Log_Rendement'] = np.log(data['Close'] / data['Close'].shift(1))
-data['Annee'] = data.index.year
-data['Mois'] = data.index.month
-data['Jour_Semaine'] = data.index.dayofweek
-data['Trimestre'] = data.index.quarter
-data['Volatilite_30j'] = data['Rendement_Quotidien'].rolling(window=30).std()
-data['Volatilite_90j'] = data['Rendement_Quotidien'].rolling(window=90).std()
-data['SMA_20'] = data['Close'].rolling(window=20).mean()
-data['SMA_50'] = data['Close'].rolling(window=50).mean()
-data['SMA_200'] = data['Close'].rolling(window=200).mean()
-data['Max_Historique'] = data['Close'].expanding().max()
-data['Drawdown'] = ((data['Close'] - data['Max_Historique']) / data['Max_Historique']) * 100
+prix_col = detecter_prix_col(data)
 
 ############
 # PARTIE 5: ANALYSER ET CALCULER LES KPI
@@ -51,37 +27,16 @@ print("\n" + "-"*80)
 print("5.1 KPI DE PERFORMANCE")
 print("-"*80)
 
-# Calcul des rendements sur différentes périodes
-prix_initial = data['Close'].iloc[0]
-prix_final = data['Close'].iloc[-1]
-nb_annees_total = (data.index[-1] - data.index[0]).days / 365.25
+# Tous les KPI sont calculés une seule fois par le moteur de KPI (résultat typé, en cache)
+kpi = charger_kpi("MSFT", "2010-01-01", "2025-01-01")
 
-# Rendement total sur 15 ans
-rendement_total_15ans = ((prix_final - prix_initial) / prix_initial) * 100
-
-# Rendement sur 10 ans
-data_10ans = data[data.index >= (data.index[-1] - pd.DateOffset(years=10))]
-if len(data_10ans) > 0:
-    prix_initial_10ans = data_10ans['Close'].iloc[0]
-    rendement_10ans = ((prix_final - prix_initial_10ans) / prix_initial_10ans) * 100
-else:
-    rendement_10ans = None
-
-# Rendement sur 5 ans
-data_5ans = data[data.index >= (data.index[-1] - pd.DateOffset(years=5))]
-if len(data_5ans) > 0:
-    prix_initial_5ans = data_5ans['Close'].iloc[0]
-    rendement_5ans = ((prix_final - prix_initial_5ans) / prix_initial_5ans) * 100
-else:
-    rendement_5ans = None
-
-# Rendement sur 1 an
-data_1an = data[data.index >= (data.index[-1] - pd.DateOffset(years=1))]
-if len(data_1an) > 0:
-    prix_initial_1an = data_1an['Close'].iloc[0]
-    rendement_1an = ((prix_final - prix_initial_1an) / prix_initial_1an) * 100
-else:
-    rendement_1an = None
+# Rendements sur différentes périodes
+prix_initial = kpi.prix_initial
+prix_final = kpi.prix_final
+rendement_total_15ans = kpi.rendement_total
+rendement_10ans = kpi.rendement_10ans
+rendement_5ans = kpi.rendement_5ans
+rendement_1an = kpi.rendement_1an
 
 print("\nRENDEMENT TOTAL SUR DIFFÉRENTES PÉRIODES :\n")
 print(f"   Prix initial (15 ans)       : ${prix_initial:.2f}")
@@ -111,19 +66,9 @@ print("\n" + "-"*40)
 print("RENDEMENT ANNUALISÉ (CAGR)")
 print("-"*40)
 
-cagr_15ans = ((prix_final / prix_initial) ** (1 / nb_annees_total) - 1) * 100
-
-if rendement_10ans is not None:
-    nb_annees_10ans = len(data_10ans) / 252  # 252 jours de trading par an
-    cagr_10ans = ((prix_final / prix_initial_10ans) ** (1 / nb_annees_10ans) - 1) * 100
-else:
-    cagr_10ans = None
-
-if rendement_5ans is not None:
-    nb_annees_5ans = len(data_5ans) / 252
-    cagr_5ans = ((prix_final / prix_initial_5ans) ** (1 / nb_annees_5ans) - 1) * 100
-else:
-    cagr_5ans = None
+cagr_15ans = kpi.cagr
+cagr_10ans = kpi.cagr_10ans
+cagr_5ans = kpi.cagr_5ans
 
 print(f"\n   CAGR 15 ans                 : {cagr_15ans:+.2f}% par an")
 if cagr_10ans is not None:
@@ -181,10 +126,8 @@ print("-"*80)
 
 print("\nVOLATILITÉ :\n")
 
-# Calcul de la volatilité
-rendements = data['Rendement_Quotidien'].dropna()
-volatilite_quotidienne = rendements.std()
-volatilite_annualisee = volatilite_quotidienne * np.sqrt(252)  # 252 jours de trading
+volatilite_quotidienne = kpi.volatilite_quotidienne
+volatilite_annualisee = kpi.volatilite_annualisee  # 252 jours de trading
 
 print(f"   Volatilité quotidienne      : {volatilite_quotidienne:.2f}%")
 print(f"   Volatilité annualisée       : {volatilite_annualisee:.2f}%")
@@ -207,11 +150,11 @@ print("\n" + "-"*40)
 print("DRAWDOWN MAXIMUM")
 print("-"*40)
 
-drawdown_max = data['Drawdown'].min()
-idx_drawdown_max = data['Drawdown'].idxmin()
-prix_au_pic = data.loc[idx_drawdown_max, 'Max_Historique']
-prix_au_creux = data.loc[idx_drawdown_max, 'Close']
-date_pic = data[data['Close'] == prix_au_pic].index[0]
+drawdown_max = kpi.drawdown_max
+idx_drawdown_max = kpi.date_creux
+prix_au_pic = kpi.prix_au_pic
+prix_au_creux = kpi.prix_au_creux
+date_pic = kpi.date_pic
 
 print(f"\n   Date du pic historique      : {date_pic.strftime('%d/%m/%Y')}")
 print(f"   Prix au pic                 : ${prix_au_pic:.2f}")
@@ -219,13 +162,11 @@ print(f"   Date du creux               : {idx_drawdown_max.strftime('%d/%m/%Y')}
 print(f"   Prix au creux               : ${prix_au_creux:.2f}")
 print(f"   Drawdown maximum            : {drawdown_max:.2f}%")
 
-# Calcul du temps de récupération
-data_apres_creux = data.loc[idx_drawdown_max:]
-recuperation = data_apres_creux[data_apres_creux['Drawdown'] >= -0.5]
+# Calcul du temps de récupération (premier retour au-dessus de -0,5 % après le creux)
+date_recuperation = kpi.date_recuperation
 
-if len(recuperation) > 0:
-    date_recuperation = recuperation.index[0]
-    jours_recuperation = (date_recuperation - idx_drawdown_max).days
+if date_recuperation is not None:
+    jours_recuperation = kpi.jours_recuperation
     mois_recuperation = jours_recuperation / 30
     print(f"   Date de récupération        : {date_recuperation.strftime('%d/%m/%Y')}")
     print(f"   Temps de récupération       : {jours_recuperation} jours ({mois_recuperation:.1f} mois)")
@@ -256,10 +197,10 @@ print("\n" + "-"*40)
 print("SHARPE RATIO")
 print("-"*40)
 
-taux_sans_risque = 3.0  # Hypothèse : 3% annuel
-rendement_moyen_annuel = rendements.mean() * 252
-excess_return = rendement_moyen_annuel - taux_sans_risque
-sharpe_ratio = excess_return / volatilite_annualisee
+taux_sans_risque = kpi.taux_sans_risque  # Hypothèse : 3% annuel
+rendement_moyen_annuel = kpi.rendement_moyen_annuel
+excess_return = kpi.rendement_excedentaire
+sharpe_ratio = kpi.sharpe_ratio
 
 print(f"\n   Rendement moyen annuel      : {rendement_moyen_annuel:.2f}%")
 print(f"   Taux sans risque (hypothèse): {taux_sans_risque:.2f}%")
@@ -289,7 +230,7 @@ print("\n" + "-"*40)
 print("RATIO RENDEMENT/RISQUE")
 print("-"*40)
 
-ratio_rdt_risque = cagr_15ans / volatilite_annualisee
+ratio_rdt_risque = kpi.ratio_rendement_risque
 
 print(f"\n   CAGR                        : {cagr_15ans:.2f}%")
 print(f"   Volatilité annualisée       : {volatilite_annualisee:.2f}%")
@@ -308,8 +249,8 @@ print("\n" + "-"*40)
 print("VALUE AT RISK (VaR)")
 print("-"*40)
 
-var_95_quotidien = np.percentile(rendements, 5)
-var_95_mensuel = var_95_quotidien * np.sqrt(21)  # 21 jours de trading par mois
+var_95_quotidien = kpi.var_95_quotidien
+var_95_mensuel = kpi.var_95_mensuel  # 21 jours de trading par mois
 
 print(f"\n   VaR 95% (1 jour)            : {var_95_quotidien:.2f}%")
 print(f"   VaR 95% (1 mois)            : {var_95_mensuel:.2f}%")
@@ -326,14 +267,14 @@ print("-"*80)
 
 print("\nPOSITION ACTUELLE VS MOYENNES MOBILES :\n")
 
-prix_actuel = data['Close'].iloc[-1]
-sma20_actuel = data['SMA_20'].iloc[-1]
-sma50_actuel = data['SMA_50'].iloc[-1]
-sma200_actuel = data['SMA_200'].iloc[-1]
+prix_actuel = kpi.prix_actuel
+sma20_actuel = kpi.sma20
+sma50_actuel = kpi.sma50
+sma200_actuel = kpi.sma200
 
-ecart_sma20 = ((prix_actuel - sma20_actuel) / sma20_actuel) * 100
-ecart_sma50 = ((prix_actuel - sma50_actuel) / sma50_actuel) * 100
-ecart_sma200 = ((prix_actuel - sma200_actuel) / sma200_actuel) * 100
+ecart_sma20 = kpi.ecart_sma20
+ecart_sma50 = kpi.ecart_sma50
+ecart_sma200 = kpi.ecart_sma200
 
 print(f"   Prix actuel                 : ${prix_actuel:.2f}")
 print(f"   SMA 20 jours                : ${sma20_actuel:.2f} ({ecart_sma20:+.2f}%)")
@@ -367,32 +308,25 @@ print("-"*40)
 print(f"\n   SMA 50 jours                : ${sma50_actuel:.2f}")
 print(f"   SMA 200 jours               : ${sma200_actuel:.2f}")
 
-if sma50_actuel > sma200_actuel:
+ecart_cross = kpi.ecart_cross
+if kpi.golden_cross:
     signal_cross = "GOLDEN CROSS"
     interpretation_cross = "Signal HAUSSIER long terme"
-    ecart_cross = ((sma50_actuel - sma200_actuel) / sma200_actuel) * 100
     print(f"\n   Configuration               : {signal_cross}")
     print(f"   Écart SMA 50/200            : +{ecart_cross:.2f}%")
     print(f"   Interprétation              : {interpretation_cross}")
 else:
     signal_cross = "DEATH CROSS"
     interpretation_cross = "Signal BAISSIER long terme"
-    ecart_cross = ((sma200_actuel - sma50_actuel) / sma200_actuel) * 100
     print(f"\n   Configuration               : {signal_cross}")
     print(f"   Écart SMA 200/50            : +{ecart_cross:.2f}%")
     print(f"   Interprétation              : {interpretation_cross}")
 
-# Recherche du dernier croisement
-data['SMA_50_prev'] = data['SMA_50'].shift(1)
-data['SMA_200_prev'] = data['SMA_200'].shift(1)
-data['Croisement'] = ((data['SMA_50'] > data['SMA_200']) & (data['SMA_50_prev'] <= data['SMA_200_prev'])) | \
-                     ((data['SMA_50'] < data['SMA_200']) & (data['SMA_50_prev'] >= data['SMA_200_prev']))
-
-croisements = data[data['Croisement']].tail(1)
-if len(croisements) > 0:
-    dernier_croisement = croisements.index[0]
-    type_croisement = "Golden Cross" if croisements['SMA_50'].iloc[0] > croisements['SMA_200'].iloc[0] else "Death Cross"
-    jours_depuis = (data.index[-1] - dernier_croisement).days
+# Dernier croisement (index des croisements SMA 50/200 du moteur de KPI)
+if kpi.date_dernier_croisement is not None:
+    dernier_croisement = kpi.date_dernier_croisement
+    type_croisement = kpi.type_dernier_croisement
+    jours_depuis = kpi.jours_depuis_croisement
     print(f"\n   Dernier croisement          : {type_croisement}")
     print(f"   Date                        : {dernier_croisement.strftime('%d/%m/%Y')}")
     print(f"   Jours écoulés               : {jours_depuis} jours ({jours_depuis/30:.1f} mois)")
@@ -402,9 +336,9 @@ print("\n" + "-"*40)
 print("DISTANCE AU PLUS HAUT HISTORIQUE")
 print("-"*40)
 
-prix_max_historique = data['Close'].max()
-date_max_historique = data['Close'].idxmax()
-distance_max = ((prix_actuel - prix_max_historique) / prix_max_historique) * 100
+prix_max_historique = kpi.prix_max_historique
+date_max_historique = kpi.date_max_historique
+distance_max = kpi.distance_max
 
 print(f"\n   Plus haut historique        : ${prix_max_historique:.2f}")
 print(f"   Date                        : {date_max_historique.strftime('%d/%m/%Y')}")
@@ -443,7 +377,7 @@ print("\n[RISQUE]")
 print("-" * 80)
 print(f"  Volatilité annualisée        : {volatilite_annualisee:>10.2f}%  | {niveau_risque}")
 print(f"  Drawdown maximum             : {drawdown_max:>10.2f}%  | Important")
-if len(recuperation) > 0:
+if date_recuperation is not None:
     print(f"  Temps de récupération        : {mois_recuperation:>10.1f} mois | Rapide" if mois_recuperation < 12 else f"  Temps de récupération        : {mois_recuperation:>10.1f} mois | Long")
 print(f"  Sharpe Ratio                 : {sharpe_ratio:>10.3f}   | {evaluation_sharpe}")
 print(f"  Ratio Rendement/Risque       : {ratio_rdt_risque:>10.3f}   | {'Favorable' if ratio_rdt_risque > 1 else 'Défavorable'}")
@@ -465,63 +399,13 @@ print("\n" + "-"*40)
 print("SCORE GLOBAL")
 print("-"*40)
 
-# Score Performance (0-10)
-if cagr_15ans > 15:
-    score_performance = 10
-elif cagr_15ans > 12:
-    score_performance = 8
-elif cagr_15ans > 10:
-    score_performance = 7
-elif cagr_15ans > 7:
-    score_performance = 5
-else:
-    score_performance = 3
-
-# Score Risque (0-10) - inversé car moins de risque = meilleur score
-if volatilite_annualisee < 15:
-    score_risque = 10
-elif volatilite_annualisee < 20:
-    score_risque = 8
-elif volatilite_annualisee < 25:
-    score_risque = 6
-elif volatilite_annualisee < 30:
-    score_risque = 4
-else:
-    score_risque = 2
+# Scores du moteur de KPI (Performance, Risque inversé et ajusté du drawdown, Technique)
+score_performance = kpi.score_performance
+score_risque = kpi.score_risque
+score_technique = kpi.score_technique
 
-# Ajustement pour drawdown
-if abs(drawdown_max) < 20:
-    score_risque += 0
-elif abs(drawdown_max) < 30:
-    score_risque -= 1
-else:
-    score_risque -= 2
-
-score_risque = max(0, min(10, score_risque))  # Limiter entre 0 et 10
-
-# Score Technique (0-10)
-score_technique = 0
-if prix_actuel > sma200_actuel:
-    score_technique += 3
-if prix_actuel > sma50_actuel:
-    score_technique += 3
-if sma50_actuel > sma200_actuel:  # Golden Cross
-    score_technique += 3
-if distance_max > -10:  # Proche du max
-    score_technique += 1
-
-# Score final (moyenne pondérée)
-poids_perf = 0.4
-poids_risque = 0.3
-# Poids des scores
-poids_technique = 0.3
-
-# Calcul du score global
-score_global = (
-    score_performance * poids_perf +
-    score_risque * poids_risque +
-    score_technique * poids_technique
-)
+# Score final (moyenne pondérée 40 % / 30 % / 30 %)
+score_global = kpi.score_global
 
 print(f"\nScore Performance : {score_performance}/10")
 print(f"Score Risque      : {score_risque}/10")
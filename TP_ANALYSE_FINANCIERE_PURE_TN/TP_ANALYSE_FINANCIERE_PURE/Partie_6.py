@@ -1,65 +1,43 @@
-import yfinance as yf
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
+from variables_derivees import charger_donnees_enrichies
+from fournisseurs import detecter_prix_col
+from fenetres_temporelles import support_resistance
+from moteur_kpi import charger_kpi
 import warnings
 warnings.filterwarnings('ignore')
 
-# Récupération et préparation des données (reprise des parties précédentes)
-data = yf.download("MSFT", start="2010-01-01", end="2025-01-01")
+# Récupération des données enrichies (variables dérivées calculées une seule fois par le moteur partagé).
+# Seules les colonnes lues par cette partie sont chargées ou calculées.
+COLONNES_UTILISEES = ['Rendement_Quotidien', 'Annee', 'Volatilite_30j', 'SMA_50', 'SMA_200', 'Drawdown']
+data = charger_donnees_enrichies("MSFT", "2010-01-01", "2025-01-01", COLONNES_UTILISEES)
 
 if data is None or data.empty:
     print("Erreur de chargement")
     exit()
 
-if isinstance(data.columns, pd.MultiIndex):
-    data.columns = data.columns.droplevel(1)
-
-prix_col = None
-for col in data.columns:
-    if 'adj' in col.lower() and 'close' in col.lower():
-        prix_col = col
-        break
-if prix_col is None:
-    prix_col = 'Close'
-
-# Création des variables dérivées
-data['Rendement_Quotidien'] = data['Close'].pct_change() * 100
-data['Rendement_Cumule'] = ((data['Close'] / data['Close'].iloc[0]) - 1) * 100
-data['Log_Rendement'] = np.log(data['Close'] / data['Close'].shift(1))
-data['Annee'] = data.index.year
-data['Mois'] = data.index.month
-data['Volatilite_30j'] = data['Rendement_Quotidien'].rolling(window=30).std()
-data['SMA_20'] = data['Close'].rolling(window=20).mean()
-data['SMA_50'] = data['Close'].rolling(window=50).mean()
-data['SMA_200'] = data['Close'].rolling(window=200).mean()
-data['Max_Historique'] = data['Close'].expanding().max()
-data['Drawdown'] = ((data['Close'] - data['Max_Historique']) / data['Max_Historique']) * 100
-
-# Calcul des KPI principaux
-prix_initial = data['Close'].iloc[0]
-prix_final = data['Close'].iloc[-1]
-nb_annees = (data.index[-1] - data.index[0]).days / 365.25
-rendement_total = ((prix_final - prix_initial) / prix_initial) * 100
-cagr = ((prix_final / prix_initial) ** (1 / nb_annees) - 1) * 100
-
-rendements = data['Rendement_Quotidien'].dropna()
-volatilite_quotidienne = rendements.std()
-volatilite_annualisee = volatilite_quotidienne * np.sqrt(252)
-
-drawdown_max = data['Drawdown'].min()
-idx_drawdown_max = data['Drawdown'].idxmin()
-
-taux_sans_risque = 3.0
-rendement_moyen_annuel = rendements.mean() * 252
-excess_return = rendement_moyen_annuel - taux_sans_risque
-sharpe_ratio = excess_return / volatilite_annualisee
-
-prix_actuel = data['Close'].iloc[-1]
-sma50_actuel = data['SMA_50'].iloc[-1]
-sma200_actuel = data['SMA_200'].iloc[-1]
-ecart_sma200 = ((prix_actuel - sma200_actuel) / sma200_actuel) * 100
+prix_col = detecter_prix_col(data)
+
+# KPI principaux : résultat du moteur de KPI (calculé une fois, relu du cache après la partie 5)
+kpi = charger_kpi("MSFT", "2010-01-01", "2025-01-01")
+prix_initial = kpi.prix_initial
+prix_final = kpi.prix_final
+nb_annees = kpi.nb_annees
+rendement_total = kpi.rendement_total
+cagr = kpi.cagr
+
+volatilite_annualisee = kpi.volatilite_annualisee
+
+drawdown_max = kpi.drawdown_max
+idx_drawdown_max = kpi.date_creux
+
+sharpe_ratio = kpi.sharpe_ratio
+
+prix_actuel = kpi.prix_actuel
+sma50_actuel = kpi.sma50
+sma200_actuel = kpi.sma200
+ecart_sma200 = kpi.ecart_sma200
 
 # Détermination des niveaux
 if volatilite_annualisee < 15:
@@ -85,52 +63,9 @@ else:
     signal_cross = "DEATH CROSS"
     tendance = "BAISSIÈRE"
 
-# Calcul du score
-if cagr > 15:
-    score_performance = 10
-elif cagr > 12:
-    score_performance = 8
-elif cagr > 10:
-    score_performance = 7
-elif cagr > 7:
-    score_performance = 5
-else:
-    score_performance = 3
-
-if volatilite_annualisee < 15:
-    score_risque = 10
-elif volatilite_annualisee < 20:
-    score_risque = 8
-elif volatilite_annualisee < 25:
-    score_risque = 6
-elif volatilite_annualisee < 30:
-    score_risque = 4
-else:
-    score_risque = 2
-
-if abs(drawdown_max) < 20:
-    score_risque += 0
-elif abs(drawdown_max) < 30:
-    score_risque -= 1
-else:
-    score_risque -= 2
-score_risque = max(0, min(10, score_risque))
-
-score_technique = 0
-if prix_actuel > sma200_actuel:
-    score_technique += 3
-if prix_actuel > sma50_actuel:
-    score_technique += 3
-if sma50_actuel > sma200_actuel:
-    score_technique += 3
-distance_max = ((prix_actuel - data['Close'].max()) / data['Close'].max()) * 100
-if distance_max > -10:
-    score_technique += 1
-
-poids_perf = 0.4
-poids_risque = 0.3
-poids_technique = 0.3
-score_final = (score_performance * poids_perf + score_risque * poids_risque + score_technique * poids_technique)
+# Score global (même grille que la partie 5)
+distance_max = kpi.distance_max
+score_final = kpi.score_global
 
 ############
 # PARTIE 6: COMMUNICATION DES RÉSULTATS
@@ -610,8 +545,8 @@ else:
 print("\n[ÉTAPE 3] DÉFINIR LES NIVEAUX CLÉS")
 print("-" * 80)
 
-prix_support = data['Close'].tail(252).min()
-prix_resistance = data['Close'].tail(252).max()
+# Fenêtre calendaire d'un an (indépendante du nombre de séances de l'année)
+prix_support, prix_resistance = support_resistance(data['Close'], data.index, '1Y')
 
 print(f"\n   Prix actuel : ${prix_actuel:.2f}")
 print(f"\n   SUPPORT (plancher 1 an) : ${prix_support:.2f} (-{((prix_actuel - prix_support)/prix_actuel*100):.1f}%)")
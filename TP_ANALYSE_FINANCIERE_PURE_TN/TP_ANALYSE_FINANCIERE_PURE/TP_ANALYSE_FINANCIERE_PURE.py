@@ -1,8 +1,15 @@
-﻿import yfinance as yf
-import pandas as pd
+﻿import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
+from cache_donnees import charger_donnees
+from fournisseurs import detecter_prix_col
+from variables_derivees import calculer_variables_derivees, sauver_donnees_enrichies
+from calendrier import seances, seances_manquantes, dates_hors_calendrier
+from qualite_donnees import (valider_ohlcv, compter_anomalies, lignes_en_anomalie,
+                             BIT_NAN, BIT_DOUBLON, BIT_HIGH_LOW, BIT_CLOSE_HORS, BIT_OPEN_HORS, BIT_VOLUME)
+from compactage import MODE_COMPACT, compacter_donnees, memoire_ko
+from rapport_qualite import CHEMIN_RAPPORT, evaluer_qualite, ajouter_rapports_jsonl
 
 ############
 # PARTIE 2: EXPLORATION DES DONNÉES
@@ -13,26 +20,15 @@ print("ÉTAPE 2 : EXPLORATION DES DONNÉES")
 print("+"*80)
 
 # Récupération des données historiques de Microsoft sur 15 ans
-data = yf.download("MSFT", start="2010-01-01", end="2025-01-01")
+data = charger_donnees("MSFT", "2010-01-01", "2025-01-01")
 
 # Erreur en cas de non-chargement du fichier
 if data is None or data.empty:
     print("Erreur de chargement")
     exit()
 
-# Aplatir la structure multi-index des colonnes
-if isinstance(data.columns, pd.MultiIndex):
-    data.columns = data.columns.droplevel(1)
-
-# Trouver le nom de la colonne du prix ajusté
-prix_col = None
-for col in data.columns:
-    if 'adj' in col.lower() and 'close' in col.lower():
-        prix_col = col
-        break
-
-if prix_col is None:
-    prix_col = 'Close'
+# Trouver le nom de la colonne du prix ajusté (colonnes déjà aplaties par le fournisseur)
+prix_col = detecter_prix_col(data)
 
 print(f"\nColonne utilisée pour les prix : {prix_col}\n")
 
@@ -57,7 +53,7 @@ print()
 
 # Afficher la mémoire utilisée par le DataFrame
 print(f"Taille du DataFrame : {data.size} éléments")
-print(f"Mémoire utilisée : {data.memory_usage(deep=True).sum() / 1024:.2f} KB\n")
+print(f"Mémoire utilisée : {memoire_ko(data):.2f} KB\n")
 
 # Recherche de périodes manquantes
 data_temp = data.copy()
@@ -82,6 +78,20 @@ if len(gaps_anormaux) > 0:
         print(f"   {idx.strftime('%d/%m/%Y')} : gap de {nb_jours_gap} jours")
 print()
 
+# Comparaison avec le calendrier des séances NYSE (jours fériés inclus) :
+# un écart de plusieurs jours n'est anormal que s'il recouvre une vraie séance
+manquantes = seances_manquantes(data.index)
+hors_calendrier = dates_hors_calendrier(data.index)
+print("Comparaison avec le calendrier des séances (NYSE) :")
+print(f"   Séances attendues            : {len(seances(data.index.min(), data.index.max())):,}")
+print(f"   Séances manquantes           : {len(manquantes):,}")
+print(f"   Dates hors calendrier        : {len(hors_calendrier):,}")
+if len(manquantes) > 0:
+    print("\nDétail des séances manquantes :")
+    for date_manquante in manquantes[:10]:
+        print(f"   {date_manquante.strftime('%d/%m/%Y')} ({date_manquante.day_name()})")
+print()
+
 # Afficher les volumes d'échange
 print("Statistiques descriptives du volume :")
 print(f"   Minimum          : {data['Volume'].min():>15,.0f} actions")
@@ -152,8 +162,11 @@ print("$"*80)
 print("\n--- 3.1 ÉVALUATION DE LA QUALITÉ ---\n")
 
 
+# Validation en une seule passe : masque des règles violées par ligne + comptages
+masque_qualite, valeurs_manquantes = valider_ohlcv(data)
+comptes_qualite = compter_anomalies(masque_qualite)
+
 # Vérification des valeurs manquantes
-valeurs_manquantes = data.isnull().sum()
 print("Nombre de valeurs manquantes par colonne :")
 for col in data.columns:
     nb_nan = valeurs_manquantes[col]
@@ -167,7 +180,7 @@ if total_nan > 0:
     pourcentage_nan = (total_nan / data.size) * 100
     print(f"Pourcentage de données manquantes : {pourcentage_nan:.2f}%")
     print("\nLignes contenant des valeurs manquantes :")
-    lignes_nan = data[data.isnull().any(axis=1)]
+    lignes_nan = lignes_en_anomalie(data, masque_qualite, BIT_NAN)
     print(lignes_nan)
 else:
     print("Aucune valeur manquante détectée dans le dataset")
@@ -176,8 +189,8 @@ print()
 
 # Vérification de l'unicité des lignes
 nb_total = len(data)
-nb_unique = data.index.nunique()
-nb_doublons = nb_total - nb_unique
+nb_doublons = comptes_qualite['Dates en double']
+nb_unique = nb_total - nb_doublons
 
 print("Vérification de l'unicité des dates :")
 print(f"   Nombre total de lignes     : {nb_total}")
@@ -186,7 +199,8 @@ print(f"   Nombre de doublons         : {nb_doublons}")
 
 if nb_doublons > 0:
     print("\nDates en double détectées :")
-    doublons = data[data.index.duplicated(keep=False)]
+    dates_doublons = data.index[(masque_qualite & BIT_DOUBLON) != 0]
+    doublons = data[data.index.isin(dates_doublons)]
     print(doublons)
 else:
     print("Aucun doublon détecté")
@@ -198,44 +212,28 @@ print("Vérification de la cohérence des données :\n")
 
 anomalies_totales = 0
 
-# Test 1: High >= Low (corrigé)
-anomalies = data[data['High'] < data['Low']]
-if len(anomalies) == 0:
-    print("   High >= Low : Toutes les lignes sont cohérentes")
-else:
-    print(f"   High >= Low : {len(anomalies)} anomalie(s) détectée(s)")
-    print(anomalies[['Open', 'High', 'Low', 'Close']])
-    anomalies_totales += len(anomalies)
-
-# Test 2: High >= Close >= Low (corrigé)
-anomalies = data[(data['Close'] > data['High']) | (data['Close'] < data['Low'])]
-if len(anomalies) == 0:
-    print("   High >= Close >= Low : Toutes les lignes sont cohérentes")
-else:
-    print(f"   High >= Close >= Low : {len(anomalies)} anomalie(s) détectée(s)")
-    print(anomalies[['Open', 'High', 'Low', 'Close']])
-    anomalies_totales += len(anomalies)
-
-# Test 3: High >= Open >= Low (corrigé)
-anomalies = data[(data['Open'] > data['High']) | (data['Open'] < data['Low'])]
-if len(anomalies) == 0:
-    print("   High >= Open >= Low : Toutes les lignes sont cohérentes")
-else:
-    print(f"   High >= Open >= Low : {len(anomalies)} anomalie(s) détectée(s)")
-    print(anomalies[['Open', 'High', 'Low', 'Close']])
-    anomalies_totales += len(anomalies)
-
-# Test 4: Volume > 0
-anomalies = data[data['Volume'] <= 0]
-if len(anomalies) == 0:
-    print("   Volume > 0 : Toutes les lignes sont cohérentes")
-else:
-    print(f"   Volume > 0 : {len(anomalies)} anomalie(s) détectée(s)")
-    print(anomalies[['Volume']])
-    anomalies_totales += len(anomalies)
+# Tests 1 à 4 : High >= Low, High >= Close >= Low, High >= Open >= Low, Volume > 0
+for regle, bit, colonnes_anomalie in [
+    ('High >= Low', BIT_HIGH_LOW, ['Open', 'High', 'Low', 'Close']),
+    ('High >= Close >= Low', BIT_CLOSE_HORS, ['Open', 'High', 'Low', 'Close']),
+    ('High >= Open >= Low', BIT_OPEN_HORS, ['Open', 'High', 'Low', 'Close']),
+    ('Volume > 0', BIT_VOLUME, ['Volume']),
+]:
+    nb_anomalies = comptes_qualite[regle]
+    if nb_anomalies == 0:
+        print(f"   {regle} : Toutes les lignes sont cohérentes")
+    else:
+        print(f"   {regle} : {nb_anomalies} anomalie(s) détectée(s)")
+        print(lignes_en_anomalie(data, masque_qualite, bit)[colonnes_anomalie])
+        anomalies_totales += nb_anomalies
 
 print(f"\nTotal d'anomalies détectées : {anomalies_totales}\n")
 
+# Rapport structuré (JSON Lines) pour le suivi de la qualité, si demandé
+if CHEMIN_RAPPORT:
+    ajouter_rapports_jsonl([evaluer_qualite("MSFT", data, masque_qualite, valeurs_manquantes)], CHEMIN_RAPPORT)
+    print(f"Rapport de qualité ajouté à : {CHEMIN_RAPPORT}\n")
+
 # 3.2 TRAITEMENT DES PROBLÈMES DE QUALITÉ
 print("\n--- 3.2 TRAITEMENT DES PROBLÈMES ---\n")
 
@@ -283,46 +281,41 @@ else:
 # 3.4 CRÉATION DE VARIABLES DÉRIVÉES
 print("\n--- 3.4 CRÉATION DE VARIABLES DÉRIVÉES ---\n")
 
-# Variables de rendement
+# Calcul de toutes les variables dérivées en une passe par le moteur partagé,
+# puis mise en cache pour les parties 4 à 6
+data = calculer_variables_derivees(data)
+sauver_donnees_enrichies("MSFT", "2010-01-01", "2025-01-01", data)
+
 print("Calcul des variables de rendement...")
-data['Rendement_Quotidien'] = data['Close'].pct_change() * 100
-data['Rendement_Cumule'] = ((data['Close'] / data['Close'].iloc[0]) - 1) * 100
-data['Log_Rendement'] = np.log(data['Close'] / data['Close'].shift(1))
 print("   Rendement quotidien (%)")
 print("   Rendement cumulé (%)")
 print("   Log rendement\n")
 
-# Variables temporelles
 print("Extraction des variables temporelles...")
-data['Annee'] = data.index.year
-data['Mois'] = data.index.month
-data['Jour_Semaine'] = data.index.dayofweek  # 0=Lundi, 6=Dimanche
-data['Jour_Semaine_Nom'] = data.index.day_name()
-data['Trimestre'] = data.index.quarter
 print("   Année")
 print("   Mois")
 print("   Jour de la semaine")
 print("   Trimestre\n")
 
-# Variables de volatilité
 print("Calcul des variables de volatilité...")
-data['Volatilite_30j'] = data['Rendement_Quotidien'].rolling(window=30).std()
-data['Volatilite_90j'] = data['Rendement_Quotidien'].rolling(window=90).std()
-data['Range_Quotidien'] = ((data['High'] - data['Low']) / data['Close']) * 100
 print("   Volatilité mobile 30 jours")
 print("   Volatilité mobile 90 jours")
 print("   Range quotidien (%)\n")
 
-# Variables techniques (moyennes mobiles)
 print("Calcul des indicateurs techniques...")
-data['SMA_20'] = data['Close'].rolling(window=20).mean()
-data['SMA_50'] = data['Close'].rolling(window=50).mean()
-data['SMA_200'] = data['Close'].rolling(window=200).mean()
-data['Distance_Max_Historique'] = ((data['Close'] - data['Close'].expanding().max()) / data['Close'].expanding().max()) * 100
 print("   SMA 20 jours")
 print("   SMA 50 jours")
 print("   SMA 200 jours")
-print("   Distance au plus haut historique (%)\n")
+print("   Distance au plus haut historique (%)")
+print("   Drawdown (%)\n")
+
+# Représentation compacte optionnelle (TP_MODE_COMPACT=1)
+print(f"Mémoire utilisée : {memoire_ko(data):.2f} KB")
+if MODE_COMPACT:
+    memoire_avant = memoire_ko(data)
+    data = compacter_donnees(data)
+    print(f"Mémoire utilisée (mode compact) : {memoire_ko(data):.2f} KB ({(1 - memoire_ko(data) / memoire_avant) * 100:.1f}% économisés)")
+print()
 
 # 3.5 VALIDATION DES NOUVELLES VARIABLES
 print("\n--- 3.5 VALIDATION DES NOUVELLES VARIABLES ---\n")
@@ -331,7 +324,8 @@ print("\n--- 3.5 VALIDATION DES NOUVELLES VARIABLES ---\n")
 print("Vérification des NaN dans les nouvelles variables :\n")
 nouvelles_colonnes = ['Rendement_Quotidien', 'Rendement_Cumule', 'Log_Rendement',
                       'Volatilite_30j', 'Volatilite_90j', 'Range_Quotidien',
-                      'SMA_20', 'SMA_50', 'SMA_200', 'Distance_Max_Historique']
+                      'SMA_20', 'SMA_50', 'SMA_200', 'Distance_Max_Historique',
+                      'Max_Historique', 'Drawdown']
 
 for col in nouvelles_colonnes:
     nb_nan = data[col].isnull().sum()
@@ -0,0 +1,174 @@
+import os
+import glob
+import hashlib
+import numpy as np
+import pandas as pd
+from cache_donnees import (
+    charger_donnees, dedoublonner, ecrire_cache, ecrire_filigrane, lire_filigrane,
+    lire_historique, plages_hors_filigrane, repertoire_ticker,
+)
+from fournisseurs import fournisseur_par_defaut
+
+############
+# OPÉRATIONS SUR TITRES ET AJUSTEMENT DES PRIX BRUTS
+############
+
+# Organisation du cache (à côté des segments de prix bruts) :
+#   cache/<TICKER>/actions.parquet              (dividendes et divisions, une ligne par date)
+#   cache/<TICKER>/filigrane_actions.json       (plage déjà interrogée)
+#   cache/<TICKER>/ajustement_<signature>.parquet (facteurs cumulés par séance)
+# Avec un fournisseur de prix bruts (FournisseurYFinance(ajuste=False), fichiers bruts),
+# les prix sont stockés une seule fois, bruts ; une nouvelle opération ne change que la
+# signature de la table des actions, donc seuls les facteurs sont recalculés.
+# Le filigrane indique si le cache contient des prix déjà ajustés par la source (défaut
+# yfinance, auto_adjust=True) : ils ne sont alors jamais ajustés une seconde fois.
+
+FICHIER_ACTIONS = 'actions.parquet'
+FILIGRANE_ACTIONS = 'filigrane_actions.json'
+COLONNES_PRIX = ['Open', 'High', 'Low', 'Close']
+
+
+def chemin_actions(ticker):
+    return os.path.join(repertoire_ticker(ticker), FICHIER_ACTIONS)
+
+
+def lire_actions(ticker):
+    chemin = chemin_actions(ticker)
+    if not os.path.exists(chemin):
+        return None
+    return pd.read_parquet(chemin)
+
+
+# Rafraîchissement incrémental de la table des actions, comme pour les prix.
+# Une plage interrogée sans opération est couverte (réponse vide mais valide).
+def rafraichir_actions(ticker, debut, fin, fournisseur=None):
+    if fournisseur is None:
+        fournisseur = fournisseur_par_defaut()
+    telecharger = getattr(fournisseur, 'telecharger_actions', None)
+    if telecharger is None:
+        return lire_actions(ticker)
+
+    debut = pd.Timestamp(debut)
+    fin = min(pd.Timestamp(fin), pd.Timestamp.today().normalize())
+
+    filigrane = lire_filigrane(ticker, FILIGRANE_ACTIONS)
+    actions = lire_actions(ticker)
+    for plage_debut, plage_fin in plages_hors_filigrane(filigrane, debut, fin):
+        nouvelles = telecharger(ticker, plage_debut.strftime('%Y-%m-%d'), plage_fin.strftime('%Y-%m-%d'))
+        if nouvelles is not None:
+            actions = nouvelles if actions is None else dedoublonner(pd.concat([actions, nouvelles]))
+            ecrire_cache(actions, chemin_actions(ticker))
+
+        if filigrane is None:
+            filigrane = {'debut': plage_debut.strftime('%Y-%m-%d'), 'fin': plage_fin.strftime('%Y-%m-%d')}
+        else:
+            filigrane['debut'] = min(pd.Timestamp(filigrane['debut']), plage_debut).strftime('%Y-%m-%d')
+            filigrane['fin'] = max(pd.Timestamp(filigrane['fin']), plage_fin).strftime('%Y-%m-%d')
+        ecrire_filigrane(ticker, filigrane, FILIGRANE_ACTIONS)
+
+    return actions
+
+
+# Empreinte du contenu de la table : change dès qu'une opération est ajoutée ou corrigée
+def signature_actions(actions):
+    if actions is None or actions.empty:
+        return 'aucune'
+    empreinte = pd.util.hash_pandas_object(actions, index=True).to_numpy()
+    return hashlib.sha1(empreinte.tobytes()).hexdigest()[:16]
+
+
+# Facteurs cumulés par séance. Une opération datée t s'applique à toutes les séances
+# antérieures à t : son facteur est placé sur la veille (recherche dichotomique), puis
+# le produit cumulé à rebours donne, pour chaque séance, le produit des opérations futures.
+#   division de ratio r : prix / r, volume * r
+#   dividende D : prix * (1 - D / Close de la veille)   (convention Yahoo / CRSP)
+def facteurs_ajustement(dates, close, actions):
+    nb = len(dates)
+    facteur_prix = np.ones(nb)
+    facteur_volume = np.ones(nb)
+    if actions is None or actions.empty or nb == 0:
+        return facteur_prix, facteur_volume
+
+    positions = np.searchsorted(np.asarray(dates, dtype='datetime64[ns]'),
+                                actions.index.to_numpy(dtype='datetime64[ns]'), side='left')
+    retenues = positions > 0
+    veilles = positions[retenues] - 1
+
+    ratios = actions['Stock Splits'].to_numpy(dtype=np.float64)[retenues]
+    ratios = np.where(ratios > 0, ratios, 1.0)
+    dividendes = actions['Dividends'].to_numpy(dtype=np.float64)[retenues]
+    close_veille = np.asarray(close, dtype=np.float64)[veilles]
+    facteur_dividende = np.where(close_veille > 0, 1 - dividendes / close_veille, 1.0)
+
+    np.multiply.at(facteur_prix, veilles, facteur_dividende / ratios)
+    np.multiply.at(facteur_volume, veilles, ratios)
+    return np.cumprod(facteur_prix[::-1])[::-1], np.cumprod(facteur_volume[::-1])[::-1]
+
+
+def ajuster_prix(data, facteur_prix, facteur_volume):
+    data = data.copy()
+    colonnes = [col for col in COLONNES_PRIX if col in data.columns]
+    data[colonnes] = data[colonnes].mul(facteur_prix, axis=0)
+    if 'Volume' in data.columns:
+        data['Volume'] = data['Volume'] * facteur_volume
+    return data
+
+
+def chemin_ajustement(ticker, signature):
+    return os.path.join(repertoire_ticker(ticker), f"ajustement_{signature}.parquet")
+
+
+# Facteurs de tout l'historique en cache, relus tant que la table des actions est inchangée.
+# Les séances ajoutées après le calcul n'ont aucune opération future connue : facteur 1.
+def facteurs_en_cache(ticker, historique, actions):
+    signature = signature_actions(actions)
+    chemin = chemin_ajustement(ticker, signature)
+
+    if os.path.exists(chemin):
+        facteurs = pd.read_parquet(chemin)
+        derniere = facteurs.index[-1]
+        anciennes = historique.index[historique.index <= derniere]
+        reutilisable = (
+            historique.index[0] >= facteurs.index[0]
+            and anciennes.isin(facteurs.index).all()
+            and (actions is None or actions.empty or actions.index.max() <= derniere)
+        )
+        if reutilisable:
+            return facteurs.reindex(historique.index).fillna(1.0)
+
+    facteur_prix, facteur_volume = facteurs_ajustement(historique.index, historique['Close'], actions)
+    facteurs = pd.DataFrame({'Facteur_Prix': facteur_prix, 'Facteur_Volume': facteur_volume}, index=historique.index)
+    for ancien in glob.glob(os.path.join(repertoire_ticker(ticker), 'ajustement_*.parquet')):
+        if ancien != chemin:
+            os.remove(ancien)
+    ecrire_cache(facteurs, chemin)
+    return facteurs
+
+
+# Prix bruts de [debut, fin[ ajustés à la demande (ajuste=False : prix bruts tels quels).
+# Les opérations postérieures à `fin` modifient aussi les prix passés : la table des
+# actions est donc rafraîchie jusqu'à aujourd'hui.
+# Cache déjà ajusté par la source : les prix sont rendus tels quels (ajuste=True) ou
+# refusés (ajuste=False, les prix bruts ne sont pas reconstructibles). Cache construit
+# avant l'indicateur du filigrane : refusé, faute de savoir s'il est déjà ajusté.
+def charger_donnees_ajustees(ticker, debut, fin, fournisseur=None, ajuste=True):
+    if fournisseur is None:
+        fournisseur = fournisseur_par_defaut()
+    data = charger_donnees(ticker, debut, fin, fournisseur)
+    if data is None:
+        return data
+
+    filigrane = lire_filigrane(ticker)
+    source_ajustee = filigrane.get('ajuste') if filigrane is not None else None
+    if source_ajustee:
+        if not ajuste:
+            raise ValueError(f"{ticker} : le cache contient des prix déjà ajustés, les prix bruts ne sont pas disponibles")
+        return data
+    if not ajuste:
+        return data
+    if source_ajustee is None:
+        raise ValueError(f"{ticker} : cache sans indicateur d'ajustement, à reconstruire avec un fournisseur de prix bruts")
+
+    actions = rafraichir_actions(ticker, debut, pd.Timestamp.today().normalize(), fournisseur)
+    facteurs = facteurs_en_cache(ticker, lire_historique(ticker), actions).reindex(data.index)
+    return ajuster_prix(data, facteurs['Facteur_Prix'].to_numpy(), facteurs['Facteur_Volume'].to_numpy())
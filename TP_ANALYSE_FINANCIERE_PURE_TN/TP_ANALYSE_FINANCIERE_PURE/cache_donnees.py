@@ -0,0 +1,208 @@
+import os
+import glob
+import json
+import hashlib
+import threading
+import importlib.util
+import pandas as pd
+from calendrier import seances
+from fournisseurs import fournisseur_par_defaut
+
+############
+# CACHE LOCAL DES DONNÉES DE MARCHÉ
+############
+
+# Répertoire du cache partagé par toutes les parties (surchargeable via TP_CACHE)
+REPERTOIRE_CACHE = os.environ.get(
+    'TP_CACHE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+)
+
+# Au-delà de ce nombre de segments, l'historique d'un ticker est compacté
+SEGMENTS_MAX = 32
+
+# Organisation du cache :
+#   cache/<TICKER>/segment_00000.parquet, segment_00001.parquet, ...  (ajout seul)
+#   cache/<TICKER>/filigrane.json  (plage déjà couverte + dernière séance connue +
+#                                   prix déjà ajustés ou bruts, selon le fournisseur)
+
+
+def repertoire_ticker(ticker):
+    return os.path.join(REPERTOIRE_CACHE, ticker)
+
+
+# Empreinte courte du code source de modules : placée dans le nom des résultats calculés
+# en cache (données enrichies, KPI), elle les invalide dès qu'une formule ou la liste des
+# champs change
+def empreinte_code(*modules):
+    empreinte = hashlib.sha1()
+    for module in modules:
+        with open(importlib.util.find_spec(module).origin, 'rb') as f:
+            empreinte.update(f.read())
+    return empreinte.hexdigest()[:10]
+
+
+# Téléchargement via le fournisseur (uniquement pour les plages absentes du cache)
+def telecharger_donnees(ticker, debut, fin, fournisseur=None):
+    if fournisseur is None:
+        fournisseur = fournisseur_par_defaut()
+    return fournisseur.telecharger(ticker, debut, fin)
+
+
+# Écriture atomique : un lecteur concurrent ne voit jamais un fichier partiel
+def ecrire_cache(data, chemin):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    chemin_tmp = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    data.to_parquet(chemin_tmp)
+    os.replace(chemin_tmp, chemin)
+
+
+def lire_filigrane(ticker, nom='filigrane.json'):
+    chemin = os.path.join(repertoire_ticker(ticker), nom)
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ecrire_filigrane(ticker, filigrane, nom='filigrane.json'):
+    chemin = os.path.join(repertoire_ticker(ticker), nom)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    chemin_tmp = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(chemin_tmp, 'w', encoding='utf-8') as f:
+        json.dump(filigrane, f)
+    os.replace(chemin_tmp, chemin)
+
+
+def lister_segments(ticker):
+    return sorted(glob.glob(os.path.join(repertoire_ticker(ticker), 'segment_*.parquet')))
+
+
+# Même règle que l'étape 3 : on garde la première occurrence de chaque date
+def dedoublonner(data):
+    data = data[~data.index.duplicated(keep='first')]
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index()
+    return data
+
+
+# Les segments sont lus dans l'ordre d'écriture : une barre déjà en cache n'est jamais remplacée
+def lire_historique(ticker):
+    segments = lister_segments(ticker)
+    if len(segments) == 0:
+        return None
+    return dedoublonner(pd.concat([pd.read_parquet(s) for s in segments]))
+
+
+# Barres datées de `depuis` ou après, dans le même ordre de priorité : les segments (et
+# groupes de lignes) entièrement antérieurs sont écartés d'après les statistiques min/max
+# du pied de page parquet, sans lire leurs barres
+def lire_historique_depuis(ticker, depuis):
+    filtre = [('Date', '>=', pd.Timestamp(depuis))]
+    morceaux = [pd.read_parquet(s, filters=filtre) for s in lister_segments(ticker)]
+    morceaux = [morceau for morceau in morceaux if len(morceau) > 0]
+    if len(morceaux) == 0:
+        return None
+    return dedoublonner(pd.concat(morceaux))
+
+
+# Nouveau segment en fin de liste ; le coût est proportionnel au nombre de nouvelles barres
+def ajouter_segment(ticker, data):
+    segments = lister_segments(ticker)
+    numero = 0
+    if len(segments) > 0:
+        numero = int(os.path.basename(segments[-1])[len('segment_'):-len('.parquet')]) + 1
+    ecrire_cache(data, os.path.join(repertoire_ticker(ticker), f"segment_{numero:05d}.parquet"))
+
+    if len(segments) + 1 > SEGMENTS_MAX:
+        compacter_historique(ticker)
+
+
+# Fusion de tous les segments en un seul (le plus ancien numéro est conservé)
+def compacter_historique(ticker):
+    segments = lister_segments(ticker)
+    data = lire_historique(ticker)
+    ecrire_cache(data, segments[0])
+    for chemin in segments[1:]:
+        os.remove(chemin)
+
+
+# Plages de [debut, fin[ non couvertes par le filigrane (avant et après la plage couverte)
+def plages_hors_filigrane(filigrane, debut, fin):
+    if filigrane is None:
+        plages = [(debut, fin)]
+    else:
+        couvert_debut = pd.Timestamp(filigrane['debut'])
+        couvert_fin = pd.Timestamp(filigrane['fin'])
+        plages = []
+        if debut < couvert_debut:
+            plages.append((debut, couvert_debut))
+        if fin > couvert_fin:
+            plages.append((couvert_fin, fin))
+    return [(plage_debut, plage_fin) for plage_debut, plage_fin in plages if plage_debut < plage_fin]
+
+
+# Plage [debut, fin[ sans aucune séance NYSE (week-end, jour férié) : une réponse vide
+# du fournisseur y est attendue
+def plage_sans_seance(debut, fin):
+    return len(seances(debut, fin - pd.Timedelta(days=1))) == 0
+
+
+def etendre_filigrane(filigrane, plage_debut, plage_fin, ajuste=False):
+    if filigrane is None:
+        return {'debut': plage_debut.strftime('%Y-%m-%d'), 'fin': plage_fin.strftime('%Y-%m-%d'), 'ajuste': ajuste}
+    filigrane['debut'] = min(pd.Timestamp(filigrane['debut']), plage_debut).strftime('%Y-%m-%d')
+    filigrane['fin'] = max(pd.Timestamp(filigrane['fin']), plage_fin).strftime('%Y-%m-%d')
+    return filigrane
+
+
+# Rafraîchissement incrémental : seules les plages hors filigrane sont téléchargées
+def rafraichir_donnees(ticker, debut, fin, fournisseur=None):
+    debut = pd.Timestamp(debut)
+    # La séance du jour n'est jamais téléchargée (barre potentiellement incomplète)
+    fin = min(pd.Timestamp(fin), pd.Timestamp.today().normalize())
+
+    if fournisseur is None:
+        fournisseur = fournisseur_par_defaut()
+    ajuste = getattr(fournisseur, 'ajuste', False)
+
+    filigrane = lire_filigrane(ticker)
+    plages = plages_hors_filigrane(filigrane, debut, fin)
+    # Des prix bruts et des prix ajustés ne se mélangent jamais dans un même historique
+    if plages and filigrane is not None and filigrane.get('ajuste', ajuste) != ajuste:
+        raise ValueError(
+            f"{ticker} : le cache contient des prix {'ajustés' if filigrane['ajuste'] else 'bruts'}, "
+            f"le fournisseur des prix {'ajustés' if ajuste else 'bruts'}"
+        )
+    for plage_debut, plage_fin in plages:
+        nouvelles = telecharger_donnees(ticker, plage_debut.strftime('%Y-%m-%d'), plage_fin.strftime('%Y-%m-%d'), fournisseur)
+        # Le filigrane n'avance que sur les plages effectivement récupérées, ou vides
+        # d'après le calendrier (sinon un week-end serait retéléchargé à chaque appel)
+        if nouvelles is None:
+            if not plage_sans_seance(plage_debut, plage_fin):
+                continue
+            filigrane = etendre_filigrane(filigrane, plage_debut, plage_fin, ajuste)
+            ecrire_filigrane(ticker, filigrane)
+            continue
+        ajouter_segment(ticker, nouvelles)
+
+        filigrane = etendre_filigrane(filigrane, plage_debut, plage_fin, ajuste)
+        derniere = nouvelles.index.max().strftime('%Y-%m-%d')
+        filigrane['derniere_seance'] = max(filigrane.get('derniere_seance', derniere), derniere)
+        ecrire_filigrane(ticker, filigrane)
+
+    return filigrane
+
+
+# Point d'entrée unique des scripts : rafraîchissement du cache puis lecture de la plage [debut, fin[
+def charger_donnees(ticker, debut, fin, fournisseur=None):
+    rafraichir_donnees(ticker, debut, fin, fournisseur)
+
+    data = lire_historique(ticker)
+    if data is None:
+        return None
+
+    data = data[(data.index >= pd.Timestamp(debut)) & (data.index < pd.Timestamp(fin))]
+    if data.empty:
+        return None
+    return data
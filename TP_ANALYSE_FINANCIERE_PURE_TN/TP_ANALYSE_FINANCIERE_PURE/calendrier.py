@@ -0,0 +1,113 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, Holiday, GoodFriday, MO,
+    USPresidentsDay, USMemorialDay, USLaborDay, USThanksgivingDay,
+    nearest_workday, sunday_to_monday,
+)
+from pandas.tseries.offsets import DateOffset, Day
+
+############
+# CALENDRIER DES SÉANCES DE BOURSE (NYSE)
+############
+
+# Jours fériés NYSE. Le 1er janvier tombant un samedi n'est pas reporté au vendredi.
+class CalendrierNYSE(AbstractHolidayCalendar):
+    rules = [
+        Holiday('Nouvel An', month=1, day=1, observance=sunday_to_monday),
+        Holiday('Martin Luther King', month=1, day=1, start_date='1998-01-01', offset=DateOffset(weekday=MO(3))),
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('Fête nationale', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Noël', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+# Fermetures exceptionnelles (événements, deuils nationaux)
+FERMETURES_EXCEPTIONNELLES = pd.DatetimeIndex([
+    '2001-09-11', '2001-09-12', '2001-09-13', '2001-09-14',
+    '2004-06-11', '2007-01-02',
+    '2012-10-29', '2012-10-30',
+    '2018-12-05', '2025-01-09',
+])
+
+
+def jours_feries(debut, fin):
+    feries = CalendrierNYSE().holidays(start=debut, end=fin)
+    exceptionnels = FERMETURES_EXCEPTIONNELLES[(FERMETURES_EXCEPTIONNELLES >= debut) & (FERMETURES_EXCEPTIONNELLES <= fin)]
+    return feries.union(exceptionnels)
+
+
+# Tableau trié des séances (datetime64[ns]) entre deux dates incluses, précalculé et mémorisé
+@lru_cache(maxsize=32)
+def _seances(debut, fin):
+    jours_ouvres = pd.bdate_range(debut, fin)
+    seances = jours_ouvres.difference(jours_feries(debut, fin))
+    tableau = seances.values.astype('datetime64[ns]')
+    tableau.setflags(write=False)
+    return tableau
+
+
+def seances(debut, fin):
+    return _seances(pd.Timestamp(debut).normalize(), pd.Timestamp(fin).normalize())
+
+
+# Séances écourtées (fermeture à 13h) : veille de la fête nationale et de Noël
+# (du lundi au jeudi) et lendemain de Thanksgiving
+def fermetures_anticipees(debut, fin):
+    jours = seances(debut, fin)
+    index = pd.DatetimeIndex(jours)
+    veille_fete = (index.month == 7) & (index.day == 3) & (index.dayofweek <= 3)
+    veille_noel = (index.month == 12) & (index.day == 24) & (index.dayofweek <= 3)
+    thanksgiving = USThanksgivingDay.dates(debut, fin) + Day(1)
+    lendemain = index.isin(thanksgiving)
+    return jours[veille_fete | veille_noel | lendemain]
+
+
+def _vers_tableau(index):
+    return np.asarray(pd.DatetimeIndex(index).normalize().values.astype('datetime64[ns]'))
+
+
+# Séances attendues absentes des données : différence ensembliste vectorisée sur
+# deux tableaux triés (recherche dichotomique groupée, sans boucle Python)
+def seances_manquantes(index, debut=None, fin=None):
+    dates = np.unique(_vers_tableau(index))
+    if len(dates) == 0:
+        return pd.DatetimeIndex([])
+    attendues = seances(debut if debut is not None else dates[0], fin if fin is not None else dates[-1])
+    positions = np.searchsorted(dates, attendues)
+    positions[positions == len(dates)] = len(dates) - 1
+    presentes = dates[positions] == attendues
+    return pd.DatetimeIndex(attendues[~presentes])
+
+
+# Dates présentes dans les données mais qui ne sont pas des séances (week-end, jour férié)
+def dates_hors_calendrier(index):
+    dates = np.unique(_vers_tableau(index))
+    if len(dates) == 0:
+        return pd.DatetimeIndex([])
+    attendues = seances(dates[0], dates[-1])
+    positions = np.searchsorted(attendues, dates)
+    positions[positions == len(attendues)] = len(attendues) - 1
+    return pd.DatetimeIndex(dates[attendues[positions] != dates])
+
+
+# Alignement sur le calendrier des séances puis report de la dernière valeur connue.
+# Pour un panel indexé par (Ticker, Date), le report se fait ticker par ticker.
+def reindexer_seances(data, debut=None, fin=None, remplir=True):
+    if isinstance(data.index, pd.MultiIndex):
+        tickers = data.index.get_level_values(0).unique()
+        dates = data.index.get_level_values(1)
+        calendrier = pd.DatetimeIndex(seances(debut or dates.min(), fin or dates.max()), name=data.index.names[1])
+        complet = pd.MultiIndex.from_product([tickers, calendrier], names=data.index.names)
+        aligne = data.reindex(complet)
+        return aligne.groupby(level=0).ffill() if remplir else aligne
+
+    calendrier = pd.DatetimeIndex(seances(debut or data.index.min(), fin or data.index.max()), name=data.index.name)
+    aligne = data.reindex(calendrier)
+    return aligne.ffill() if remplir else aligne
@@ -0,0 +1,49 @@
+import os
+import numpy as np
+
+############
+# MODE COMPACT DU DATAFRAME ENRICHI
+############
+
+# Activation par variable d'environnement : TP_MODE_COMPACT=1
+MODE_COMPACT = os.environ.get('TP_MODE_COMPACT', '0') == '1'
+
+# Variables temporelles : les valeurs tiennent largement dans des entiers courts
+TYPES_CALENDRIER = {
+    'Annee': np.int16,
+    'Mois': np.int8,
+    'Jour_Semaine': np.int8,
+    'Trimestre': np.int8,
+}
+
+# Indicateurs dérivés pour lesquels la précision float32 (~7 chiffres significatifs) suffit.
+# Max_Historique reste en float64 : il est comparé par égalité aux prix de clôture.
+COLONNES_FLOAT32 = [
+    'Rendement_Quotidien', 'Rendement_Cumule', 'Log_Rendement',
+    'Volatilite_30j', 'Volatilite_90j', 'Range_Quotidien',
+    'SMA_20', 'SMA_50', 'SMA_200',
+    'Distance_Max_Historique', 'Drawdown',
+]
+
+
+def memoire_ko(data):
+    return data.memory_usage(deep=True).sum() / 1024
+
+
+# Copie compacte : entiers courts, nom du jour catégoriel, indicateurs en float32.
+# Les prix bruts (Open/High/Low/Close/Volume) ne sont jamais modifiés.
+def compacter_donnees(data):
+    data = data.copy()
+
+    for col, type_col in TYPES_CALENDRIER.items():
+        if col in data.columns:
+            data[col] = data[col].astype(type_col)
+
+    if 'Jour_Semaine_Nom' in data.columns:
+        data['Jour_Semaine_Nom'] = data['Jour_Semaine_Nom'].astype('category')
+
+    for col in COLONNES_FLOAT32:
+        if col in data.columns:
+            data[col] = data[col].astype(np.float32)
+
+    return data
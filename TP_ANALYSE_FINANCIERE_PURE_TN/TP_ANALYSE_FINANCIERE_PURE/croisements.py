@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+############
+# DÉTECTION DES CROISEMENTS ET INDEX D'ÉVÉNEMENTS (DATE, TICKER, TYPE)
+############
+
+# Types d'événements : la série courte passe au-dessus (Golden Cross) ou en dessous
+# (Death Cross) de la série longue
+GOLDEN_CROSS = 1
+DEATH_CROSS = -1
+NOMS_TYPES = {GOLDEN_CROSS: 'Golden Cross', DEATH_CROSS: 'Death Cross'}
+
+
+# Changements de signe de (court - long) en une passe, le long du dernier axe (série
+# ou panel) : +1 pour un Golden Cross, -1 pour un Death Cross, 0 sinon.
+# Mêmes conditions que les parties 4 et 5 : écart strictement positif (ou négatif) à la
+# séance, écart de signe différent (nul compris) la veille ; un NaN n'est jamais un croisement.
+def signes_croisements(court, long):
+    ecart = np.asarray(court, dtype=np.float64) - np.asarray(long, dtype=np.float64)
+    signe = np.sign(ecart)
+    signes = np.zeros(ecart.shape, dtype=np.int8)
+    veille = signe[..., :-1]
+    jour = signe[..., 1:]
+    croise = (jour != 0) & (jour != veille) & ~np.isnan(veille) & ~np.isnan(jour)
+    signes[..., 1:] = np.where(croise, jour, 0).astype(np.int8)
+    return signes
+
+
+# Événements triés deux fois, sans aucune colonne temporaire par ticker :
+# - par (date, ticker) : requêtes sur une plage de dates par recherche dichotomique
+# - par (ticker, date), avec le début de chaque ticker : les N derniers d'un ticker
+#   sont une simple tranche
+class IndexCroisements:
+    def __init__(self, tickers, dates, codes, types):
+        self.tickers = list(tickers)
+        self.codes_tickers = {ticker: code for code, ticker in enumerate(self.tickers)}
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        codes = np.asarray(codes, dtype=np.int32)
+        types = np.asarray(types, dtype=np.int8)
+
+        ordre = np.lexsort((codes, dates))
+        self.dates = dates[ordre]
+        self.codes = codes[ordre]
+        self.types = types[ordre]
+
+        ordre_ticker = np.lexsort((dates, codes))
+        self.dates_ticker = dates[ordre_ticker]
+        self.codes_ticker = codes[ordre_ticker]
+        self.types_ticker = types[ordre_ticker]
+        self.debuts_ticker = np.searchsorted(self.codes_ticker, np.arange(len(self.tickers) + 1))
+
+    def __len__(self):
+        return len(self.dates)
+
+    # Série courte et série longue d'un seul ticker
+    @classmethod
+    def depuis_series(cls, ticker, dates, court, long):
+        signes = signes_croisements(court, long)
+        positions = np.flatnonzero(signes)
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        return cls([ticker], dates[positions], np.zeros(len(positions)), signes[positions])
+
+    # Tableaux (tickers, dates) alignés sur des séances communes (séances toutes cotées)
+    @classmethod
+    def depuis_tableaux(cls, tickers, dates, court, long):
+        signes = signes_croisements(court, long)
+        lignes, colonnes = np.nonzero(signes)
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        return cls(tickers, dates[colonnes], lignes, signes[lignes, colonnes])
+
+    # Résultats du moteur de panel : la veille est la séance cotée précédente du ticker
+    @classmethod
+    def depuis_panel(cls, panel, resultats, court='SMA_50', long='SMA_200'):
+        signes = signes_croisements(panel.tasser(resultats[court]), panel.tasser(resultats[long]))
+        lignes, rangs = np.nonzero(signes)
+        colonnes = panel.ordre[lignes, rangs]
+        dates = np.asarray(panel.dates, dtype='datetime64[ns]')
+        return cls(panel.tickers, dates[colonnes], lignes, signes[lignes, rangs])
+
+    def _table(self, dates, codes, types):
+        return pd.DataFrame(
+            {'Ticker': [self.tickers[code] for code in codes],
+             'Type': [NOMS_TYPES[type_] for type_ in types]},
+            index=pd.DatetimeIndex(dates, name='Date'),
+        )
+
+    # Événements de [debut, fin[ (bornes facultatives), tous tickers confondus
+    def entre(self, debut=None, fin=None):
+        gauche = 0 if debut is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(debut), 'ns'), side='left')
+        droite = len(self.dates) if fin is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(fin), 'ns'), side='left')
+        return self._table(self.dates[gauche:droite], self.codes[gauche:droite], self.types[gauche:droite])
+
+    # Les `nb` derniers événements d'un ticker, du plus ancien au plus récent
+    def derniers(self, ticker, nb=1):
+        code = self.codes_tickers.get(ticker)
+        if code is None:
+            return self._table([], [], [])
+        debut, fin = self.debuts_ticker[code], self.debuts_ticker[code + 1]
+        debut = max(debut, fin - nb)
+        return self._table(self.dates_ticker[debut:fin], self.codes_ticker[debut:fin], self.types_ticker[debut:fin])
+
+    # Les `nb` derniers événements de chaque ticker
+    def derniers_par_ticker(self, nb=1):
+        fins = self.debuts_ticker[1:]
+        debuts = np.maximum(self.debuts_ticker[:-1], fins - nb)
+        positions = np.concatenate([np.arange(debut, fin) for debut, fin in zip(debuts, fins)] + [np.arange(0)])
+        return self._table(self.dates_ticker[positions], self.codes_ticker[positions], self.types_ticker[positions])
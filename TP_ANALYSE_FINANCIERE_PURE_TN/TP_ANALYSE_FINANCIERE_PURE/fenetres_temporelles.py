@@ -0,0 +1,167 @@
+import re
+import numpy as np
+import pandas as pd
+from noyaux_indicateurs import sommes_prefixes, sommes_entre_bornes
+
+############
+# FENÊTRES GLISSANTES CALENDAIRES ("30D", "1Y"...) SUR L'INDEX DES DATES
+############
+
+# Une fenêtre de durée D à la date t couvre ]t - D, t] (comme rolling('30D') de pandas) :
+# son nombre de séances suit le calendrier réel (jours fériés, trous, données intraday).
+# Les bornes de toutes les fenêtres sont obtenues d'un coup par recherche dichotomique
+# des dates t - D, croissantes, dans l'index trié ; chaque statistique est ensuite
+# vectorisée à partir de ces bornes (sommes préfixes, extremums par segments).
+# Mêmes conventions que pandas pour les fenêtres temporelles : NaN ignorés, une seule
+# valeur présente suffit (min_periodes=1).
+
+# Durées en jours/semaines ("30D", "2W") ou en mois/années calendaires ("6M", "1Y") ;
+# toute autre durée est lue par pd.Timedelta ("4h", "30min")
+FORMAT_FENETRE = re.compile(r'^(\d+)([DWMY])$')
+
+
+def reculer(dates, fenetre):
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    correspondance = FORMAT_FENETRE.match(fenetre)
+    if correspondance is None:
+        return dates - pd.Timedelta(fenetre).to_timedelta64()
+    nombre, unite = int(correspondance.group(1)), correspondance.group(2)
+    if unite in 'MY':
+        mois = nombre * (12 if unite == 'Y' else 1)
+        reculees = pd.DatetimeIndex(dates.ravel()) - pd.DateOffset(months=mois)
+        return reculees.to_numpy(dtype='datetime64[ns]').reshape(dates.shape)
+    return dates - np.timedelta64(nombre * (7 if unite == 'W' else 1), 'D')
+
+
+# Première position de la fenêtre de chaque date (la fenêtre de i est [debuts[i], i]).
+# Dates (dates,) ou (tickers, dates), triées le long du dernier axe.
+def bornes_fenetre(dates, fenetre):
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    limites = reculer(dates, fenetre)
+    if dates.ndim == 1:
+        return np.searchsorted(dates, limites, side='right')
+    return np.stack([np.searchsorted(ligne, limites_ligne, side='right')
+                     for ligne, limites_ligne in zip(dates, limites)])
+
+
+def _fins(valeurs):
+    return np.broadcast_to(np.arange(1, valeurs.shape[-1] + 1), valeurs.shape)
+
+
+# Débuts de fenêtre à la forme des valeurs (dates communes (dates,) pour un panel)
+def _debuts(valeurs, dates, fenetre):
+    return np.broadcast_to(bornes_fenetre(dates, fenetre), valeurs.shape)
+
+
+def moyenne_temporelle(valeurs, dates, fenetre, min_periodes=1):
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    somme, nb = sommes_entre_bornes(sommes_prefixes(valeurs), _debuts(valeurs, dates, fenetre), _fins(valeurs))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(nb >= max(min_periodes, 1), somme / nb, np.nan)
+
+
+# Écart-type (ddof=1 par défaut) à partir des sommes des valeurs et de leurs carrés
+def ecart_type_temporel(valeurs, dates, fenetre, ddof=1, min_periodes=1):
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    debuts = _debuts(valeurs, dates, fenetre)
+    fins = _fins(valeurs)
+    somme, nb = sommes_entre_bornes(sommes_prefixes(valeurs), debuts, fins)
+    somme_carres, _ = sommes_entre_bornes(sommes_prefixes(valeurs * valeurs), debuts, fins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (somme_carres - somme * somme / nb) / (nb - ddof)
+    return np.where((nb > ddof) & (nb >= min_periodes), np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+
+# Extremum sur des fenêtres de longueur variable, en O(n) : les débuts de fenêtre sont
+# croissants (principe de la file à deux piles). Les positions sont découpées en
+# segments ; un segment se termine à la première position dont la fenêtre commence dans
+# le segment. Toute fenêtre est alors couverte par la fin du segment précédent
+# (extremum suffixe) et le début du sien (extremum préfixe), ou par la seule fin du sien
+# quand elle s'y trouve entièrement. `operation` vaut np.fmax ou np.fmin (NaN ignorés,
+# fenêtre sans valeur : NaN).
+def extremum_temporel(valeurs, dates, fenetre, operation=np.fmax):
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    forme = valeurs.shape
+    nb = forme[-1]
+    if valeurs.size == 0:
+        return np.full(forme, np.nan)
+    # Tableaux transposés (dates, lignes) : chaque position est une ligne contiguë.
+    # Dates communes : débuts (dates, 1), un seul découpage pour toutes les lignes.
+    blocs = valeurs.reshape(-1, nb).T.copy()
+    debuts = bornes_fenetre(dates, fenetre)
+    debuts = debuts[:, None] if debuts.ndim == 1 else np.broadcast_to(debuts, forme).reshape(-1, nb).T
+    departs = _departs_segments(debuts)
+
+    prefixes = blocs
+    suffixes = blocs.copy()
+    if departs.shape[1] == 1:
+        # Découpage commun : boucle sur les rangs dans les segments, chaque pas traite
+        # tous les segments et toutes les lignes
+        premiers = np.flatnonzero(departs[:, 0])
+        derniers = np.append(premiers[1:], nb) - 1
+        longueurs = derniers - premiers + 1
+        ordre = np.argsort(-longueurs, kind='stable')
+        premiers, derniers, longueurs = premiers[ordre], derniers[ordre], longueurs[ordre]
+        for rang in range(1, int(longueurs[0])):
+            # Segments d'au moins rang + 1 positions (les premiers de la liste)
+            nb_segments = np.searchsorted(-longueurs, -rang, side='left')
+            positions = premiers[:nb_segments] + rang
+            prefixes[positions] = operation(prefixes[positions - 1], prefixes[positions])
+            positions = derniers[:nb_segments] - rang
+            suffixes[positions] = operation(suffixes[positions], suffixes[positions + 1])
+    else:
+        # Découpage propre à chaque ligne : balayage des positions, toutes lignes à la fois
+        fins = np.ones_like(departs)
+        fins[:-1] = departs[1:]
+        for position in range(1, nb):
+            prefixes[position] = np.where(departs[position], prefixes[position],
+                                          operation(prefixes[position - 1], prefixes[position]))
+        for position in range(nb - 2, -1, -1):
+            suffixes[position] = np.where(fins[position], suffixes[position],
+                                          operation(suffixes[position], suffixes[position + 1]))
+
+    positions = np.arange(nb)[:, None]
+    debut_segment = np.maximum.accumulate(np.where(departs, positions, 0), axis=0)
+    resultat = np.take_along_axis(suffixes, np.minimum(debuts, positions), axis=0)
+    resultat = np.where(debuts < debut_segment, operation(resultat, prefixes), resultat)
+    resultat = np.where(debuts > positions, np.nan, resultat)
+    return resultat.T.reshape(forme)
+
+
+# Débuts de segments (dates, lignes) pour des débuts de fenêtre croissants (dates, lignes)
+def _departs_segments(debuts):
+    nb, nb_lignes = debuts.shape
+    # avant[ligne, p] : nombre de fenêtres commençant avant p, c'est-à-dire la première
+    # position dont la fenêtre commence en p ou après
+    histogramme = np.bincount((debuts.T + np.arange(nb_lignes)[:, None] * (nb + 1)).ravel(),
+                              minlength=nb_lignes * (nb + 1)).reshape(nb_lignes, nb + 1)
+    avant = np.zeros((nb_lignes, nb + 1), dtype=np.int64)
+    np.cumsum(histogramme[:, :-1], axis=1, out=avant[:, 1:])
+
+    # Chaque ligne avance d'un segment par tour
+    departs = np.zeros((nb, nb_lignes), dtype=bool)
+    departs[0] = True
+    lignes = np.arange(nb_lignes)
+    depart = np.zeros(nb_lignes, dtype=np.int64)
+    while len(lignes) > 0:
+        depart = avant[lignes, depart] + 1
+        garde = depart < nb
+        lignes, depart = lignes[garde], depart[garde]
+        departs[depart, lignes] = True
+    return departs
+
+
+def minimum_temporel(valeurs, dates, fenetre):
+    return extremum_temporel(valeurs, dates, fenetre, np.fmin)
+
+
+def maximum_temporel(valeurs, dates, fenetre):
+    return extremum_temporel(valeurs, dates, fenetre, np.fmax)
+
+
+# Support et résistance à la dernière date : plus bas et plus haut de la fenêtre ]t - D, t]
+def support_resistance(close, dates, fenetre='1Y'):
+    close = np.asarray(close, dtype=np.float64)
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    debut = np.searchsorted(dates, reculer(dates[-1:], fenetre)[0], side='right')
+    return np.nanmin(close[debut:]), np.nanmax(close[debut:])
@@ -0,0 +1,187 @@
+import io
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+import numpy as np
+import pandas as pd
+
+############
+# FOURNISSEURS DE DONNÉES (EN LIGNE / HORS LIGNE)
+############
+
+# Choix du fournisseur par variables d'environnement :
+#   TP_FOURNISSEUR = "yfinance" (défaut), "fichier", "minutes" ou "http"
+#   TP_DONNEES     = répertoire des fichiers <TICKER>.parquet / <TICKER>.csv pour le rejeu,
+#                    répertoire des fichiers <TICKER>_minutes.* pour les barres minute,
+#                    ou URL de base pour le fournisseur HTTP
+
+
+# Aplatir la structure multi-index des colonnes (format yf.download)
+def preparer_donnees(data):
+    if data is None or data.empty:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.droplevel(1)
+    data.columns.name = None
+    data.index.name = 'Date'
+    return data
+
+
+# Trouver le nom de la colonne du prix ajusté (sinon 'Close')
+def detecter_prix_col(data):
+    for col in data.columns:
+        if 'adj' in col.lower() and 'close' in col.lower():
+            return col
+    return 'Close'
+
+
+# Colonnes dans l'ordre renvoyé par yf.download
+COLONNES_OHLCV = ['Close', 'High', 'Low', 'Open', 'Volume']
+
+# Opérations sur titres (noms yfinance) : dividende par action et ratio de division
+COLONNES_ACTIONS = ['Dividends', 'Stock Splits']
+
+
+# Table des opérations : une ligne par date de détachement, lignes vides retirées
+def preparer_actions(actions):
+    if actions is None or actions.empty:
+        return None
+    actions = actions.reindex(columns=COLONNES_ACTIONS).fillna(0.0).astype('float64')
+    actions = actions[(actions != 0).any(axis=1)]
+    if actions.empty:
+        return None
+    actions.index.name = 'Date'
+    return actions.sort_index()
+
+
+# Fournisseur en ligne : Yahoo Finance
+# (Ticker.history plutôt que yf.download, qui partage un état global entre threads).
+# Une plage sans donnée renvoie None, pas une exception : seules les vraies erreurs
+# (réseau, limitation) remontent et sont réessayées par l'ingestion.
+# Avec ajuste=False, les prix sont bruts : Yahoo ajuste toujours Close des divisions,
+# l'ajustement est donc annulé à partir de l'historique complet des divisions.
+class FournisseurYFinance:
+    def __init__(self, ajuste=True):
+        self.ajuste = ajuste
+
+    def telecharger(self, ticker, debut, fin):
+        import yfinance as yf
+
+        titre = yf.Ticker(ticker)
+        data = titre.history(start=debut, end=fin, auto_adjust=self.ajuste, actions=False)
+        if data is None or data.empty:
+            return None
+        data.index = data.index.tz_localize(None).normalize()
+        data = data[COLONNES_OHLCV]
+
+        if not self.ajuste:
+            divisions = titre.splits
+            if divisions is not None and not divisions.empty:
+                divisions.index = divisions.index.tz_localize(None).normalize()
+                facteur = np.ones(len(data))
+                for date, ratio in divisions.items():
+                    facteur[data.index < date] *= ratio
+                data = data.copy()
+                data[['Close', 'High', 'Low', 'Open']] = data[['Close', 'High', 'Low', 'Open']].mul(facteur, axis=0)
+                data['Volume'] = data['Volume'] / facteur
+        return preparer_donnees(data)
+
+    def telecharger_actions(self, ticker, debut, fin):
+        import yfinance as yf
+
+        actions = yf.Ticker(ticker).actions
+        if actions is None or actions.empty:
+            return None
+        actions = actions.copy()
+        actions.index = actions.index.tz_localize(None).normalize()
+
+        # Yahoo exprime les dividendes en actions d'aujourd'hui : retour au montant par
+        # action à la date de détachement, cohérent avec les prix bruts
+        divisions = actions['Stock Splits'].where(actions['Stock Splits'] > 0, 1.0).to_numpy()
+        posterieures = np.ones(len(actions))
+        posterieures[:-1] = np.cumprod(divisions[::-1])[::-1][1:]
+        actions['Dividends'] = actions['Dividends'] * posterieures
+
+        actions = actions[(actions.index >= pd.Timestamp(debut)) & (actions.index < pd.Timestamp(fin))]
+        return preparer_actions(actions)
+
+
+# Chaque fournisseur indique par `ajuste` si ses prix sont déjà ajustés des dividendes et
+# divisions ; l'indicateur est enregistré dans le filigrane du cache (actions_corporatives
+# n'ajuste que des prix bruts).
+
+# Fournisseur HTTP générique : GET <url_base>/<TICKER>.csv?debut=...&fin=...
+# (serveur interne ou serveur local de substitution pour les tests d'ingestion)
+class FournisseurHTTP:
+    def __init__(self, url_base, delai_max=10, ajuste=False):
+        self.url_base = url_base.rstrip('/')
+        self.delai_max = delai_max
+        self.ajuste = ajuste
+
+    def lire_csv(self, nom, debut, fin):
+        requete = urllib.parse.urlencode({'debut': debut, 'fin': fin})
+        url = f"{self.url_base}/{urllib.parse.quote(nom)}.csv?{requete}"
+        try:
+            with urllib.request.urlopen(url, timeout=self.delai_max) as reponse:
+                contenu = reponse.read()
+        except urllib.error.HTTPError as erreur:
+            # 404 : ticker inconnu du serveur, inutile de réessayer
+            if erreur.code == 404:
+                return None
+            raise
+        return pd.read_csv(io.BytesIO(contenu), index_col=0, parse_dates=True)
+
+    def telecharger(self, ticker, debut, fin):
+        return preparer_donnees(self.lire_csv(ticker, debut, fin))
+
+    # GET <url_base>/<TICKER>_actions.csv?debut=...&fin=...
+    def telecharger_actions(self, ticker, debut, fin):
+        return preparer_actions(self.lire_csv(f"{ticker}_actions", debut, fin))
+
+
+# Fournisseur hors ligne : rejeu de fichiers locaux, sans accès réseau
+class FournisseurFichier:
+    def __init__(self, repertoire, ajuste=False):
+        self.repertoire = repertoire
+        self.ajuste = ajuste
+
+    def lire_fichier(self, nom):
+        chemin = os.path.join(self.repertoire, f"{nom}.parquet")
+        if os.path.exists(chemin):
+            return pd.read_parquet(chemin)
+
+        chemin = os.path.join(self.repertoire, f"{nom}.csv")
+        if os.path.exists(chemin):
+            return pd.read_csv(chemin, index_col=0, parse_dates=True)
+
+        return None
+
+    def telecharger(self, ticker, debut, fin):
+        data = self.lire_fichier(ticker)
+        if data is None:
+            return None
+        data = data[(data.index >= pd.Timestamp(debut)) & (data.index < pd.Timestamp(fin))]
+        return preparer_donnees(data.copy())
+
+    # Opérations sur titres : fichier <TICKER>_actions.parquet / .csv
+    def telecharger_actions(self, ticker, debut, fin):
+        actions = self.lire_fichier(f"{ticker}_actions")
+        if actions is None:
+            return None
+        actions = actions[(actions.index >= pd.Timestamp(debut)) & (actions.index < pd.Timestamp(fin))]
+        return preparer_actions(actions.copy())
+
+
+def fournisseur_par_defaut():
+    nom = os.environ.get('TP_FOURNISSEUR', 'yfinance').lower()
+    if nom == 'fichier':
+        return FournisseurFichier(os.environ.get('TP_DONNEES', '.'))
+    if nom == 'minutes':
+        from ingestion_intraday import FournisseurMinutes
+        return FournisseurMinutes(os.environ.get('TP_DONNEES', '.'))
+    if nom == 'http':
+        return FournisseurHTTP(os.environ['TP_DONNEES'])
+    if nom == 'yfinance':
+        return FournisseurYFinance()
+    raise ValueError(f"Fournisseur inconnu : {nom}")
@@ -0,0 +1,79 @@
+import numpy as np
+from noyaux_indicateurs import (
+    extremum_mobile, moyenne_depuis_prefixes, moyenne_ecart_type_mobile, moyenne_exponentielle,
+    sommes_prefixes,
+)
+
+############
+# INDICATEURS TECHNIQUES VECTORISÉS (SÉRIE OU PANEL)
+############
+
+# Chaque indicateur reçoit des tableaux NumPy et calcule le long du dernier axe : une
+# série (dates,) ou un panel (tickers, dates) du moteur de panel, sans boucle par valeur.
+# Conventions de pandas : une fenêtre glissante contenant un NaN donne NaN, les moyennes
+# exponentielles ignorent les NaN (ewm().mean()).
+
+
+def _decaler(valeurs):
+    decale = np.empty_like(valeurs)
+    decale[..., 0] = np.nan
+    decale[..., 1:] = valeurs[..., :-1]
+    return decale
+
+
+# Moyenne mobile exponentielle sur `span` séances (α = 2 / (span + 1))
+def ema(close, span):
+    return moyenne_exponentielle(close, 2.0 / (span + 1))
+
+
+# RSI de Wilder : moyennes exponentielles (α = 1 / fenetre) des hausses et des baisses
+def rsi(close, fenetre=14):
+    close = np.asarray(close, dtype=np.float64)
+    variation = close - _decaler(close)
+    hausses = moyenne_exponentielle(np.maximum(variation, 0.0), 1.0 / fenetre)
+    baisses = moyenne_exponentielle(np.maximum(-variation, 0.0), 1.0 / fenetre)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 - 100 / (1 + hausses / baisses)
+
+
+# MACD : écart des EMA courte et longue, ligne de signal et histogramme
+def macd(close, court=12, long=26, signal=9):
+    ligne = ema(close, court) - ema(close, long)
+    ligne_signal = ema(ligne, signal)
+    return ligne, ligne_signal, ligne - ligne_signal
+
+
+# Bandes de Bollinger : moyenne mobile ± nb_ecarts écarts-types (ddof=1, comme rolling().std())
+def bollinger(close, fenetre=20, nb_ecarts=2.0):
+    milieu, ecart = moyenne_ecart_type_mobile(close, fenetre)
+    return milieu, milieu + nb_ecarts * ecart, milieu - nb_ecarts * ecart
+
+
+# Range vrai : max(High - Low, |High - Close veille|, |Low - Close veille|), la première
+# séance se limitant à High - Low
+def range_vrai(high, low, close):
+    close_veille = _decaler(np.asarray(close, dtype=np.float64))
+    return np.fmax(high - low, np.fmax(np.abs(high - close_veille), np.abs(low - close_veille)))
+
+
+# ATR : moyenne exponentielle de Wilder (α = 1 / fenetre) du range vrai
+def atr(high, low, close, fenetre=14):
+    return moyenne_exponentielle(range_vrai(high, low, close), 1.0 / fenetre)
+
+
+# Stochastique : position du Close dans le range [plus bas, plus haut] des `fenetre`
+# dernières séances (%K), puis moyenne mobile de %K sur `lissage` séances (%D)
+def stochastique(high, low, close, fenetre=14, lissage=3):
+    plus_haut = extremum_mobile(high, fenetre, np.maximum)
+    plus_bas = extremum_mobile(low, fenetre, np.minimum)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pourcentage_k = 100 * (close - plus_bas) / (plus_haut - plus_bas)
+    return pourcentage_k, moyenne_depuis_prefixes(sommes_prefixes(pourcentage_k), lissage)
+
+
+# On-Balance Volume : volume cumulé, signé par le sens de la variation du Close
+# (variation nulle ou inconnue : 0)
+def obv(close, volume):
+    close = np.asarray(close, dtype=np.float64)
+    sens = np.nan_to_num(np.sign(close - _decaler(close)))
+    return np.cumsum(sens * np.nan_to_num(np.asarray(volume, dtype=np.float64)), axis=-1)
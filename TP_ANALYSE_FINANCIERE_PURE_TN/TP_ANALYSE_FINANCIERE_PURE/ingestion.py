@@ -0,0 +1,122 @@
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cache_donnees import rafraichir_donnees
+from fournisseurs import fournisseur_par_defaut
+from statistiques_glissantes import mettre_a_jour_suivi, statistiques_courantes
+from stockage_mmap import exporter_store, ouvrir_store
+from suivi_drawdown import mettre_a_jour_suivi_drawdown
+
+############
+# INGESTION CONCURRENTE D'UN UNIVERS DE TICKERS
+############
+
+
+# Seau à jetons partagé par tous les threads : au plus `debit` requêtes par seconde,
+# avec des rafales limitées à `capacite` requêtes
+class SeauJetons:
+    def __init__(self, debit, capacite=None):
+        self.debit = float(debit)
+        self.capacite = float(capacite if capacite is not None else max(1.0, debit))
+        self.jetons = self.capacite
+        self.dernier = time.monotonic()
+        self.verrou = threading.Lock()
+
+    def prendre(self):
+        while True:
+            with self.verrou:
+                maintenant = time.monotonic()
+                self.jetons = min(self.capacite, self.jetons + (maintenant - self.dernier) * self.debit)
+                self.dernier = maintenant
+                if self.jetons >= 1:
+                    self.jetons -= 1
+                    return
+                attente = (1 - self.jetons) / self.debit
+            time.sleep(attente)
+
+
+# Enveloppe d'un fournisseur : limitation de débit + nouvelles tentatives avec recul exponentiel
+class FournisseurRobuste:
+    def __init__(self, fournisseur, seau, nb_essais=3, delai_initial=0.5):
+        self.fournisseur = fournisseur
+        self.seau = seau
+        self.nb_essais = nb_essais
+        self.delai_initial = delai_initial
+        self.ajuste = getattr(fournisseur, 'ajuste', False)
+
+    def telecharger(self, ticker, debut, fin):
+        for essai in range(self.nb_essais):
+            self.seau.prendre()
+            try:
+                return self.fournisseur.telecharger(ticker, debut, fin)
+            except Exception:
+                if essai == self.nb_essais - 1:
+                    raise
+                # Gigue aléatoire pour éviter que tous les threads ne réessaient en même temps
+                delai = self.delai_initial * (2 ** essai)
+                time.sleep(delai * (0.5 + random.random()))
+
+
+# Rafraîchissement d'un ticker puis mise à jour O(1) par nouvelle barre des statistiques
+# glissantes et du suivi de drawdown ; le store binaire (stockage_mmap) est réexporté
+# quand le cache a reçu de nouvelles séances
+def ingerer_ticker(ticker, debut, fin, fournisseur, statistiques=True, store=True):
+    filigrane = rafraichir_donnees(ticker, debut, fin, fournisseur)
+    if filigrane is not None and statistiques:
+        mettre_a_jour_suivi(ticker)
+        mettre_a_jour_suivi_drawdown(ticker)
+    if filigrane is not None and store and ouvrir_store(ticker) is None:
+        exporter_store(ticker)
+    return filigrane
+
+
+# Téléchargement d'un univers directement dans le cache partagé.
+# Un échec reste isolé à son ticker : le lot continue et l'erreur est rapportée.
+def ingerer_univers(tickers, debut, fin, fournisseur=None, nb_threads=8, debit=10.0, nb_essais=3, statistiques=True,
+                    store=True):
+    if fournisseur is None:
+        fournisseur = fournisseur_par_defaut()
+    robuste = FournisseurRobuste(fournisseur, SeauJetons(debit), nb_essais)
+
+    succes = []
+    echecs = {}
+    with ThreadPoolExecutor(max_workers=nb_threads) as executeur:
+        taches = {
+            executeur.submit(ingerer_ticker, ticker, debut, fin, robuste, statistiques, store): ticker
+            for ticker in tickers
+        }
+        for tache in as_completed(taches):
+            ticker = taches[tache]
+            try:
+                filigrane = tache.result()
+            except Exception as erreur:
+                echecs[ticker] = f"{type(erreur).__name__}: {erreur}"
+                continue
+            if filigrane is None:
+                echecs[ticker] = "Aucune donnée"
+            else:
+                succes.append(ticker)
+
+    return sorted(succes), echecs
+
+
+# Usage : python ingestion.py tickers.txt 2010-01-01 2025-01-01
+if __name__ == '__main__':
+    with open(sys.argv[1], encoding='utf-8') as f:
+        univers = [ligne.strip() for ligne in f if ligne.strip()]
+
+    debut_chrono = time.perf_counter()
+    succes, echecs = ingerer_univers(univers, sys.argv[2], sys.argv[3])
+    duree = time.perf_counter() - debut_chrono
+
+    print(f"Tickers ingérés : {len(succes)} / {len(univers)} en {duree:.1f} s")
+    for ticker, message in sorted(echecs.items()):
+        print(f"   {ticker:10} : {message}")
+
+    # Dernières valeurs des statistiques glissantes, lues dans les états mis à jour
+    courantes = statistiques_courantes(succes)
+    if not courantes.empty:
+        print()
+        print(courantes.to_string(float_format=lambda valeur: f"{valeur:.2f}"))
@@ -0,0 +1,160 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from fournisseurs import preparer_donnees
+
+############
+# INGESTION DE BARRES MINUTE AVEC RÉÉCHANTILLONNAGE JOURNALIER EN FLUX
+############
+
+# Les fichiers minute (<TICKER>_minutes.csv ou .parquet) ont une première colonne
+# date-heure et les colonnes Open/High/Low/Close/Volume. Ils sont lus par morceaux :
+# l'historique minute complet n'est jamais chargé en mémoire.
+
+TAILLE_MORCEAU = 500_000
+
+
+def lire_minutes_par_morceaux(chemin, taille_morceau=TAILLE_MORCEAU, depuis=None, jusqu_a=None):
+    if chemin.endswith('.parquet'):
+        if depuis is None and jusqu_a is None:
+            lots = pq.ParquetFile(chemin).iter_batches(batch_size=taille_morceau)
+        else:
+            # Filtre poussé dans la lecture Parquet : les groupes de lignes hors de
+            # [depuis, jusqu_a[ sont écartés d'après leurs statistiques, sans être lus
+            colonne_dates = [champ for champ in pq.read_schema(chemin) if pa.types.is_timestamp(champ.type)][0]
+            dates = ds.field(colonne_dates.name)
+
+            def instant(borne):
+                return pa.scalar(pd.Timestamp(borne).to_datetime64(), type=colonne_dates.type)
+
+            filtre = None
+            if depuis is not None:
+                filtre = dates >= instant(depuis)
+            if jusqu_a is not None:
+                avant_fin = dates < instant(jusqu_a)
+                filtre = avant_fin if filtre is None else filtre & avant_fin
+            lots = ds.dataset(chemin, format='parquet').to_batches(filter=filtre, batch_size=taille_morceau)
+        for lot in lots:
+            if lot.num_rows == 0:
+                continue
+            morceau = lot.to_pandas()
+            # Fichier écrit sans métadonnées pandas : la colonne date-heure redevient l'index
+            if not isinstance(morceau.index, pd.DatetimeIndex):
+                colonne_dates = [col for col in morceau.columns if pd.api.types.is_datetime64_any_dtype(morceau[col])][0]
+                morceau = morceau.set_index(colonne_dates)
+            yield morceau
+    else:
+        # Minutes triées : la lecture s'arrête au premier morceau qui atteint jusqu_a
+        for morceau in pd.read_csv(chemin, index_col=0, parse_dates=True, chunksize=taille_morceau):
+            if depuis is not None:
+                morceau = morceau[morceau.index >= pd.Timestamp(depuis)]
+            if jusqu_a is not None:
+                termine = len(morceau) > 0 and morceau.index[-1] >= pd.Timestamp(jusqu_a)
+                morceau = morceau[morceau.index < pd.Timestamp(jusqu_a)]
+                if termine:
+                    if len(morceau) > 0:
+                        yield morceau
+                    return
+            yield morceau
+
+
+# Agrégation d'un bloc de journées complètes : premier Open, plus haut High, plus bas Low,
+# dernier Close, somme des volumes, et volatilité réalisée intrajournalière (en %)
+def agreger_journees(minutes):
+    jours = minutes.index.normalize()
+    if jours.tz is not None:
+        jours = jours.tz_localize(None)
+
+    # Rendements log minute à minute, sans le saut de la nuit (premier point de chaque jour)
+    close = minutes['Close'].to_numpy(dtype=np.float64)
+    log_rdt = np.empty_like(close)
+    log_rdt[0] = np.nan
+    log_rdt[1:] = np.log(close[1:] / close[:-1])
+    nouveau_jour = np.empty(len(jours), dtype=bool)
+    nouveau_jour[0] = True
+    nouveau_jour[1:] = jours[1:] != jours[:-1]
+    log_rdt[nouveau_jour] = np.nan
+
+    groupes = pd.DataFrame({
+        'Open': minutes['Open'].to_numpy(),
+        'High': minutes['High'].to_numpy(),
+        'Low': minutes['Low'].to_numpy(),
+        'Close': close,
+        'Volume': minutes['Volume'].to_numpy(),
+        'Rendement_Carre': log_rdt ** 2,
+    }, index=jours).groupby(level=0, sort=False)
+
+    journalier = groupes.agg(
+        Open=('Open', 'first'),
+        High=('High', 'max'),
+        Low=('Low', 'min'),
+        Close=('Close', 'last'),
+        Volume=('Volume', 'sum'),
+        Somme_Rendement_Carre=('Rendement_Carre', 'sum'),
+    )
+    journalier['Volatilite_Realisee'] = np.sqrt(journalier.pop('Somme_Rendement_Carre')) * 100
+    journalier.index.name = 'Date'
+    return journalier
+
+
+# Rééchantillonnage en flux : chaque morceau est agrégé dès que ses journées sont complètes.
+# Seule la dernière journée (potentiellement coupée entre deux morceaux) est reportée.
+def reechantillonner_en_journalier(morceaux):
+    report = None
+    for morceau in morceaux:
+        if report is not None:
+            morceau = pd.concat([report, morceau])
+        if morceau.empty:
+            continue
+        if not morceau.index.is_monotonic_increasing:
+            raise ValueError("Les barres minute doivent être triées par ordre chronologique")
+
+        jours = morceau.index.normalize()
+        dernier_jour = jours[-1]
+        complet = jours != dernier_jour
+        report = morceau[~complet]
+        if complet.any():
+            yield agreger_journees(morceau[complet])
+
+    if report is not None and not report.empty:
+        yield agreger_journees(report)
+
+
+def charger_minutes_en_journalier(chemin, taille_morceau=TAILLE_MORCEAU):
+    blocs = list(reechantillonner_en_journalier(lire_minutes_par_morceaux(chemin, taille_morceau)))
+    if len(blocs) == 0:
+        return None
+    return pd.concat(blocs)
+
+
+# Fournisseur (même interface que fournisseurs.py) : les étapes 2 à 5 tournent
+# sur les barres journalières reconstruites à partir des minutes
+class FournisseurMinutes:
+    def __init__(self, repertoire, taille_morceau=TAILLE_MORCEAU):
+        self.repertoire = repertoire
+        self.taille_morceau = taille_morceau
+
+    def telecharger(self, ticker, debut, fin):
+        for extension in ('parquet', 'csv'):
+            chemin = os.path.join(self.repertoire, f"{ticker}_minutes.{extension}")
+            if os.path.exists(chemin):
+                break
+        else:
+            return None
+
+        debut = pd.Timestamp(debut)
+        fin = pd.Timestamp(fin)
+        # Seules les minutes des journées de [debut, fin[ sont lues (bornes arrondies au
+        # jour supérieur) : le fichier n'est plus parcouru au-delà de fin
+        minutes = lire_minutes_par_morceaux(chemin, self.taille_morceau, debut.ceil('D'), fin.ceil('D'))
+        blocs = []
+        for bloc in reechantillonner_en_journalier(minutes):
+            bloc = bloc[(bloc.index >= debut) & (bloc.index < fin)]
+            if not bloc.empty:
+                blocs.append(bloc)
+        if len(blocs) == 0:
+            return None
+        return preparer_donnees(pd.concat(blocs))
@@ -0,0 +1,253 @@
+import numpy as np
+import pandas as pd
+from fenetres_temporelles import bornes_fenetre
+from moteur_kpi import JOURS_PAR_AN, TAUX_SANS_RISQUE
+from noyaux_indicateurs import sommes_entre_bornes, sommes_prefixes
+from rendements_horizons import JOURS_PAR_ANNEE
+
+############
+# KPI GLISSANTS (SÉRIES TEMPORELLES DES KPI DE LA SECTION 5.2, POUR CHAQUE SÉANCE)
+############
+
+# Mêmes définitions que moteur_kpi, calculées sur une fenêtre glissante au lieu de toute
+# la période : volatilité annualisée, rendement moyen annuel, Sharpe, CAGR et VaR
+# historique des rendements quotidiens (%).
+#
+# Une fenêtre est un nombre de séances (252 : comme rolling(window=252), pleine et sans
+# NaN) ou une durée calendaire ("1Y", "3Y" : séances de ]t - D, t], comme les fenêtres
+# de fenetres_temporelles, à condition que l'historique couvre toute la durée).
+# Les sommes préfixes compensées des rendements et de leurs carrés sont construites une
+# seule fois et partagées par toutes les fenêtres ; chaque fenêtre ne coûte ensuite qu'une
+# lecture vectorisée entre ses bornes. Le CAGR d'une fenêtre compose exactement ses
+# rendements : du Close précédant la fenêtre au Close de la séance, sur la durée
+# calendaire qui les sépare.
+
+FENETRES_KPI_GLISSANTS = ('1Y', '3Y')
+
+
+# Premières positions des fenêtres (la fenêtre de i est [debuts[i], i]) et fenêtres
+# complètes (un Close de référence existe avant la fenêtre)
+def _bornes(dates, forme, fenetre):
+    positions = np.broadcast_to(np.arange(forme[-1]), forme)
+    if isinstance(fenetre, str):
+        debuts = np.broadcast_to(bornes_fenetre(dates, fenetre), forme)
+    else:
+        debuts = positions - fenetre + 1
+    return np.maximum(debuts, 0), debuts >= 1
+
+
+############
+# QUANTILE GLISSANT (ARBRE DE FENWICK SUR LES RANGS, TOUTES LES LIGNES À LA FOIS)
+############
+
+# Chaque ligne est compressée en rangs (tri unique des valeurs). L'arbre de Fenwick compte
+# les rangs présents dans la fenêtre : ajouter ou retirer une valeur et lire la k-ième plus
+# petite valeur coûtent O(log n), sans jamais retrier de fenêtre.
+#
+# Les séances sont découpées en blocs consécutifs traités en parallèle : chaque bloc part
+# de l'état exact de la fenêtre à son début (arbre construit d'un coup à partir des
+# seules valeurs de cette fenêtre), puis avance séance par séance. Chaque opération sur
+# l'arbre est vectorisée sur toutes les « voies » (ligne, bloc) ; la boucle Python ne
+# parcourt que la longueur d'un bloc.
+# Nombre de blocs : compromis entre la construction des états initiaux, O(blocs × n) par
+# ligne, et le coût fixe de chaque pas de la boucle, amorti sur toutes les voies.
+BLOCS_REFERENCE = 10_000
+
+
+class ArbreRangs:
+    # `nb_voies` voies de `taille` rangs ; `voies` et `rangs` (une entrée par valeur) :
+    # valeurs présentes au départ
+    def __init__(self, nb_voies, taille, voies, rangs):
+        self.taille = taille
+        # Une voie de l'arbre occupe taille + 2 cases contiguës : la case 0 est inutilisée,
+        # la dernière est une case poubelle, très grande, qui absorbe les positions hors de
+        # l'arbre (aucun masque ni test de fin de boucle par voie)
+        self.largeur = taille + 2
+        self.origines = np.arange(nb_voies) * self.largeur
+        arbre = np.zeros((nb_voies, self.largeur), dtype=np.int32)
+        np.add.at(arbre.reshape(-1), self.origines[voies] + rangs + 1, 1)
+        # Construction en place, niveau par niveau : chaque nœud complet transmet son total
+        # à son parent (position + bit de poids faible)
+        pas = 1
+        while 2 * pas <= taille:
+            noeuds = np.arange(pas, taille + 1 - pas, 2 * pas)
+            arbre[:, noeuds + pas] += arbre[:, noeuds]
+            pas *= 2
+        arbre[:, taille + 1] = np.iinfo(np.int32).max // 2
+        self.arbre = arbre.ravel()
+        self.nb_niveaux = taille.bit_length() + 1
+        self.pas_max = 1 << max(taille.bit_length() - 1, 0)
+
+    # Ajoute `increment` (0 : rien à faire) au rang `rangs` de chaque voie ; rangs et
+    # increment peuvent avoir des dimensions en tête (plusieurs mises à jour par voie)
+    def ajouter(self, rangs, increment):
+        position = rangs + 1
+        increment = np.broadcast_to(increment, position.shape).ravel()
+        for _ in range(self.nb_niveaux):
+            np.add.at(self.arbre, (self.origines + np.minimum(position, self.taille + 1)).ravel(), increment)
+            position = position + (position & -position)
+
+    # Rang (à partir de 0) de la k-ième plus petite valeur présente (k >= 1) ; k peut
+    # avoir des dimensions en tête, la dernière correspondant aux voies
+    def k_ieme(self, k):
+        position = np.zeros(k.shape, dtype=np.int64)
+        restant = k.copy()
+        pas = self.pas_max
+        while pas > 0:
+            suivante = position + pas
+            comptes = self.arbre[self.origines + np.minimum(suivante, self.taille + 1)]
+            avance = comptes < restant
+            position += pas * avance
+            restant -= comptes * avance
+            pas >>= 1
+        return position
+
+
+# Quantile `q` (0-100) des valeurs de chaque fenêtre [debuts[i], i] (debuts croissants),
+# NaN ignorés, interpolation linéaire identique à np.percentile ; NaN si la fenêtre a
+# moins de `min_presentes` valeurs présentes
+def quantile_glissant(valeurs, debuts, q, min_presentes=1):
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    valeurs_2d = np.atleast_2d(valeurs)
+    debuts_2d = np.broadcast_to(np.atleast_2d(debuts), valeurs_2d.shape)
+    nb_lignes, nb = valeurs_2d.shape
+    if nb == 0:
+        return np.full(valeurs.shape, np.nan)
+
+    ordre = np.argsort(valeurs_2d, axis=-1, kind='stable')
+    triees = np.take_along_axis(valeurs_2d, ordre, axis=-1)
+    rangs = np.empty_like(ordre)
+    np.put_along_axis(rangs, ordre, np.broadcast_to(np.arange(nb), ordre.shape), axis=-1)
+    presentes = ~np.isnan(valeurs_2d)
+
+    nb_blocs = int(min(max(round(np.sqrt(BLOCS_REFERENCE / nb_lignes)), 1), nb))
+    longueur = -(-nb // nb_blocs)
+    nb_blocs = -(-nb // longueur)
+    largeur = nb_blocs * longueur
+
+    # Voies (ligne, bloc) : séances du bloc, complétées au-delà de la dernière séance
+    # (valeurs absentes, fenêtre figée)
+    def voies(tableau):
+        complete = np.pad(tableau, ((0, 0), (0, largeur - nb)), mode='edge')
+        return complete.reshape(nb_lignes * nb_blocs, longueur)
+
+    rangs_voies = voies(rangs)
+    presentes_voies = voies(presentes)
+    presentes_voies.reshape(nb_lignes, largeur)[:, nb:] = False
+    debuts_voies = voies(np.asarray(debuts_2d, dtype=np.int64))
+    lignes_voies = np.repeat(np.arange(nb_lignes), nb_blocs)
+
+    # État initial de chaque voie : valeurs présentes de [debuts[s], s[, s début du bloc,
+    # énumérées tranche par tranche (jamais de tableau voies × séances)
+    premieres = np.tile(np.arange(nb_blocs) * longueur, nb_lignes)
+    retirees = np.minimum(debuts_2d[lignes_voies, premieres], premieres)
+    longueurs_initiales = premieres - retirees
+    voies_initiales = np.repeat(np.arange(len(premieres)), longueurs_initiales)
+    positions_initiales = (np.arange(len(voies_initiales))
+                           - np.repeat(np.cumsum(longueurs_initiales) - longueurs_initiales, longueurs_initiales)
+                           + retirees[voies_initiales])
+    lignes_initiales = lignes_voies[voies_initiales]
+    gardees = presentes[lignes_initiales, positions_initiales]
+    voies_initiales = voies_initiales[gardees]
+    arbre = ArbreRangs(len(premieres), nb, voies_initiales,
+                       rangs[lignes_initiales[gardees], positions_initiales[gardees]])
+    comptes = np.bincount(voies_initiales, minlength=len(premieres))
+    fraction = np.float64(q) / 100
+    resultat = np.full(rangs_voies.shape, np.nan)
+
+    for j in range(longueur):
+        # Une mise à jour groupée : la séance qui entre et celles qui sortent de la fenêtre
+        nb_sorties = debuts_voies[:, j] - retirees
+        decalages = np.arange(nb_sorties.max(initial=0))[:, None]
+        sorties = np.minimum(retirees + decalages, nb - 1)
+        sortantes = (decalages < nb_sorties) & presentes[lignes_voies, sorties]
+        entrantes = presentes_voies[:, j]
+        arbre.ajouter(np.vstack([rangs_voies[:, j], rangs[lignes_voies, sorties]]),
+                      np.vstack([entrantes, -sortantes.astype(np.int32)]))
+        comptes += entrantes - sortantes.sum(axis=0)
+        retirees += np.maximum(nb_sorties, 0)
+
+        valides = comptes >= max(min_presentes, 1)
+        if not valides.any():
+            continue
+        # Indice virtuel (n - 1) * q de np.percentile, puis les deux valeurs qui l'encadrent
+        indice = (comptes - 1) * fraction
+        precedent = np.floor(indice)
+        gamma = indice - precedent
+        precedent = precedent.astype(np.int64)
+        suivant = np.minimum(precedent + 1, comptes - 1)
+        positions_triees = np.minimum(arbre.k_ieme(np.maximum(np.stack([precedent, suivant]) + 1, 1)), nb - 1)
+        bas = triees[lignes_voies, positions_triees[0]]
+        haut = triees[lignes_voies, positions_triees[1]]
+        ecart = haut - bas
+        interpolee = np.where(gamma >= 0.5, haut - ecart * (1 - gamma), bas + ecart * gamma)
+        resultat[:, j] = np.where(valides, interpolee, np.nan)
+
+    resultat = resultat.reshape(nb_lignes, largeur)[:, :nb]
+    return resultat if valeurs.ndim > 1 else resultat[0]
+
+
+############
+# KPI GLISSANTS D'UNE SÉRIE OU D'UN PANEL TASSÉ
+############
+
+# Close (dates,) ou panel tassé (tickers, dates) avec ses dates (même forme, ou (dates,)
+# communes). Renvoie {"<KPI>_<fenetre>": tableau de même forme que close}.
+def kpi_glissants(close, dates, fenetres=FENETRES_KPI_GLISSANTS, taux_sans_risque=TAUX_SANS_RISQUE, niveau_var=5):
+    close = np.asarray(close, dtype=np.float64)
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    dates_completes = np.broadcast_to(dates, close.shape)
+    rendements = np.full(close.shape, np.nan)
+    rendements[..., 1:] = (close[..., 1:] / close[..., :-1] - 1) * 100
+
+    # Sommes préfixes partagées par toutes les fenêtres
+    prefixes = sommes_prefixes(rendements)
+    prefixes_carres = sommes_prefixes(rendements * rendements)
+    fins = np.broadcast_to(np.arange(1, close.shape[-1] + 1), close.shape)
+
+    resultats = {}
+    for fenetre in fenetres:
+        debuts, completes = _bornes(dates, close.shape, fenetre)
+        somme, nb = sommes_entre_bornes(prefixes, debuts, fins)
+        somme_carres, _ = sommes_entre_bornes(prefixes_carres, debuts, fins)
+        if isinstance(fenetre, str):
+            valides = completes & (nb >= 2)
+        else:
+            valides = completes & (nb == fenetre)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            moyenne = somme / nb
+            variance = (somme_carres - somme * somme / nb) / (nb - 1)
+            volatilite_annualisee = np.sqrt(np.maximum(variance, 0.0)) * np.sqrt(JOURS_PAR_AN)
+            rendement_moyen_annuel = moyenne * JOURS_PAR_AN
+            sharpe = np.where(volatilite_annualisee > 0,
+                              (rendement_moyen_annuel - taux_sans_risque) / volatilite_annualisee, np.nan)
+
+            references = np.maximum(debuts - 1, 0)
+            close_reference = np.take_along_axis(close, references, axis=-1)
+            annees = ((dates_completes - np.take_along_axis(dates_completes, references, axis=-1))
+                      / np.timedelta64(1, 'D') / JOURS_PAR_ANNEE)
+            cagr = np.where(annees > 0, ((close / close_reference) ** (1 / annees) - 1) * 100, np.nan)
+
+        var = quantile_glissant(rendements, debuts, niveau_var, min_presentes=2)
+
+        nom = str(fenetre)
+        resultats[f"Volatilite_{nom}"] = np.where(valides, volatilite_annualisee, np.nan)
+        resultats[f"Rendement_Moyen_{nom}"] = np.where(valides, rendement_moyen_annuel, np.nan)
+        resultats[f"Sharpe_{nom}"] = np.where(valides, sharpe, np.nan)
+        resultats[f"CAGR_{nom}"] = np.where(valides, cagr, np.nan)
+        resultats[f"VaR_{100 - niveau_var}_{nom}"] = np.where(valides, var, np.nan)
+    return resultats
+
+
+# DataFrame au format des scripts (index Date, colonne Close) : une colonne par KPI
+def table_kpi_glissants(data, fenetres=FENETRES_KPI_GLISSANTS, taux_sans_risque=TAUX_SANS_RISQUE):
+    resultats = kpi_glissants(data['Close'].to_numpy(dtype=np.float64), data.index, fenetres, taux_sans_risque)
+    return pd.DataFrame(resultats, index=data.index)
+
+
+# Panel (moteur_panel) : {KPI: tableau (tickers, dates)} aligné sur les dates du panel,
+# NaN aux séances non cotées ; calculé sur les séances cotées de chaque ticker
+def kpi_glissants_panel(panel, fenetres=FENETRES_KPI_GLISSANTS, taux_sans_risque=TAUX_SANS_RISQUE):
+    resultats = kpi_glissants(panel.tasser(panel.valeurs['Close']), panel.dates_tassees(), fenetres, taux_sans_risque)
+    return {nom: panel.replacer(valeurs) for nom, valeurs in resultats.items()}
@@ -0,0 +1,360 @@
+import os
+import glob
+import json
+import threading
+from dataclasses import dataclass, asdict, fields
+import numpy as np
+import pandas as pd
+from cache_donnees import empreinte_code, lire_filigrane, repertoire_ticker
+from croisements import IndexCroisements
+from rendements_horizons import rendements_horizons
+from suivi_drawdown import SEUIL_RECUPERATION, SuiviDrawdown
+from variables_derivees import MODULES_ENRICHI, VariablesDerivees, charger_donnees_enrichies
+
+############
+# MOTEUR DE KPI (RÉSULTAT TYPÉ, CALCULÉ UNE FOIS ET PARTAGÉ PAR LES PARTIES 4 À 6)
+############
+
+# Hypothèses communes aux parties 5 et 6
+TAUX_SANS_RISQUE = 3.0  # % annuel
+JOURS_PAR_AN = 252
+JOURS_PAR_MOIS = 21
+HORIZONS_KPI = ('10Y', '5Y', '1Y')
+
+POIDS_PERFORMANCE = 0.4
+POIDS_RISQUE = 0.3
+POIDS_TECHNIQUE = 0.3
+
+# Colonnes dérivées lues par le moteur
+COLONNES_KPI = ['Rendement_Quotidien', 'SMA_20', 'SMA_50', 'SMA_200', 'Drawdown']
+
+
+# Tous les nombres affichés par la partie 5 (les textes d'interprétation restent dans les
+# scripts). Les champs optionnels valent None quand l'historique est trop court.
+@dataclass(frozen=True, slots=True)
+class ResultatKPI:
+    ticker: str
+    debut: pd.Timestamp
+    fin: pd.Timestamp
+    nb_seances: int
+    nb_annees: float
+
+    # Performance
+    prix_initial: float
+    prix_final: float
+    multiplication: float
+    rendement_total: float
+    cagr: float
+    rendement_10ans: float | None
+    rendement_5ans: float | None
+    rendement_1an: float | None
+    cagr_10ans: float | None
+    cagr_5ans: float | None
+
+    # Risque
+    volatilite_quotidienne: float
+    volatilite_annualisee: float
+    rendement_moyen_annuel: float
+    taux_sans_risque: float
+    rendement_excedentaire: float
+    sharpe_ratio: float
+    ratio_rendement_risque: float
+    var_95_quotidien: float
+    var_95_mensuel: float
+    drawdown_max: float
+    drawdown_actuel: float
+    date_creux: pd.Timestamp | None
+    date_pic: pd.Timestamp | None
+    prix_au_pic: float
+    prix_au_creux: float
+    date_recuperation: pd.Timestamp | None
+    jours_recuperation: int | None
+
+    # Technique
+    prix_actuel: float
+    sma20: float
+    sma50: float
+    sma200: float
+    ecart_sma20: float
+    ecart_sma50: float
+    ecart_sma200: float
+    golden_cross: bool
+    ecart_cross: float
+    date_dernier_croisement: pd.Timestamp | None
+    type_dernier_croisement: str | None
+    jours_depuis_croisement: int | None
+    prix_max_historique: float
+    date_max_historique: pd.Timestamp
+    distance_max: float
+
+    # Score (0-10)
+    score_performance: int
+    score_risque: int
+    score_technique: int
+    score_global: float
+
+    def vers_dict(self):
+        contenu = asdict(self)
+        for nom, valeur in contenu.items():
+            if isinstance(valeur, pd.Timestamp):
+                contenu[nom] = valeur.strftime('%Y-%m-%d')
+            elif isinstance(valeur, (float, np.floating)):
+                contenu[nom] = None if valeur != valeur else float(valeur)
+            elif isinstance(valeur, (np.integer, np.bool_)):
+                contenu[nom] = valeur.item()
+        return contenu
+
+    @classmethod
+    def depuis_dict(cls, contenu):
+        valeurs = {}
+        for champ in fields(cls):
+            valeur = contenu[champ.name]
+            if valeur is not None and (champ.name.startswith('date_') or champ.name in ('debut', 'fin')):
+                valeur = pd.Timestamp(valeur)
+            elif valeur is None and champ.type is float:
+                valeur = np.nan
+            valeurs[champ.name] = valeur
+        return cls(**valeurs)
+
+
+############
+# SCORE GLOBAL (MÊME GRILLE QUE LES PARTIES 5 ET 6)
+############
+
+def calculer_scores(cagr, volatilite_annualisee, drawdown_max, prix_actuel, sma50, sma200, distance_max):
+    if cagr > 15:
+        score_performance = 10
+    elif cagr > 12:
+        score_performance = 8
+    elif cagr > 10:
+        score_performance = 7
+    elif cagr > 7:
+        score_performance = 5
+    else:
+        score_performance = 3
+
+    # Moins de risque = meilleur score, ajusté selon le drawdown
+    if volatilite_annualisee < 15:
+        score_risque = 10
+    elif volatilite_annualisee < 20:
+        score_risque = 8
+    elif volatilite_annualisee < 25:
+        score_risque = 6
+    elif volatilite_annualisee < 30:
+        score_risque = 4
+    else:
+        score_risque = 2
+    if abs(drawdown_max) < 20:
+        score_risque += 0
+    elif abs(drawdown_max) < 30:
+        score_risque -= 1
+    else:
+        score_risque -= 2
+    score_risque = max(0, min(10, score_risque))
+
+    score_technique = 0
+    if prix_actuel > sma200:
+        score_technique += 3
+    if prix_actuel > sma50:
+        score_technique += 3
+    if sma50 > sma200:  # Golden Cross
+        score_technique += 3
+    if distance_max > -10:  # Proche du max
+        score_technique += 1
+
+    score_global = (
+        score_performance * POIDS_PERFORMANCE +
+        score_risque * POIDS_RISQUE +
+        score_technique * POIDS_TECHNIQUE
+    )
+    return score_performance, score_risque, score_technique, score_global
+
+
+############
+# CALCUL POUR UN TICKER OU POUR UN PANEL
+############
+
+def _ecart(prix, reference):
+    return ((prix - reference) / reference) * 100
+
+
+# Rendements et CAGR des horizons de la partie 5 pour une ligne du résultat de
+# rendements_horizons (None quand l'historique ne couvre pas l'horizon)
+def _horizons(rendements, cagrs):
+    return {horizon: (None if rendement != rendement else float(rendement), None if cagr != cagr else float(cagr))
+            for horizon, rendement, cagr in zip(HORIZONS_KPI, rendements, cagrs)}
+
+
+# Assemblage du résultat à partir des grandeurs de base d'un ticker (séances cotées)
+def _assembler(ticker, index, close, horizons, volatilite_quotidienne, moyenne_rendements, var_95_quotidien,
+               drawdown, sma20, sma50, sma200, dernier_croisement, type_croisement,
+               prix_max_historique, date_max_historique, taux_sans_risque):
+    prix_initial = close[0]
+    prix_final = close[-1]
+    nb_annees = (index[-1] - index[0]).days / 365.25
+    rendement_total = ((prix_final - prix_initial) / prix_initial) * 100
+    cagr = ((prix_final / prix_initial) ** (1 / nb_annees) - 1) * 100
+
+    volatilite_annualisee = volatilite_quotidienne * np.sqrt(JOURS_PAR_AN)
+    rendement_moyen_annuel = moyenne_rendements * JOURS_PAR_AN
+    rendement_excedentaire = rendement_moyen_annuel - taux_sans_risque
+    distance_max = _ecart(prix_final, prix_max_historique)
+    scores = calculer_scores(cagr, volatilite_annualisee, drawdown.drawdown_max, prix_final, sma50, sma200, distance_max)
+
+    return ResultatKPI(
+        ticker=ticker, debut=index[0], fin=index[-1], nb_seances=len(index), nb_annees=nb_annees,
+        prix_initial=prix_initial, prix_final=prix_final, multiplication=prix_final / prix_initial,
+        rendement_total=rendement_total, cagr=cagr,
+        rendement_10ans=horizons['10Y'][0], rendement_5ans=horizons['5Y'][0], rendement_1an=horizons['1Y'][0],
+        cagr_10ans=horizons['10Y'][1], cagr_5ans=horizons['5Y'][1],
+        volatilite_quotidienne=volatilite_quotidienne, volatilite_annualisee=volatilite_annualisee,
+        rendement_moyen_annuel=rendement_moyen_annuel, taux_sans_risque=taux_sans_risque,
+        rendement_excedentaire=rendement_excedentaire,
+        sharpe_ratio=rendement_excedentaire / volatilite_annualisee,
+        ratio_rendement_risque=cagr / volatilite_annualisee,
+        var_95_quotidien=var_95_quotidien, var_95_mensuel=var_95_quotidien * np.sqrt(JOURS_PAR_MOIS),
+        drawdown_max=drawdown.drawdown_max, drawdown_actuel=drawdown.drawdown,
+        date_creux=drawdown.date_creux, date_pic=drawdown.date_pic_au_creux,
+        prix_au_pic=drawdown.prix_au_pic, prix_au_creux=drawdown.prix_au_creux,
+        date_recuperation=drawdown.date_recuperation, jours_recuperation=drawdown.jours_recuperation,
+        prix_actuel=prix_final, sma20=sma20, sma50=sma50, sma200=sma200,
+        ecart_sma20=_ecart(prix_final, sma20), ecart_sma50=_ecart(prix_final, sma50),
+        ecart_sma200=_ecart(prix_final, sma200),
+        golden_cross=bool(sma50 > sma200),
+        ecart_cross=_ecart(sma50, sma200) if sma50 > sma200 else _ecart(sma200, sma50),
+        date_dernier_croisement=dernier_croisement, type_dernier_croisement=type_croisement,
+        jours_depuis_croisement=(index[-1] - dernier_croisement).days if dernier_croisement is not None else None,
+        prix_max_historique=prix_max_historique, date_max_historique=date_max_historique,
+        distance_max=distance_max,
+        score_performance=scores[0], score_risque=scores[1], score_technique=scores[2], score_global=scores[3],
+    )
+
+
+# Résultat complet pour un DataFrame au format des scripts (index Date, colonne Close) ;
+# les colonnes dérivées absentes sont calculées par le moteur de variables dérivées
+def calculer_kpi(data, ticker='', taux_sans_risque=TAUX_SANS_RISQUE):
+    variables = VariablesDerivees(data)
+    close = data['Close'].to_numpy(dtype=np.float64)
+    rendements = pd.Series(variables['Rendement_Quotidien']).dropna()
+
+    croisements = IndexCroisements.depuis_series(ticker, data.index, variables['SMA_50'], variables['SMA_200'])
+    dernier = croisements.derniers(ticker, 1)
+    horizons = rendements_horizons(close, data.index, HORIZONS_KPI)
+
+    return _assembler(
+        ticker, data.index, close, _horizons(horizons['rendement'], horizons['cagr']), rendements.std(), rendements.mean(), np.percentile(rendements, 5),
+        SuiviDrawdown.depuis_historique(data.index, close),
+        variables['SMA_20'][-1], variables['SMA_50'][-1], variables['SMA_200'][-1],
+        dernier.index[0] if len(dernier) > 0 else None,
+        dernier['Type'].iloc[0] if len(dernier) > 0 else None,
+        data['Close'].max(), data['Close'].idxmax(), taux_sans_risque,
+    )
+
+
+# Tous les tickers d'un panel (moteur_panel) : les statistiques sont calculées ligne par
+# ligne sur les tableaux 2-D tassés, sans DataFrame par ticker. Résultats égaux à ceux de
+# calculer_kpi aux arrondis près (ordre des sommations de numpy et non de pandas).
+def calculer_kpi_panel(panel, taux_sans_risque=TAUX_SANS_RISQUE):
+    resultats = panel.calculer(['Rendement_Quotidien', 'SMA_20', 'SMA_50', 'SMA_200', 'Max_Historique', 'Drawdown'])
+    close = panel.tasser(panel.valeurs['Close'])
+    rendements = panel.tasser(resultats['Rendement_Quotidien'])
+    drawdown = panel.tasser(resultats['Drawdown'])
+    max_historique = panel.tasser(resultats['Max_Historique'])
+    lignes = np.arange(len(panel.tickers))
+    dernieres = np.maximum(panel.nb_seances - 1, 0)
+    positions = np.arange(close.shape[1])
+    horizons = rendements_horizons(close, panel.dates_tassees(), HORIZONS_KPI, panel.nb_seances)
+
+    with np.errstate(invalid='ignore'):
+        volatilites = np.nanstd(rendements, axis=1, ddof=1)
+        moyennes = np.nanmean(rendements, axis=1)
+        var_95 = np.nanpercentile(rendements, 5, axis=1)
+
+    # Creux (premier minimum), pic en vigueur et récupération au-dessus du seuil après le creux
+    definis = ~np.isnan(drawdown).all(axis=1)
+    creux = np.where(definis, np.argmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=1), 0)
+    prix_au_pic = max_historique[lignes, creux]
+    pics = np.argmax(close == prix_au_pic[:, None], axis=1)
+    apres_creux = (positions >= creux[:, None]) & (drawdown >= SEUIL_RECUPERATION)
+    recuperees = apres_creux.any(axis=1)
+    recuperations = np.argmax(apres_creux, axis=1)
+    plus_hauts = np.argmax(np.where(np.isnan(close), -np.inf, close), axis=1)
+
+    smas = {col: panel.tasser(resultats[col])[lignes, dernieres] for col in ('SMA_20', 'SMA_50', 'SMA_200')}
+    croisements = IndexCroisements.depuis_panel(panel, resultats).derniers_par_ticker(1)
+    derniers_croisements = dict(zip(croisements['Ticker'], zip(croisements.index, croisements['Type'])))
+
+    kpi = {}
+    for ligne, ticker in enumerate(panel.tickers):
+        nb = panel.nb_seances[ligne]
+        dates = panel.dates[panel.ordre[ligne, :nb]]
+        suivi = SuiviDrawdown()
+        suivi.drawdown = drawdown[ligne, nb - 1]
+        if definis[ligne]:
+            suivi.drawdown_max = drawdown[ligne, creux[ligne]]
+            suivi.date_creux = dates[creux[ligne]]
+            suivi.prix_au_creux = close[ligne, creux[ligne]]
+            suivi.prix_au_pic = prix_au_pic[ligne]
+            suivi.date_pic_au_creux = dates[pics[ligne]]
+            suivi.date_recuperation = dates[recuperations[ligne]] if recuperees[ligne] else None
+        dernier_croisement, type_croisement = derniers_croisements.get(ticker, (None, None))
+        kpi[ticker] = _assembler(
+            ticker, dates, close[ligne, :nb], _horizons(horizons['rendement'][ligne], horizons['cagr'][ligne]),
+            volatilites[ligne], moyennes[ligne], var_95[ligne], suivi,
+            smas['SMA_20'][ligne], smas['SMA_50'][ligne], smas['SMA_200'][ligne],
+            dernier_croisement, type_croisement,
+            close[ligne, plus_hauts[ligne]], dates[plus_hauts[ligne]], taux_sans_risque,
+        )
+    return kpi
+
+
+############
+# RÉSULTATS EN CACHE (JSON, CALCULÉS UNE FOIS PAR PÉRIODE ET PAR ÉTAT DU CACHE)
+############
+
+# Champs de ResultatKPI et formules : ce module, ceux qu'il appelle et ceux des colonnes
+# dérivées qu'il lit
+VERSION_KPI = empreinte_code('moteur_kpi', 'rendements_horizons', 'suivi_drawdown', *MODULES_ENRICHI)
+
+
+# Comme pour les données enrichies, la dernière séance connue et la version du code font
+# partie du nom du fichier : un rafraîchissement du cache brut ou une modification des
+# calculs invalide le résultat
+def chemin_kpi(ticker, debut, fin):
+    filigrane = lire_filigrane(ticker)
+    derniere = filigrane.get('derniere_seance', 'inconnue') if filigrane else 'inconnue'
+    return os.path.join(repertoire_ticker(ticker), f"kpi_{debut}_{fin}_{derniere}_{VERSION_KPI}.json")
+
+
+def sauver_kpi(ticker, debut, fin, resultat):
+    chemin = chemin_kpi(ticker, debut, fin)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    for ancien in glob.glob(os.path.join(repertoire_ticker(ticker), f"kpi_{debut}_{fin}_*.json")):
+        if ancien != chemin:
+            os.remove(ancien)
+    chemin_tmp = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(chemin_tmp, 'w', encoding='utf-8') as f:
+        json.dump(resultat.vers_dict(), f, ensure_ascii=False)
+    os.replace(chemin_tmp, chemin)
+
+
+# Point d'entrée des parties 4 à 6 : le résultat en cache est relu tel quel, sinon il est
+# calculé sur les données enrichies (colonnes COLONNES_KPI) puis sauvegardé
+def charger_kpi(ticker, debut, fin, taux_sans_risque=TAUX_SANS_RISQUE):
+    chemin = chemin_kpi(ticker, debut, fin)
+    if os.path.exists(chemin):
+        # Fichier illisible ou d'un autre format (champ absent ou en trop) : recalcul
+        try:
+            with open(chemin, encoding='utf-8') as f:
+                resultat = ResultatKPI.depuis_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            resultat = None
+        if resultat is not None and resultat.taux_sans_risque == taux_sans_risque:
+            return resultat
+
+    data = charger_donnees_enrichies(ticker, debut, fin, COLONNES_KPI)
+    if data is None or data.empty:
+        return None
+    resultat = calculer_kpi(data, ticker, taux_sans_risque)
+    sauver_kpi(ticker, debut, fin, resultat)
+    return resultat
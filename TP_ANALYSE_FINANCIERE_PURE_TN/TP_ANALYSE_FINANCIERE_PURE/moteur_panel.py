@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from cache_donnees import lire_historique
+from panel_parquet import RACINE_PANEL, lire_panel
+from stockage_mmap import ouvrir_store
+from variables_derivees import COLONNES_DERIVEES, GRAPHE_VARIABLES, VariablesDerivees
+
+############
+# MOTEUR DE PANEL (TICKERS × SÉANCES, TABLEAUX NUMPY 2-D ALIGNÉS)
+############
+
+# Les colonnes OHLCV de tout un univers sont rangées dans des tableaux (tickers, dates)
+# alignés sur l'union des séances ; `presentes` indique les séances réellement cotées
+# par chaque ticker. Les variables du graphe de variables_derivees sont calculées pour
+# tous les tickers en un seul appel vectorisé par variable (aucune boucle Python par ticker).
+#
+# Résultats identiques, ticker par ticker, à calculer_variables_derivees : les calculs
+# (décalage d'une séance, fenêtres glissantes, plus haut historique, premier Close)
+# portent sur les séances cotées du ticker, pas sur l'union des séances. Chaque ligne est
+# donc « tassée » à gauche (séances cotées consécutives, NaN ensuite) avant le calcul,
+# puis les résultats sont replacés sur les dates alignées. Tous les calculs étant causaux,
+# les NaN de fin de ligne ne modifient aucune valeur cotée.
+
+COLONNES_OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Variables ne dépendant que de la date : un tableau 1-D par séance, commun aux tickers
+COLONNES_CALENDAIRES = ['Annee', 'Mois', 'Jour_Semaine', 'Jour_Semaine_Nom', 'Trimestre']
+
+# Variables calculées par défaut sur le panel
+COLONNES_PANEL = [col for col in COLONNES_DERIVEES if col not in COLONNES_CALENDAIRES] + ['Croisement_SMA_50_200']
+
+
+# Évaluation du graphe sur des tableaux 2-D déjà tassés (pas de DataFrame sous-jacent)
+class VariablesPanel(VariablesDerivees):
+    def __init__(self, sources, index=None):
+        self.data = None
+        self.index = index
+        self.sources = sources
+        self.valeurs = {}
+
+    def est_source(self, nom):
+        return nom in self.sources
+
+    def source(self, nom):
+        return self.sources[nom]
+
+
+class PanelOHLCV:
+    def __init__(self, tickers, dates, valeurs, presentes):
+        self.tickers = list(tickers)
+        self.dates = pd.DatetimeIndex(dates)
+        self.valeurs = valeurs
+        self.presentes = presentes
+        # Permutation qui tasse à gauche les séances cotées de chaque ligne (tri stable)
+        self.ordre = np.argsort(~presentes, axis=1, kind='stable')
+        self.nb_seances = presentes.sum(axis=1)
+
+    # Dictionnaire {ticker: DataFrame indexé par Date} ou DataFrame indexé par (Ticker, Date)
+    @classmethod
+    def depuis_donnees(cls, donnees, colonnes=COLONNES_OHLCV):
+        if isinstance(donnees, pd.DataFrame):
+            donnees = {ticker: groupe.droplevel(0) for ticker, groupe in donnees.groupby(level=0, sort=False)}
+        tickers = [ticker for ticker, data in donnees.items() if data is not None and not data.empty]
+
+        dates = pd.DatetimeIndex([], name='Date')
+        for ticker in tickers:
+            dates = dates.union(donnees[ticker].index)
+        forme = (len(tickers), len(dates))
+
+        presentes = np.zeros(forme, dtype=bool)
+        valeurs = {col: np.full(forme, np.nan) for col in colonnes}
+        for ligne, ticker in enumerate(tickers):
+            data = donnees[ticker]
+            positions = dates.get_indexer(data.index)
+            presentes[ligne, positions] = True
+            for col in colonnes:
+                if col in data.columns:
+                    valeurs[col][ligne, positions] = data[col].to_numpy(dtype=np.float64)
+        return cls(tickers, dates, valeurs, presentes)
+
+    # Lecture du panel Parquet partitionné (filtres poussés jusqu'au stockage)
+    @classmethod
+    def depuis_panel_parquet(cls, tickers=None, debut=None, fin=None, colonnes=COLONNES_OHLCV, racine=RACINE_PANEL):
+        data = lire_panel(None if tickers is None else list(tickers), debut, fin, colonnes, racine)
+        if data is None:
+            return None
+        return cls.depuis_donnees(data, colonnes)
+
+    # Historiques déjà en cache (aucun téléchargement), restreints à [debut, fin[ ; le store
+    # binaire projeté en mémoire est lu à la place des segments Parquet s'il est à jour
+    @classmethod
+    def depuis_cache(cls, tickers, debut=None, fin=None, colonnes=COLONNES_OHLCV):
+        donnees = {}
+        for ticker in tickers:
+            store = ouvrir_store(ticker)
+            data = store.vers_dataframe() if store is not None else lire_historique(ticker)
+            if data is None:
+                continue
+            if debut is not None:
+                data = data[data.index >= pd.Timestamp(debut)]
+            if fin is not None:
+                data = data[data.index < pd.Timestamp(fin)]
+            donnees[ticker] = data
+        return cls.depuis_donnees(donnees, colonnes)
+
+    def tasser(self, valeurs):
+        return np.take_along_axis(valeurs, self.ordre, axis=1)
+
+    # Dates de chaque ligne tassée ; après la dernière séance cotée, la dernière date du
+    # panel (les dates restent triées, pour les fenêtres calendaires)
+    def dates_tassees(self):
+        dates = np.asarray(self.dates, dtype='datetime64[ns]')
+        cotees = np.arange(len(self.dates)) < self.nb_seances[:, None]
+        return np.where(cotees, dates[self.ordre], dates[-1])
+
+    def replacer(self, tassees):
+        alignees = np.empty_like(tassees)
+        np.put_along_axis(alignees, self.ordre, tassees, axis=1)
+        alignees[~self.presentes] = False if alignees.dtype == bool else np.nan
+        return alignees
+
+    # Variables demandées pour tous les tickers : {nom: tableau (tickers, dates)},
+    # ou (dates,) pour les variables calendaires
+    def calculer(self, colonnes=None):
+        if colonnes is None:
+            colonnes = COLONNES_PANEL
+        variables = VariablesPanel({col: self.tasser(valeurs) for col, valeurs in self.valeurs.items()},
+                                   self.dates_tassees())
+        resultats = {}
+        for col in colonnes:
+            if col in COLONNES_CALENDAIRES:
+                resultats[col] = GRAPHE_VARIABLES[col][1](self.dates)
+            else:
+                resultats[col] = self.replacer(variables[col])
+        return resultats
+
+    # DataFrame d'un ticker au format des scripts (séances cotées uniquement)
+    def vers_dataframe(self, resultats, ticker):
+        ligne = self.tickers.index(ticker)
+        cotees = self.presentes[ligne]
+        data = pd.DataFrame(
+            {col: valeurs[ligne, cotees] for col, valeurs in self.valeurs.items()},
+            index=self.dates[cotees],
+        )
+        for col, valeurs in resultats.items():
+            data[col] = valeurs[cotees] if valeurs.ndim == 1 else valeurs[ligne, cotees]
+        return data
+
+    # Valeur à la dernière séance cotée de chaque ticker (une ligne par ticker)
+    def dernieres_valeurs(self, resultats):
+        lignes = np.arange(len(self.tickers))
+        dernieres = self.ordre[lignes, np.maximum(self.nb_seances - 1, 0)]
+        return pd.DataFrame(
+            {col: valeurs[dernieres] if valeurs.ndim == 1 else valeurs[lignes, dernieres]
+             for col, valeurs in resultats.items()},
+            index=pd.Index(self.tickers, name='Ticker'),
+        )
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ingestion_intraday import TAILLE_MORCEAU, lire_minutes_par_morceaux
+
+############
+# NETTOYAGE EN FLUX (MÊMES RÈGLES QUE L'ÉTAPE 3.2, PAR MORCEAUX)
+############
+
+# Règles de l'étape 3.2 : interpolation linéaire de Close, forward-fill des autres
+# colonnes, puis suppression des dates en double (première occurrence conservée).
+# Le résultat concaténé est identique à celui du traitement en mémoire.
+COLONNE_INTERPOLEE = 'Close'
+COLONNES_REPORTEES = ['Open', 'High', 'Low', 'Volume']
+
+
+# État conservé d'un morceau à l'autre :
+# - dernieres_valeurs : dernière valeur connue de chaque colonne reportée (forward-fill)
+# - ancre : dernier Close valide, point de départ de l'interpolation
+# - en_attente : lignes dont le Close est manquant après l'ancre, retenues jusqu'au
+#   prochain Close valide (seule partie du flux qui peut grandir)
+# - derniere_date_lue / derniere_date_emise : contrôle du tri et des doublons
+class NettoyeurFlux:
+    def __init__(self):
+        self.dernieres_valeurs = {}
+        self.ancre = None
+        self.en_attente = None
+        self.derniere_date_lue = None
+        self.derniere_date_emise = None
+        self.nan_par_colonne = {col: 0 for col in [COLONNE_INTERPOLEE] + COLONNES_REPORTEES}
+        self.nb_doublons = 0
+
+    def _verifier_ordre(self, morceau):
+        if not morceau.index.is_monotonic_increasing or (
+                self.derniere_date_lue is not None and morceau.index[0] < self.derniere_date_lue):
+            raise ValueError("Le nettoyage en flux exige des dates triées par ordre chronologique")
+        self.derniere_date_lue = morceau.index[-1]
+
+    def _reporter(self, morceau):
+        for col in COLONNES_REPORTEES:
+            if col not in morceau.columns:
+                continue
+            serie = morceau[col]
+            manquantes = int(serie.isnull().sum())
+            if manquantes > 0:
+                self.nan_par_colonne[col] += manquantes
+                serie = serie.ffill()
+                if col in self.dernieres_valeurs:
+                    serie = serie.fillna(self.dernieres_valeurs[col])
+                morceau[col] = serie
+            valides = serie.dropna()
+            if not valides.empty:
+                self.dernieres_valeurs[col] = valides.iloc[-1]
+        return morceau
+
+    # Interpolation sur les positions (comme interpolate(method='linear')) : le Close de
+    # l'ancre précède le tampon, les lignes après le dernier Close valide restent en attente
+    def _interpoler(self, tampon):
+        close = tampon[COLONNE_INTERPOLEE].to_numpy(dtype=np.float64, copy=True)
+        if self.ancre is not None:
+            close = np.concatenate([[self.ancre], close])
+        valides = np.flatnonzero(~np.isnan(close))
+        decalage = 0 if self.ancre is None else 1
+
+        if len(valides) == 0:
+            # Aucun Close valide depuis le début du flux : NaN de tête, laissés tels quels
+            return tampon, None
+
+        dernier = valides[-1]
+        if len(valides) > 1:
+            positions = np.arange(valides[0], dernier + 1)
+            close[valides[0]:dernier + 1] = np.interp(positions, valides, close[valides])
+        self.ancre = close[dernier]
+
+        tampon = tampon.copy()
+        tampon[COLONNE_INTERPOLEE] = close[decalage:]
+        coupure = dernier + 1 - decalage
+        return tampon.iloc[:coupure], tampon.iloc[coupure:]
+
+    def _emettre(self, lignes):
+        doublons = lignes.index.duplicated(keep='first')
+        if self.derniere_date_emise is not None:
+            doublons |= lignes.index == self.derniere_date_emise
+        self.nb_doublons += int(doublons.sum())
+        lignes = lignes[~doublons]
+        if not lignes.empty:
+            self.derniere_date_emise = lignes.index[-1]
+        return lignes
+
+    def traiter(self, morceau):
+        if morceau.empty:
+            return morceau
+        self._verifier_ordre(morceau)
+        morceau = self._reporter(morceau.copy())
+        self.nan_par_colonne[COLONNE_INTERPOLEE] += int(morceau[COLONNE_INTERPOLEE].isnull().sum())
+
+        tampon = morceau if self.en_attente is None else pd.concat([self.en_attente, morceau])
+        pretes, self.en_attente = self._interpoler(tampon)
+        if self.en_attente is not None and self.en_attente.empty:
+            self.en_attente = None
+        return self._emettre(pretes)
+
+    # Fin du flux : les Close manquants en queue prennent le dernier Close valide
+    # (comportement de interpolate pour les NaN finaux)
+    def terminer(self):
+        if self.en_attente is None:
+            return None
+        reste = self.en_attente.copy()
+        self.en_attente = None
+        reste[COLONNE_INTERPOLEE] = self.ancre
+        return self._emettre(reste)
+
+
+def nettoyer_en_flux(morceaux, nettoyeur=None):
+    if nettoyeur is None:
+        nettoyeur = NettoyeurFlux()
+    for morceau in morceaux:
+        propre = nettoyeur.traiter(morceau)
+        if not propre.empty:
+            yield propre
+    reste = nettoyeur.terminer()
+    if reste is not None and not reste.empty:
+        yield reste
+
+
+# Nettoyage d'un fichier (CSV ou Parquet) vers un fichier Parquet, morceau par morceau :
+# la mémoire utilisée dépend de la taille des morceaux, pas de celle de l'historique
+def nettoyer_fichier(chemin_source, chemin_cible, taille_morceau=TAILLE_MORCEAU):
+    nettoyeur = NettoyeurFlux()
+    ecrivain = None
+    try:
+        for propre in nettoyer_en_flux(lire_minutes_par_morceaux(chemin_source, taille_morceau), nettoyeur):
+            table = pa.Table.from_pandas(propre)
+            if ecrivain is None:
+                ecrivain = pq.ParquetWriter(chemin_cible, table.schema)
+            ecrivain.write_table(table.cast(ecrivain.schema))
+    finally:
+        if ecrivain is not None:
+            ecrivain.close()
+    return nettoyeur
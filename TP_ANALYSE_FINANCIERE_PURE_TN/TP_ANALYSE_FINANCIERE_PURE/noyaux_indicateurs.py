@@ -0,0 +1,224 @@
+import numpy as np
+
+############
+# NOYAU DE MOYENNES MOBILES (UNE SEULE SOMME CUMULÉE POUR TOUTES LES FENÊTRES)
+############
+
+# Les tableaux sont traités le long du dernier axe : une série (dates,) ou un panel
+# (tickers, dates). Une seule passe construit les sommes préfixes ; chaque fenêtre ne
+# coûte ensuite qu'une soustraction vectorisée.
+#
+# Précision : les sommes préfixes d'un long historique sont grandes devant les valeurs.
+# L'erreur d'arrondi de chaque addition de np.cumsum est récupérée exactement (TwoSum
+# vectorisé) et cumulée à part ; la soustraction des deux préfixes est compensée de la
+# même façon. La somme d'une fenêtre reste ainsi exacte à l'arrondi près de la fenêtre
+# elle-même, quelle que soit la longueur de l'historique.
+
+
+# Erreur d'arrondi exacte de a + b (algorithme TwoSum de Knuth), pour des tableaux
+def _erreur_somme(a, b, somme):
+    b_virtuel = somme - a
+    a_virtuel = somme - b_virtuel
+    return (a - a_virtuel) + (b - b_virtuel)
+
+
+# Sommes préfixes compensées, avec un zéro en tête : prefixe[..., j] = somme des j premières
+# valeurs. Les NaN comptent pour 0 dans les sommes et sont comptés à part.
+def sommes_prefixes(valeurs):
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    manquantes = np.isnan(valeurs)
+    propres = np.where(manquantes, 0.0, valeurs)
+
+    forme = valeurs.shape[:-1] + (valeurs.shape[-1] + 1,)
+    prefixe = np.zeros(forme)
+    np.cumsum(propres, axis=-1, out=prefixe[..., 1:])
+    compensation = np.zeros(forme)
+    np.cumsum(_erreur_somme(prefixe[..., :-1], propres, prefixe[..., 1:]), axis=-1, out=compensation[..., 1:])
+    nb_manquantes = np.zeros(forme, dtype=np.int64)
+    np.cumsum(manquantes, axis=-1, out=nb_manquantes[..., 1:])
+    return prefixe, compensation, nb_manquantes
+
+
+# Moyenne sur `fenetre` valeurs à partir des sommes préfixes ; NaN tant que la fenêtre
+# n'est pas pleine ou si elle contient un NaN (comme rolling(window=fenetre).mean())
+def moyenne_depuis_prefixes(prefixes, fenetre):
+    prefixe, compensation, nb_manquantes = prefixes
+    nb = prefixe.shape[-1] - 1
+    resultat = np.full(prefixe.shape[:-1] + (nb,), np.nan)
+    if fenetre > nb:
+        return resultat
+
+    haut = prefixe[..., fenetre:]
+    bas = prefixe[..., :-fenetre]
+    difference = haut - bas
+    correction = _erreur_somme(haut, -bas, difference) + (compensation[..., fenetre:] - compensation[..., :-fenetre])
+    moyenne = (difference + correction) / fenetre
+
+    completes = (nb_manquantes[..., fenetre:] - nb_manquantes[..., :-fenetre]) == 0
+    resultat[..., fenetre - 1:] = np.where(completes, moyenne, np.nan)
+    return resultat
+
+
+# Sommes et nombres de valeurs présentes sur des fenêtres de bornes quelconques
+# [debuts, fins[ (positions, de même forme que les valeurs), à partir des sommes préfixes
+def sommes_entre_bornes(prefixes, debuts, fins):
+    prefixe, compensation, nb_manquantes = prefixes
+
+    def lire(tableau, positions):
+        return np.take_along_axis(tableau, positions, axis=-1)
+
+    haut = lire(prefixe, fins)
+    bas = lire(prefixe, debuts)
+    difference = haut - bas
+    correction = _erreur_somme(haut, -bas, difference) + (lire(compensation, fins) - lire(compensation, debuts))
+    nb_presentes = (fins - debuts) - (lire(nb_manquantes, fins) - lire(nb_manquantes, debuts))
+    return difference + correction, nb_presentes
+
+
+def moyenne_mobile(valeurs, fenetre):
+    return moyenne_depuis_prefixes(sommes_prefixes(valeurs), fenetre)
+
+
+# Toutes les fenêtres demandées à partir d'une seule passe sur les données
+def moyennes_mobiles(valeurs, fenetres):
+    prefixes = sommes_prefixes(valeurs)
+    return {fenetre: moyenne_depuis_prefixes(prefixes, fenetre) for fenetre in fenetres}
+
+
+# Moyenne et écart-type (ddof=1 par défaut) sur `fenetre` valeurs ; NaN dans les mêmes
+# cas que rolling(window=fenetre). Au niveau des prix, Σx² - (Σx)²/n s'annule presque
+# entièrement : la série est découpée en blocs de `fenetre` valeurs, recentrées sur une
+# référence propre à chaque bloc (sa première valeur présente). Une fenêtre chevauche au
+# plus deux blocs consécutifs : ses sommes sont la fin du bloc précédent (ramenée à la
+# référence du bloc suivant) plus le début du sien, lues dans des sommes cumulées locales
+# à chaque bloc. L'annulation n'est plus que de l'ordre de
+# eps × (1 + ((moyenne - référence) / écart-type)²), la référence étant à moins de deux
+# fenêtres de la séance.
+def moyenne_ecart_type_mobile(valeurs, fenetre, ddof=1):
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    nb = valeurs.shape[-1]
+    if fenetre > nb:
+        return np.full(valeurs.shape, np.nan), np.full(valeurs.shape, np.nan)
+
+    nb_blocs = -(-nb // fenetre)
+    centrees = np.full(valeurs.shape[:-1] + (nb_blocs * fenetre,), np.nan)
+    centrees[..., :nb] = valeurs
+    centrees = centrees.reshape(valeurs.shape[:-1] + (nb_blocs, fenetre))
+
+    # Référence de chaque bloc (0 pour un bloc sans valeur : ses fenêtres valent NaN)
+    presentes = ~np.isnan(centrees)
+    references = np.take_along_axis(centrees, presentes.argmax(axis=-1)[..., None], axis=-1)
+    references[~presentes.any(axis=-1)] = 0.0
+    centrees -= references
+
+    # Fenêtre finissant au rang r du bloc b : rangs 0..r du bloc b, plus les
+    # fenetre - 1 - r derniers rangs du bloc b - 1 (sommés depuis la fin, pour qu'un NaN
+    # en début de bloc n'invalide pas les fenêtres qui ne le contiennent pas), décalés
+    # de l'écart entre les deux références
+    def sommes(termes):
+        cumulees = np.cumsum(termes, axis=-1)
+        depuis_fin = np.cumsum(termes[..., :-1, :0:-1], axis=-1)[..., ::-1]
+        precedentes = np.empty_like(cumulees)
+        precedentes[..., 0, :-1] = np.nan
+        precedentes[..., :, -1] = 0.0
+        precedentes[..., 1:, :-1] = depuis_fin
+        return cumulees, precedentes
+
+    somme, somme_precedente = sommes(centrees)
+    centrees *= centrees
+    somme_carres, somme_carres_precedente = sommes(centrees)
+    ecarts = np.zeros_like(references)
+    np.subtract(references[..., :-1, :], references[..., 1:, :], out=ecarts[..., 1:, :])
+    nb_precedentes = np.arange(fenetre - 1, -1, -1, dtype=np.float64)
+
+    somme_carres += somme_carres_precedente
+    somme_carres += (2 * somme_precedente + nb_precedentes * ecarts) * ecarts
+    somme += somme_precedente
+    somme += nb_precedentes * ecarts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (somme_carres - somme * somme / fenetre) / (fenetre - ddof)
+    forme = valeurs.shape[:-1] + (nb_blocs * fenetre,)
+    moyenne = (references + somme / fenetre).reshape(forme)[..., :nb]
+    ecart = np.sqrt(np.maximum(variance, 0.0)).reshape(forme)[..., :nb]
+    return moyenne, ecart
+
+
+def ecart_type_mobile(valeurs, fenetre, ddof=1):
+    return moyenne_ecart_type_mobile(valeurs, fenetre, ddof)[1]
+
+
+############
+# NOYAU D'EXTREMUMS GLISSANTS (O(n) QUELLE QUE SOIT LA FENÊTRE)
+############
+
+# Algorithme de van Herk / Gil-Werman : la série est découpée en blocs de `fenetre`
+# valeurs ; un extremum cumulé vers l'avant et un vers l'arrière dans chaque bloc
+# suffisent, puisque toute fenêtre chevauche exactement deux blocs consécutifs.
+# `operation` vaut np.maximum ou np.minimum ; un NaN dans la fenêtre donne NaN,
+# comme rolling(window=fenetre).max() / .min().
+def extremum_mobile(valeurs, fenetre, operation=np.maximum):
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    nb = valeurs.shape[-1]
+    resultat = np.full(valeurs.shape, np.nan)
+    if fenetre > nb:
+        return resultat
+
+    nb_blocs = -(-nb // fenetre)
+    complete = np.full(valeurs.shape[:-1] + (nb_blocs * fenetre,), np.nan)
+    complete[..., :nb] = valeurs
+    blocs = complete.reshape(valeurs.shape[:-1] + (nb_blocs, fenetre))
+
+    avant = operation.accumulate(blocs, axis=-1).reshape(complete.shape)
+    arriere = operation.accumulate(blocs[..., ::-1], axis=-1)[..., ::-1].reshape(complete.shape)
+    resultat[..., fenetre - 1:] = operation(arriere[..., :nb - fenetre + 1], avant[..., fenetre - 1:nb])
+    return resultat
+
+
+############
+# NOYAU DE LISSAGE EXPONENTIEL (RÉCURRENCE LINÉAIRE SANS BOUCLE PAR VALEUR)
+############
+
+# Amplitude maximale des puissances de la décroissance dans un bloc (loin du dépassement)
+LOG_AMPLITUDE_MAX = 200.0
+
+
+# y[t] = decroissance * y[t-1] + entrees[t], y[-1] = 0, le long du dernier axe.
+# Dans un bloc de L valeurs : y[s+j] = d^j * (d * y[s-1] + Σ_{k<=j} entrees[s+k] * d^-k),
+# soit un produit, une somme cumulée et un produit vectorisés. Les blocs sont assez
+# courts pour que d^-L reste représentable ; seul le report d'un bloc au suivant est séquentiel.
+def filtre_exponentiel(entrees, decroissance):
+    entrees = np.asarray(entrees, dtype=np.float64)
+    if decroissance <= 0:
+        return entrees.copy()
+    nb = entrees.shape[-1]
+    taille_bloc = max(1, min(nb, int(LOG_AMPLITUDE_MAX / -np.log(decroissance)))) if decroissance < 1 else nb
+
+    exposants = np.arange(taille_bloc)
+    inverses = decroissance ** -exposants.astype(np.float64)
+    puissances = decroissance ** exposants.astype(np.float64)
+    sortie = np.empty_like(entrees)
+    report = np.zeros(entrees.shape[:-1] + (1,))
+    for debut in range(0, nb, taille_bloc):
+        fin = min(debut + taille_bloc, nb)
+        longueur = fin - debut
+        bloc = sortie[..., debut:fin]
+        np.multiply(entrees[..., debut:fin], inverses[:longueur], out=bloc)
+        np.cumsum(bloc, axis=-1, out=bloc)
+        bloc += decroissance * report
+        bloc *= puissances[:longueur]
+        report = bloc[..., -1:]
+    return sortie
+
+
+# Moyenne exponentielle, mêmes poids que ewm(alpha=alpha).mean() (adjust=True,
+# ignore_na=False) : Σ (1-α)^i x[t-i] / Σ (1-α)^i sur les seules valeurs présentes.
+# Numérateur et dénominateur suivent la même récurrence et sont filtrés séparément
+# (le dénominateur ne dépend que de la présence des valeurs).
+def moyenne_exponentielle(valeurs, alpha):
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    manquantes = np.isnan(valeurs)
+    numerateur = filtre_exponentiel(np.where(manquantes, 0.0, valeurs), 1.0 - alpha)
+    denominateur = filtre_exponentiel(~manquantes, 1.0 - alpha)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        numerateur /= denominateur
+    return numerateur
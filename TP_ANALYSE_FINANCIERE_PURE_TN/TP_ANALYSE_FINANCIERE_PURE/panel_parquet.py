@@ -0,0 +1,90 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from cache_donnees import REPERTOIRE_CACHE, lire_historique
+
+############
+# PANEL PARQUET HORS MÉMOIRE (PARTITIONNÉ PAR TICKER ET PAR ANNÉE)
+############
+
+# Organisation : panel/ticker=<TICKER>/annee=<AAAA>/part-0.parquet
+# Les filtres sur le ticker et l'année éliminent des répertoires entiers ; le filtre
+# sur la date s'appuie sur les statistiques min/max des groupes de lignes.
+RACINE_PANEL = os.path.join(REPERTOIRE_CACHE, 'panel')
+LIGNES_PAR_GROUPE = 65_536
+
+PARTITIONNEMENT = ds.partitioning(
+    pa.schema([('ticker', pa.string()), ('annee', pa.int16())]),
+    flavor='hive',
+)
+
+
+# Écriture (ou remplacement) des années couvertes par `data` pour un ticker
+def ecrire_panel(ticker, data, racine=RACINE_PANEL):
+    table = data.reset_index()
+    table['ticker'] = ticker
+    table['annee'] = table['Date'].dt.year.astype('int16')
+
+    ds.write_dataset(
+        pa.Table.from_pandas(table, preserve_index=False),
+        racine,
+        format='parquet',
+        partitioning=PARTITIONNEMENT,
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='delete_matching',
+        max_rows_per_group=LIGNES_PAR_GROUPE,
+    )
+
+
+# Export des historiques en cache vers le panel
+def exporter_panel(tickers, racine=RACINE_PANEL):
+    exportes = []
+    for ticker in tickers:
+        data = lire_historique(ticker)
+        if data is not None:
+            ecrire_panel(ticker, data, racine)
+            exportes.append(ticker)
+    return exportes
+
+
+# Lecture avec filtres poussés jusqu'au stockage : seule la plage demandée est lue.
+# Un ticker seul renvoie un DataFrame indexé par Date (format des scripts),
+# une liste de tickers un DataFrame indexé par (Ticker, Date).
+def lire_panel(tickers=None, debut=None, fin=None, colonnes=None, racine=RACINE_PANEL):
+    if not os.path.exists(racine):
+        return None
+    jeu = ds.dataset(racine, format='parquet', partitioning=PARTITIONNEMENT)
+
+    ticker_seul = isinstance(tickers, str)
+    if ticker_seul:
+        tickers = [tickers]
+
+    filtre = None
+    conditions = []
+    if tickers is not None:
+        conditions.append(ds.field('ticker').isin(list(tickers)))
+    if debut is not None:
+        debut = pd.Timestamp(debut)
+        conditions.append(ds.field('annee') >= debut.year)
+        conditions.append(ds.field('Date') >= pa.scalar(debut.to_pydatetime()))
+    if fin is not None:
+        fin = pd.Timestamp(fin)
+        conditions.append(ds.field('annee') <= fin.year)
+        conditions.append(ds.field('Date') < pa.scalar(fin.to_pydatetime()))
+    for condition in conditions:
+        filtre = condition if filtre is None else filtre & condition
+
+    colonnes_lues = None
+    if colonnes is not None:
+        colonnes_lues = ['Date', 'ticker'] + [col for col in colonnes if col not in ('Date', 'ticker')]
+
+    data = jeu.to_table(columns=colonnes_lues, filter=filtre).to_pandas()
+    if data.empty:
+        return None
+    data = data.drop(columns=['annee'], errors='ignore').rename(columns={'ticker': 'Ticker'})
+    data['Ticker'] = data['Ticker'].astype(str)
+
+    if ticker_seul:
+        return data.drop(columns=['Ticker']).set_index('Date').sort_index()
+    return data.set_index(['Ticker', 'Date']).sort_index()
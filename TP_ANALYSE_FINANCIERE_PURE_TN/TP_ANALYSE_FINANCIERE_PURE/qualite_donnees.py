@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+############
+# VALIDATION DE LA QUALITÉ DES DONNÉES OHLCV EN UNE PASSE
+############
+
+# Un bit par règle : chaque ligne reçoit un masque uint8 des règles violées
+BIT_NAN = 1             # au moins une valeur manquante dans la ligne
+BIT_DOUBLON = 2         # date déjà vue (pour le même ticker), première occurrence conservée
+BIT_HIGH_LOW = 4        # High < Low
+BIT_CLOSE_HORS = 8      # Close hors de [Low, High]
+BIT_OPEN_HORS = 16      # Open hors de [Low, High]
+BIT_VOLUME = 32         # Volume <= 0
+
+REGLES = {
+    'Valeurs manquantes': BIT_NAN,
+    'Dates en double': BIT_DOUBLON,
+    'High >= Low': BIT_HIGH_LOW,
+    'High >= Close >= Low': BIT_CLOSE_HORS,
+    'High >= Open >= Low': BIT_OPEN_HORS,
+    'Volume > 0': BIT_VOLUME,
+}
+
+# Masque des règles violées par ligne et nombre de NaN par colonne.
+# Fonctionne sur un ticker (index Date) comme sur un panel entier (index (Ticker, Date)
+# ou colonne 'Ticker') : une seule passe vectorisée, sans sous-DataFrame par règle.
+def valider_ohlcv(data):
+    ouverture = data['Open'].to_numpy(dtype=np.float64)
+    haut = data['High'].to_numpy(dtype=np.float64)
+    bas = data['Low'].to_numpy(dtype=np.float64)
+    cloture = data['Close'].to_numpy(dtype=np.float64)
+    volume = data['Volume'].to_numpy(dtype=np.float64)
+
+    masque = np.zeros(len(data), dtype=np.uint8)
+
+    colonnes = [col for col in data.columns if col != 'Ticker']
+    manquantes = pd.isna(data[colonnes].to_numpy())
+    masque |= manquantes.any(axis=1).astype(np.uint8) * BIT_NAN
+    nan_par_colonne = pd.Series(manquantes.sum(axis=0), index=colonnes)
+
+    if 'Ticker' in data.columns:
+        doublons = pd.MultiIndex.from_arrays([data['Ticker'], data.index]).duplicated(keep='first')
+    else:
+        doublons = data.index.duplicated(keep='first')
+    masque |= doublons.astype(np.uint8) * BIT_DOUBLON
+
+    # Les comparaisons avec NaN sont fausses : une valeur manquante n'est comptée qu'en NaN
+    masque |= (haut < bas).astype(np.uint8) * BIT_HIGH_LOW
+    masque |= ((cloture > haut) | (cloture < bas)).astype(np.uint8) * BIT_CLOSE_HORS
+    masque |= ((ouverture > haut) | (ouverture < bas)).astype(np.uint8) * BIT_OPEN_HORS
+    masque |= (volume <= 0).astype(np.uint8) * BIT_VOLUME
+
+    return masque, nan_par_colonne
+
+
+# Nombre de lignes en violation pour chaque règle
+def compter_anomalies(masque):
+    return {nom: int(np.count_nonzero(masque & bit)) for nom, bit in REGLES.items()}
+
+
+# Agrégats par ticker pour un panel : tableau tickers x règles
+def compter_anomalies_par_ticker(masque, tickers):
+    codes, uniques = pd.factorize(np.asarray(tickers))
+    comptes = {
+        nom: np.bincount(codes, weights=(masque & bit) != 0, minlength=len(uniques)).astype(np.int64)
+        for nom, bit in REGLES.items()
+    }
+    return pd.DataFrame(comptes, index=pd.Index(uniques, name='Ticker'))
+
+
+def lignes_en_anomalie(data, masque, bit):
+    return data[(masque & bit) != 0]
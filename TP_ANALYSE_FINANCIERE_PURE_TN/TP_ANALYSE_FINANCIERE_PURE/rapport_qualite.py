@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import threading
+from dataclasses import dataclass, field, asdict
+import numpy as np
+import pandas as pd
+from cache_donnees import lire_historique
+from calendrier import seances, seances_manquantes, dates_hors_calendrier
+from qualite_donnees import valider_ohlcv, compter_anomalies
+
+############
+# RAPPORT DE QUALITÉ STRUCTURÉ (UN ENREGISTREMENT PAR TICKER)
+############
+
+# Activation dans l'étape 3 par variable d'environnement :
+#   TP_RAPPORT_QUALITE = chemin du fichier JSON Lines auquel le rapport est ajouté
+CHEMIN_RAPPORT = os.environ.get('TP_RAPPORT_QUALITE')
+
+# Écart (en jours calendaires) au-delà duquel un trou est anormal, comme à l'étape 2
+ECART_ANORMAL = 4
+
+
+# Résultats de l'étape 3.1 (et des écarts de l'étape 2) pour un ticker
+@dataclass(slots=True)
+class RapportQualite:
+    ticker: str
+    debut: str
+    fin: str
+    nb_lignes: int
+    nb_dates_uniques: int
+    nb_nan: int
+    nb_doublons: int
+    nb_high_low: int
+    nb_close_hors: int
+    nb_open_hors: int
+    nb_volume: int
+    nb_anomalies: int
+    seances_attendues: int
+    seances_manquantes: int
+    dates_hors_calendrier: int
+    nb_gaps_anormaux: int
+    ecart_max_jours: int
+    nan_par_colonne: dict = field(default_factory=dict)
+    ecarts_jours: dict = field(default_factory=dict)
+
+    def vers_dict(self):
+        return asdict(self)
+
+    # Ligne à plat pour le format colonnaire : une colonne nan_<col> par colonne
+    # et une colonne ecart_<n>j par écart observé
+    def vers_ligne(self):
+        ligne = asdict(self)
+        for col, nb in ligne.pop('nan_par_colonne').items():
+            ligne[f"nan_{col}"] = nb
+        for jours, nb in ligne.pop('ecarts_jours').items():
+            ligne[f"ecart_{jours}j"] = nb
+        return ligne
+
+
+# Le masque de valider_ohlcv peut être fourni s'il a déjà été calculé (étape 3.1)
+def evaluer_qualite(ticker, data, masque=None, nan_par_colonne=None):
+    if masque is None:
+        masque, nan_par_colonne = valider_ohlcv(data)
+    elif nan_par_colonne is None:
+        nan_par_colonne = data.drop(columns='Ticker', errors='ignore').isna().sum()
+    comptes = compter_anomalies(masque)
+
+    ecarts = np.diff(data.index.values).astype('timedelta64[D]').astype(np.int64)
+    valeurs, occurrences = np.unique(ecarts, return_counts=True)
+
+    return RapportQualite(
+        ticker=ticker,
+        debut=data.index.min().strftime('%Y-%m-%d'),
+        fin=data.index.max().strftime('%Y-%m-%d'),
+        nb_lignes=len(data),
+        nb_dates_uniques=len(data) - comptes['Dates en double'],
+        nb_nan=int(nan_par_colonne.sum()),
+        nb_doublons=comptes['Dates en double'],
+        nb_high_low=comptes['High >= Low'],
+        nb_close_hors=comptes['High >= Close >= Low'],
+        nb_open_hors=comptes['High >= Open >= Low'],
+        nb_volume=comptes['Volume > 0'],
+        nb_anomalies=comptes['High >= Low'] + comptes['High >= Close >= Low']
+                     + comptes['High >= Open >= Low'] + comptes['Volume > 0'],
+        seances_attendues=len(seances(data.index.min(), data.index.max())),
+        seances_manquantes=len(seances_manquantes(data.index)),
+        dates_hors_calendrier=len(dates_hors_calendrier(data.index)),
+        nb_gaps_anormaux=int(np.count_nonzero(ecarts > ECART_ANORMAL)),
+        ecart_max_jours=int(ecarts.max()) if len(ecarts) > 0 else 0,
+        nan_par_colonne={col: int(nb) for col, nb in nan_par_colonne.items()},
+        ecarts_jours={str(jours): int(nb) for jours, nb in zip(valeurs, occurrences)},
+    )
+
+
+# Rapports de tout un univers, lus directement dans le cache (aucun téléchargement)
+def evaluer_univers(tickers, debut=None, fin=None):
+    rapports = []
+    for ticker in tickers:
+        data = lire_historique(ticker)
+        if data is None:
+            continue
+        if debut is not None:
+            data = data[data.index >= pd.Timestamp(debut)]
+        if fin is not None:
+            data = data[data.index < pd.Timestamp(fin)]
+        if not data.empty:
+            rapports.append(evaluer_qualite(ticker, data))
+    return rapports
+
+
+############
+# ÉCRITURE ET LECTURE (JSON LINES / PARQUET)
+############
+
+def ajouter_rapports_jsonl(rapports, chemin):
+    os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+    with open(chemin, 'a', encoding='utf-8') as f:
+        for rapport in rapports:
+            f.write(json.dumps(rapport.vers_dict(), ensure_ascii=False) + '\n')
+
+
+# Fichier colonnaire : le suivi d'un chargement nocturne ne lit que les colonnes utiles
+def ecrire_rapports_parquet(rapports, chemin):
+    os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+    table = pd.DataFrame([rapport.vers_ligne() for rapport in rapports])
+    colonnes_ecarts = [col for col in table.columns if col.startswith('ecart_') and col.endswith('j')]
+    table[colonnes_ecarts] = table[colonnes_ecarts].fillna(0).astype('int64')
+    chemin_tmp = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    table.to_parquet(chemin_tmp, index=False)
+    os.replace(chemin_tmp, chemin)
+
+
+# Table des rapports (une ligne par ticker), quel que soit le format
+def lire_rapports(chemin):
+    if chemin.endswith('.parquet'):
+        return pd.read_parquet(chemin)
+    return pd.read_json(chemin, lines=True, dtype={'debut': str, 'fin': str})
+
+
+############
+# AGRÉGATS SUR L'ENSEMBLE DES TICKERS
+############
+
+COLONNES_COMPTEURS = [
+    'nb_lignes', 'nb_nan', 'nb_doublons', 'nb_high_low', 'nb_close_hors',
+    'nb_open_hors', 'nb_volume', 'nb_anomalies', 'seances_manquantes',
+    'dates_hors_calendrier', 'nb_gaps_anormaux',
+]
+
+
+def synthese_rapports(table):
+    # Table vide (aucun ticker évalué) : synthèse à zéro
+    if len(table) == 0:
+        synthese = {'nb_tickers': 0, 'nb_tickers_en_anomalie': 0, 'ecart_max_jours': 0}
+        for col in COLONNES_COMPTEURS:
+            synthese[f"total_{col}"] = 0
+            synthese[f"tickers_{col}"] = 0
+        return synthese
+    en_anomalie = (table[['nb_nan', 'nb_doublons', 'nb_anomalies', 'seances_manquantes']] > 0).any(axis=1)
+    synthese = {
+        'nb_tickers': int(len(table)),
+        'nb_tickers_en_anomalie': int(en_anomalie.sum()),
+        'ecart_max_jours': int(table['ecart_max_jours'].max()),
+    }
+    for col in COLONNES_COMPTEURS:
+        synthese[f"total_{col}"] = int(table[col].sum())
+        synthese[f"tickers_{col}"] = int((table[col] > 0).sum())
+    return synthese
+
+
+# Tickers les plus touchés (anomalies de cohérence, puis NaN, puis séances manquantes)
+def pires_tickers(table, nb=10):
+    colonnes = ['nb_anomalies', 'nb_nan', 'seances_manquantes']
+    return table.sort_values(colonnes, ascending=False).head(nb)[['ticker'] + colonnes + ['nb_doublons']]
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], encoding='utf-8') as f:
+        univers = [ligne.strip() for ligne in f if ligne.strip()]
+    chemin_sortie = sys.argv[2]
+
+    rapports = evaluer_univers(univers)
+    if chemin_sortie.endswith('.parquet'):
+        ecrire_rapports_parquet(rapports, chemin_sortie)
+    else:
+        ajouter_rapports_jsonl(rapports, chemin_sortie)
+
+    table = lire_rapports(chemin_sortie)
+    for nom, valeur in synthese_rapports(table).items():
+        print(f"   {nom:32} : {valeur:,}")
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+from fenetres_temporelles import FORMAT_FENETRE, reculer
+
+############
+# RENDEMENTS ET CAGR MULTI-HORIZONS (RECHERCHE DICHOTOMIQUE SUR L'INDEX DES DATES)
+############
+
+# Pour chaque horizon, la séance de départ est trouvée par recherche dichotomique de la
+# date cible dans l'index trié ; les prix de départ de tous les horizons (et de tous les
+# tickers d'un panel) sont ensuite lus d'un seul coup dans le tableau des Close, sans
+# aucune copie filtrée du DataFrame.
+#
+# Conventions :
+# - "30D", "1W", "3M", "10Y"... : première séance >= date de fin - durée (comme
+#   data[data.index >= fin - pd.DateOffset(years=N)] dans les scripts)
+# - "YTD" : dernière séance de l'année précédente (le rendement de l'année en cours
+#   inclut la première séance de janvier)
+# - horizon non couvert par l'historique (date cible antérieure à la première séance) : NaN
+# - CAGR annualisé sur la durée calendaire réelle entre les deux séances (jours / 365.25),
+#   comme le CAGR sur toute la période
+
+HORIZONS_STANDARDS = ('1W', '1M', '3M', '6M', 'YTD', '1Y', '2Y', '3Y', '5Y', '10Y', '15Y', '20Y')
+
+JOURS_PAR_ANNEE = 365.25
+
+
+def _verifier_horizon(horizon):
+    if horizon != 'YTD' and FORMAT_FENETRE.match(horizon) is None:
+        raise ValueError(f"Horizon inconnu : {horizon!r} (attendu : 'YTD' ou un nombre suivi de D, W, M ou Y)")
+
+
+# Dates cibles (lignes, horizons) à partir de la date de fin de chaque ligne : un seul
+# calcul vectorisé par horizon pour tout le panel
+def _cibles(dates_fin, horizons):
+    cibles = np.empty((len(dates_fin), len(horizons)), dtype='datetime64[ns]')
+    for rang, horizon in enumerate(horizons):
+        if horizon == 'YTD':
+            cibles[:, rang] = dates_fin.astype('datetime64[Y]').astype('datetime64[ns]')
+        else:
+            cibles[:, rang] = reculer(dates_fin, horizon)
+    return cibles
+
+
+# Première position >= cible dans chaque ligne de dates triées, limitée aux nb_seances
+# premières colonnes : recherche dichotomique menée en parallèle sur toutes les lignes
+def _rechercher(dates_2d, cibles, nb_seances):
+    lignes = np.arange(len(cibles))[:, None]
+    bas = np.zeros(cibles.shape, dtype=np.int64)
+    haut = np.broadcast_to(nb_seances[:, None], cibles.shape).astype(np.int64)
+    derniere = max(dates_2d.shape[1] - 1, 0)
+    while True:
+        actifs = bas < haut
+        if not actifs.any():
+            return bas
+        milieu = (bas + haut) // 2
+        avant = dates_2d[lignes, np.minimum(milieu, derniere)] < cibles
+        bas = np.where(actifs & avant, milieu + 1, bas)
+        haut = np.where(actifs & ~avant, milieu, haut)
+
+
+# Positions de départ (et disponibilité) de chaque horizon pour chaque ligne. Dates
+# communes (dates,) : un seul searchsorted sur l'index partagé ; dates propres à chaque
+# ligne (panel tassé) : recherche dichotomique vectorisée
+def _debuts(dates, dates_2d, horizons, nb_seances):
+    fins = np.maximum(nb_seances - 1, 0)
+    lignes = np.arange(dates_2d.shape[0])
+    cibles = _cibles(dates_2d[lignes, fins], horizons)
+    if dates.ndim == 1:
+        debuts = np.searchsorted(dates, cibles, side='left')
+    else:
+        debuts = _rechercher(dates_2d, cibles, nb_seances)
+
+    # YTD : la séance précédant le 1er janvier
+    annee_en_cours = np.array([horizon == 'YTD' for horizon in horizons])
+    debuts = np.where(annee_en_cours, debuts - 1, debuts)
+    couverts = np.where(annee_en_cours, debuts >= 0, cibles >= dates_2d[:, :1])
+    couverts &= (nb_seances > 0)[:, None]
+    return np.where(couverts, np.maximum(debuts, 0), 0), couverts
+
+
+# Close (dates,) ou panel tassé (tickers, dates) avec ses dates (même forme, ou (dates,)
+# communes) et le nombre de séances cotées de chaque ligne. Renvoie un dictionnaire de
+# tableaux (..., horizons) : positions et dates de départ, prix de départ et de fin,
+# rendement (%), nombre d'années et CAGR (% par an).
+def rendements_horizons(close, dates, horizons=HORIZONS_STANDARDS, nb_seances=None):
+    for horizon in horizons:
+        _verifier_horizon(horizon)
+    close = np.asarray(close, dtype=np.float64)
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    close_2d = np.atleast_2d(close)
+    dates_2d = np.broadcast_to(dates, close_2d.shape)
+    if nb_seances is None:
+        nb_seances = np.full(close_2d.shape[0], close_2d.shape[1])
+    nb_seances = np.atleast_1d(nb_seances)
+    lignes = np.arange(close_2d.shape[0])
+
+    debuts, couverts = _debuts(dates, dates_2d, horizons, nb_seances)
+
+    fins = np.maximum(nb_seances - 1, 0)
+    prix_debut = np.where(couverts, np.take_along_axis(close_2d, debuts, axis=1), np.nan)
+    prix_fin = close_2d[lignes, fins][:, None]
+    dates_debut = np.take_along_axis(dates_2d, debuts, axis=1)
+    dates_debut = np.where(couverts, dates_debut, np.datetime64('NaT'))
+    annees = (dates_2d[lignes, fins][:, None] - dates_debut) / np.timedelta64(1, 'D') / JOURS_PAR_ANNEE
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rendement = ((prix_fin - prix_debut) / prix_debut) * 100
+        cagr = np.where(annees > 0, ((prix_fin / prix_debut) ** (1 / annees) - 1) * 100, np.nan)
+
+    resultat = {
+        'debuts': debuts, 'couverts': couverts, 'dates_debut': dates_debut,
+        'prix_debut': prix_debut, 'prix_fin': np.broadcast_to(prix_fin, prix_debut.shape),
+        'rendement': rendement, 'annees': annees, 'cagr': cagr,
+    }
+    if close.ndim == 1:
+        resultat = {nom: valeurs[0] for nom, valeurs in resultat.items()}
+    return resultat
+
+
+# DataFrame au format des scripts (index Date, colonne Close) : une ligne par horizon
+def table_horizons(data, horizons=HORIZONS_STANDARDS):
+    resultat = rendements_horizons(data['Close'].to_numpy(dtype=np.float64), data.index, horizons)
+    return pd.DataFrame({
+        'Debut': pd.DatetimeIndex(resultat['dates_debut']),
+        'Prix_Debut': resultat['prix_debut'],
+        'Rendement': resultat['rendement'],
+        'Annees': resultat['annees'],
+        'CAGR': resultat['cagr'],
+    }, index=pd.Index(list(horizons), name='Horizon'))
+
+
+# Panel (moteur_panel) : une ligne par ticker, colonnes Rendement_<horizon> et CAGR_<horizon>
+def table_horizons_panel(panel, horizons=HORIZONS_STANDARDS):
+    resultat = rendements_horizons(panel.tasser(panel.valeurs['Close']), panel.dates_tassees(),
+                                   horizons, panel.nb_seances)
+    colonnes = {}
+    for rang, horizon in enumerate(horizons):
+        colonnes[f"Rendement_{horizon}"] = resultat['rendement'][:, rang]
+    for rang, horizon in enumerate(horizons):
+        colonnes[f"CAGR_{horizon}"] = resultat['cagr'][:, rang]
+    return pd.DataFrame(colonnes, index=pd.Index(panel.tickers, name='Ticker'))
@@ -0,0 +1,113 @@
+import sys
+import time
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+
+############
+# SERVEUR HTTP LOCAL DE SUBSTITUTION (TESTS D'INGESTION SANS RÉSEAU)
+############
+
+# Répond au protocole de FournisseurHTTP : GET /<TICKER>.csv?debut=...&fin=...
+# - ticker connu : CSV des barres de [debut, fin[ (index Date)
+# - ticker inconnu : 404
+# - pannes simulées : les `nb_pannes[ticker]` premières requêtes d'un ticker reçoivent
+#   un 503 (nb_pannes = -1 : toujours en panne)
+# Chaque requête est horodatée (ticker, instant) pour vérifier la limitation de débit.
+
+
+class ServeurSubstitution:
+    def __init__(self, donnees, nb_pannes=None, hote='127.0.0.1', port=0):
+        self.donnees = donnees
+        self.nb_pannes = dict(nb_pannes or {})
+        self.requetes = []
+        self.verrou = threading.Lock()
+        self.serveur = ThreadingHTTPServer((hote, port), self._gestionnaire())
+        self.fil = None
+
+    @property
+    def url(self):
+        hote, port = self.serveur.server_address[:2]
+        return f"http://{hote}:{port}"
+
+    def _gestionnaire(self):
+        serveur = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_GET(self):
+                adresse = urllib.parse.urlparse(self.path)
+                ticker = urllib.parse.unquote(adresse.path.lstrip('/'))
+                if ticker.endswith('.csv'):
+                    ticker = ticker[:-len('.csv')]
+                parametres = urllib.parse.parse_qs(adresse.query)
+
+                with serveur.verrou:
+                    serveur.requetes.append((ticker, time.monotonic()))
+                    pannes = serveur.nb_pannes.get(ticker, 0)
+                    if pannes > 0:
+                        serveur.nb_pannes[ticker] = pannes - 1
+
+                if pannes != 0:
+                    self.send_error(503, "Panne simulée")
+                    return
+                data = serveur.donnees.get(ticker)
+                if data is None:
+                    self.send_error(404, "Ticker inconnu")
+                    return
+
+                if 'debut' in parametres:
+                    data = data[data.index >= pd.Timestamp(parametres['debut'][0])]
+                if 'fin' in parametres:
+                    data = data[data.index < pd.Timestamp(parametres['fin'][0])]
+                contenu = data.to_csv(index_label='Date').encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/csv')
+                self.send_header('Content-Length', str(len(contenu)))
+                self.end_headers()
+                self.wfile.write(contenu)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Gestionnaire
+
+    def demarrer(self):
+        self.fil = threading.Thread(target=self.serveur.serve_forever, daemon=True)
+        self.fil.start()
+        return self
+
+    def arreter(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+        if self.fil is not None:
+            self.fil.join()
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
+
+    def nb_requetes(self, ticker=None):
+        with self.verrou:
+            return sum(1 for nom, _ in self.requetes if ticker is None or nom == ticker)
+
+
+# Usage : python serveur_substitution.py <répertoire des fichiers <TICKER>.parquet/.csv> [port]
+# (puis TP_FOURNISSEUR=http TP_DONNEES=http://127.0.0.1:<port>)
+if __name__ == '__main__':
+    from fournisseurs import FournisseurFichier
+
+    class DonneesFichiers(dict):
+        def __init__(self, repertoire):
+            super().__init__()
+            self.fichiers = FournisseurFichier(repertoire)
+
+        def get(self, ticker, defaut=None):
+            data = self.fichiers.lire_fichier(ticker)
+            return defaut if data is None else data
+
+    serveur = ServeurSubstitution(DonneesFichiers(sys.argv[1]), port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
+    print(f"Serveur de substitution sur {serveur.url}")
+    serveur.serveur.serve_forever()
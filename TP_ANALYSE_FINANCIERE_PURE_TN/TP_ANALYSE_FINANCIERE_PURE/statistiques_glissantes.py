@@ -0,0 +1,325 @@
+import os
+import json
+import math
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from cache_donnees import lire_filigrane, lire_historique, lire_historique_depuis, repertoire_ticker
+
+############
+# STATISTIQUES GLISSANTES INCRÉMENTALES (O(1) PAR NOUVELLE BARRE)
+############
+
+# Accumulateurs équivalents à rolling().mean() / rolling().std() : amorcés sur
+# l'historique, ils redonnent les colonnes des scripts aux arrondis près, puis chaque
+# nouvelle barre coûte O(1).
+# Une fenêtre contenant un NaN donne NaN (min_periods = taille de la fenêtre).
+
+
+def _en_json(valeur):
+    return None if valeur != valeur else valeur
+
+
+def _depuis_json(valeur):
+    return np.nan if valeur is None else valeur
+
+
+# Moyenne glissante : somme compensée (Kahan) et mêmes cas particuliers que pandas
+class MoyenneGlissante:
+    def __init__(self, fenetre):
+        self.fenetre = fenetre
+        self.valeurs = deque()
+        self.nb = 0
+        self.somme = 0.0
+        self.nb_negatifs = 0
+        self.compensation_ajout = 0.0
+        self.compensation_retrait = 0.0
+        self.nb_identiques = 0
+        self.precedente = np.nan
+
+    def _ajouter(self, valeur):
+        if valeur != valeur:
+            return
+        self.nb += 1
+        y = valeur - self.compensation_ajout
+        t = self.somme + y
+        self.compensation_ajout = t - self.somme - y
+        self.somme = t
+        if np.signbit(valeur):
+            self.nb_negatifs += 1
+        if valeur == self.precedente:
+            self.nb_identiques += 1
+        else:
+            self.nb_identiques = 1
+            self.precedente = valeur
+
+    def _retirer(self, valeur):
+        if valeur != valeur:
+            return
+        self.nb -= 1
+        y = -valeur - self.compensation_retrait
+        t = self.somme + y
+        self.compensation_retrait = t - self.somme - y
+        self.somme = t
+        if np.signbit(valeur):
+            self.nb_negatifs -= 1
+
+    def valeur(self):
+        if self.nb < self.fenetre or self.nb == 0:
+            return np.nan
+        if self.nb_identiques >= self.nb:
+            return self.precedente
+        moyenne = self.somme / self.nb
+        if self.nb_negatifs == 0 and moyenne < 0:
+            return 0.0
+        if self.nb_negatifs == self.nb and moyenne > 0:
+            return 0.0
+        return moyenne
+
+    def ajouter(self, valeur):
+        valeur = float(valeur)
+        if len(self.valeurs) == self.fenetre:
+            self._retirer(self.valeurs.popleft())
+        self._ajouter(valeur)
+        self.valeurs.append(valeur)
+        return self.valeur()
+
+    def amorcer(self, valeurs):
+        return np.array([self.ajouter(valeur) for valeur in valeurs], dtype=np.float64)
+
+    def etat(self):
+        return {
+            'type': 'moyenne', 'fenetre': self.fenetre,
+            'valeurs': [_en_json(valeur) for valeur in self.valeurs],
+            'nb': self.nb, 'somme': self.somme, 'nb_negatifs': self.nb_negatifs,
+            'compensation_ajout': self.compensation_ajout, 'compensation_retrait': self.compensation_retrait,
+            'nb_identiques': self.nb_identiques, 'precedente': _en_json(self.precedente),
+        }
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        accumulateur = cls(etat['fenetre'])
+        accumulateur.valeurs = deque(_depuis_json(valeur) for valeur in etat['valeurs'])
+        for nom in ('nb', 'somme', 'nb_negatifs', 'compensation_ajout', 'compensation_retrait', 'nb_identiques'):
+            setattr(accumulateur, nom, etat[nom])
+        accumulateur.precedente = _depuis_json(etat['precedente'])
+        return accumulateur
+
+
+# Écart-type (ddof=1) fenêtré : sommes des écarts à une origine proche de la moyenne
+# (x - origine et (x - origine)²), mises à jour en O(1) à l'entrée et à la sortie d'une
+# barre. L'origine est recentrée et les sommes recalculées exactement toutes les
+# `fenetre` barres (coût amorti O(1)), ce qui évite la dérive des arrondis.
+class EcartTypeGlissant:
+    def __init__(self, fenetre, ddof=1):
+        self.fenetre = fenetre
+        self.ddof = ddof
+        self.valeurs = deque()
+        self.nb = 0
+        self.origine = np.nan
+        self.somme = 0.0
+        self.somme_carres = 0.0
+        self.nb_ajouts = 0
+        self.nb_identiques = 0
+        self.precedente = np.nan
+
+    def _ajouter(self, valeur):
+        if valeur != valeur:
+            return
+        if self.origine != self.origine:
+            self.origine = valeur
+        self.nb += 1
+        ecart = valeur - self.origine
+        self.somme += ecart
+        self.somme_carres += ecart * ecart
+        if valeur == self.precedente:
+            self.nb_identiques += 1
+        else:
+            self.nb_identiques = 1
+            self.precedente = valeur
+
+    def _retirer(self, valeur):
+        if valeur != valeur:
+            return
+        self.nb -= 1
+        ecart = valeur - self.origine
+        self.somme -= ecart
+        self.somme_carres -= ecart * ecart
+
+    def _recentrer(self):
+        valides = [valeur for valeur in self.valeurs if valeur == valeur]
+        self.nb = len(valides)
+        self.origine = valides[-1] if valides else np.nan
+        self.somme = math.fsum(valeur - self.origine for valeur in valides)
+        self.somme_carres = math.fsum((valeur - self.origine) ** 2 for valeur in valides)
+
+    def valeur(self):
+        if self.nb < self.fenetre or self.nb <= self.ddof:
+            return np.nan
+        # Fenêtre constante : exactement 0, comme rolling().std()
+        if self.nb == 1 or self.nb_identiques >= self.nb:
+            return 0.0
+        variance = (self.somme_carres - self.somme * self.somme / self.nb) / (self.nb - self.ddof)
+        return math.sqrt(max(variance, 0.0))
+
+    def ajouter(self, valeur):
+        valeur = float(valeur)
+        if len(self.valeurs) == self.fenetre:
+            self._retirer(self.valeurs.popleft())
+        self._ajouter(valeur)
+        self.valeurs.append(valeur)
+        self.nb_ajouts += 1
+        if self.nb_ajouts % self.fenetre == 0:
+            self._recentrer()
+        return self.valeur()
+
+    def amorcer(self, valeurs):
+        return np.array([self.ajouter(valeur) for valeur in valeurs], dtype=np.float64)
+
+    def etat(self):
+        return {
+            'type': 'ecart_type', 'fenetre': self.fenetre, 'ddof': self.ddof,
+            'valeurs': [_en_json(valeur) for valeur in self.valeurs],
+            'nb': self.nb, 'origine': _en_json(self.origine), 'somme': self.somme,
+            'somme_carres': self.somme_carres, 'nb_ajouts': self.nb_ajouts,
+            'nb_identiques': self.nb_identiques, 'precedente': _en_json(self.precedente),
+        }
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        accumulateur = cls(etat['fenetre'], etat['ddof'])
+        accumulateur.valeurs = deque(_depuis_json(valeur) for valeur in etat['valeurs'])
+        for nom in ('nb', 'somme', 'somme_carres', 'nb_ajouts', 'nb_identiques'):
+            setattr(accumulateur, nom, etat[nom])
+        accumulateur.origine = _depuis_json(etat['origine'])
+        accumulateur.precedente = _depuis_json(etat['precedente'])
+        return accumulateur
+
+
+TYPES_ACCUMULATEURS = {'moyenne': MoyenneGlissante, 'ecart_type': EcartTypeGlissant}
+
+# Colonnes de variables_derivees suivies en continu : (colonne source, type, fenêtre)
+STATISTIQUES_SUIVIES = {
+    'SMA_20': ('Close', MoyenneGlissante, 20),
+    'SMA_50': ('Close', MoyenneGlissante, 50),
+    'SMA_200': ('Close', MoyenneGlissante, 200),
+    'Volatilite_30j': ('Rendement_Quotidien', EcartTypeGlissant, 30),
+    'Volatilite_90j': ('Rendement_Quotidien', EcartTypeGlissant, 90),
+}
+
+
+############
+# SUIVI PAR TICKER, ÉTAT SÉRIALISÉ DANS LE CACHE
+############
+
+# Accumulateurs de toutes les statistiques suivies + dernière barre consommée
+# (le Close précédent sert au rendement quotidien de la barre suivante)
+class SuiviGlissant:
+    def __init__(self):
+        self.accumulateurs = {nom: type_(fenetre) for nom, (_, type_, fenetre) in STATISTIQUES_SUIVIES.items()}
+        self.premiere_date = None
+        self.derniere_date = None
+        self.dernier_close = np.nan
+
+    def ajouter(self, date, close):
+        close = float(close)
+        sources = {'Close': close, 'Rendement_Quotidien': (close / self.dernier_close - 1) * 100}
+        if self.premiere_date is None:
+            self.premiere_date = pd.Timestamp(date)
+        self.derniere_date = pd.Timestamp(date)
+        self.dernier_close = close
+        return {nom: self.accumulateurs[nom].ajouter(sources[source])
+                for nom, (source, _, _) in STATISTIQUES_SUIVIES.items()}
+
+    # Valeurs des colonnes pour chaque barre (même contenu que les colonnes dérivées)
+    def ajouter_barres(self, data):
+        lignes = [self.ajouter(date, close) for date, close in zip(data.index, data['Close'].to_numpy(dtype=np.float64))]
+        return pd.DataFrame(lignes, index=data.index, columns=list(STATISTIQUES_SUIVIES))
+
+    def valeurs(self):
+        return {nom: accumulateur.valeur() for nom, accumulateur in self.accumulateurs.items()}
+
+    def etat(self):
+        return {
+            'premiere_date': self.premiere_date.strftime('%Y-%m-%d') if self.premiere_date is not None else None,
+            'derniere_date': self.derniere_date.strftime('%Y-%m-%d') if self.derniere_date is not None else None,
+            'dernier_close': _en_json(self.dernier_close),
+            'accumulateurs': {nom: accumulateur.etat() for nom, accumulateur in self.accumulateurs.items()},
+        }
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        suivi = cls()
+        suivi.premiere_date = pd.Timestamp(etat['premiere_date']) if etat['premiere_date'] else None
+        suivi.derniere_date = pd.Timestamp(etat['derniere_date']) if etat['derniere_date'] else None
+        suivi.dernier_close = _depuis_json(etat['dernier_close'])
+        suivi.accumulateurs = {
+            nom: TYPES_ACCUMULATEURS[etat_acc['type']].depuis_etat(etat_acc)
+            for nom, etat_acc in etat['accumulateurs'].items()
+        }
+        return suivi
+
+
+def chemin_etat(ticker):
+    return os.path.join(repertoire_ticker(ticker), 'statistiques_glissantes.json')
+
+
+# L'état est sauvegardé avec le filigrane du cache au moment de la mise à jour
+def charger_suivi(ticker):
+    chemin = chemin_etat(ticker)
+    if not os.path.exists(chemin):
+        return None, None
+    with open(chemin, encoding='utf-8') as f:
+        contenu = json.load(f)
+    return SuiviGlissant.depuis_etat(contenu['etat']), contenu['filigrane']
+
+
+def sauver_suivi(ticker, suivi, filigrane):
+    chemin = chemin_etat(ticker)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    chemin_tmp = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(chemin_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'filigrane': filigrane, 'etat': suivi.etat()}, f)
+    os.replace(chemin_tmp, chemin)
+
+
+# Après un rafraîchissement : seules les barres postérieures à l'état sauvegardé sont lues
+# (segments récents uniquement) et consommées. Sans état, ou si l'historique a été complété
+# vers le passé (début du filigrane modifié), amorçage complet sur tout l'historique.
+def mettre_a_jour_suivi(ticker):
+    suivi, filigrane_suivi = charger_suivi(ticker)
+    filigrane = lire_filigrane(ticker)
+    if suivi is not None and filigrane is not None and filigrane == filigrane_suivi:
+        return suivi
+
+    if suivi is not None and suivi.derniere_date is not None and filigrane is not None \
+            and filigrane_suivi is not None and filigrane_suivi['debut'] == filigrane['debut']:
+        recentes = lire_historique_depuis(ticker, suivi.derniere_date)
+        # La dernière barre consommée doit toujours être en cache
+        if recentes is not None and recentes.index[0] == suivi.derniere_date:
+            suivi.ajouter_barres(recentes.iloc[1:])
+            sauver_suivi(ticker, suivi, filigrane)
+            return suivi
+
+    historique = lire_historique(ticker)
+    if historique is None:
+        return suivi
+    suivi = SuiviGlissant()
+    suivi.ajouter_barres(historique)
+    sauver_suivi(ticker, suivi, filigrane)
+    return suivi
+
+
+# Valeurs courantes des statistiques suivies, lues dans l'état sauvegardé sans relire
+# l'historique (une ligne par ticker ; les tickers sans état ou dont l'état est en retard
+# sur le cache sont ignorés)
+def statistiques_courantes(tickers):
+    lignes = {}
+    for ticker in tickers:
+        suivi, filigrane_suivi = charger_suivi(ticker)
+        if suivi is None or suivi.derniere_date is None or filigrane_suivi != lire_filigrane(ticker):
+            continue
+        lignes[ticker] = {'Derniere_Seance': suivi.derniere_date, 'Close': suivi.dernier_close, **suivi.valeurs()}
+    colonnes = ['Derniere_Seance', 'Close'] + list(STATISTIQUES_SUIVIES)
+    return pd.DataFrame.from_dict(lignes, orient='index', columns=colonnes).rename_axis('Ticker')
@@ -0,0 +1,140 @@
+import os
+import json
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from cache_donnees import lire_filigrane, lire_historique, repertoire_ticker
+
+############
+# STOCKAGE BINAIRE OHLCV PROJETÉ EN MÉMOIRE (MEMORY-MAPPED)
+############
+
+# Un fichier .npy contigu par colonne ; les dates sont stockées en int64 (nanosecondes)
+COLONNES_PRIX = ['Open', 'High', 'Low', 'Close']
+COLONNES_STORE = {
+    'Date': np.int64,
+    'Open': np.float64,
+    'High': np.float64,
+    'Low': np.float64,
+    'Close': np.float64,
+    'Volume': np.int64,
+}
+
+
+# Volume absent (NaN dans l'historique) : valeur sentinelle dans la colonne int64
+VOLUME_ABSENT = -1
+
+# Organisation du store (versions immuables, pointeur remplacé atomiquement) :
+#   cache/<TICKER>/mmap/version_00000/Date.npy, Open.npy, ...
+#   cache/<TICKER>/mmap/courant.json  ({'version': ..., 'derniere_seance': ...})
+POINTEUR = 'courant.json'
+
+
+def repertoire_store(ticker):
+    return os.path.join(repertoire_ticker(ticker), 'mmap')
+
+
+# Vues NumPy en lecture seule sur les fichiers projetés : aucune analyse, aucune copie.
+# Plusieurs processus qui ouvrent le même store partagent les mêmes pages du cache système.
+class StoreOHLCV:
+    def __init__(self, repertoire):
+        self.repertoire = repertoire
+        self.colonnes = {
+            nom: np.load(os.path.join(repertoire, f"{nom}.npy"), mmap_mode='r')
+            for nom in COLONNES_STORE
+        }
+
+    def __len__(self):
+        return len(self.colonnes['Date'])
+
+    def __getitem__(self, nom):
+        return self.colonnes[nom]
+
+    @property
+    def dates(self):
+        return self.colonnes['Date'].view('datetime64[ns]')
+
+    # Octets projetés (et non résidents : seules les pages lues sont chargées)
+    def taille_octets(self):
+        return sum(colonne.nbytes for colonne in self.colonnes.values())
+
+    # Séances dont le volume est connu
+    def volumes_presents(self):
+        return self.colonnes['Volume'] != VOLUME_ABSENT
+
+    # Conversion explicite vers pandas pour les parties qui en ont besoin (copie) ;
+    # volumes absents : NaN (colonne Volume alors en float64)
+    def vers_dataframe(self):
+        data = pd.DataFrame(
+            {nom: np.asarray(self.colonnes[nom]) for nom in COLONNES_STORE if nom != 'Date'},
+            index=pd.DatetimeIndex(np.asarray(self.dates), name='Date'),
+        )
+        presents = self.volumes_presents()
+        if not presents.all():
+            data['Volume'] = data['Volume'].astype(np.float64).where(presents)
+        return data
+
+
+def lire_pointeur(repertoire):
+    chemin = os.path.join(repertoire, POINTEUR)
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+# Chaque écriture produit une nouvelle version (répertoire temporaire renommé), puis le
+# pointeur est remplacé atomiquement : un lecteur voit toujours l'ancienne version
+# complète ou la nouvelle, jamais un store partiel ou absent. Seules la version courante
+# et la précédente sont conservées (un lecteur peut encore projeter la précédente).
+def ecrire_store(data, repertoire, derniere_seance=None):
+    os.makedirs(repertoire, exist_ok=True)
+    versions = sorted(nom for nom in os.listdir(repertoire) if nom.startswith('version_') and not nom.endswith('.tmp'))
+    numero = int(versions[-1][len('version_'):]) + 1 if versions else 0
+    version = f"version_{numero:05d}"
+    repertoire_tmp = os.path.join(repertoire, f"{version}.{os.getpid()}.{threading.get_ident()}.tmp")
+    os.makedirs(repertoire_tmp, exist_ok=True)
+
+    dates = data.index.values.astype('datetime64[ns]').view(np.int64)
+    np.save(os.path.join(repertoire_tmp, 'Date.npy'), np.ascontiguousarray(dates))
+    for nom in COLONNES_PRIX:
+        valeurs = np.ascontiguousarray(data[nom].to_numpy(dtype=COLONNES_STORE[nom]))
+        np.save(os.path.join(repertoire_tmp, f"{nom}.npy"), valeurs)
+    volumes = data['Volume'].to_numpy(dtype=np.float64)
+    volumes = np.where(np.isnan(volumes), VOLUME_ABSENT, volumes).astype(np.int64)
+    np.save(os.path.join(repertoire_tmp, 'Volume.npy'), np.ascontiguousarray(volumes))
+    os.replace(repertoire_tmp, os.path.join(repertoire, version))
+
+    chemin = os.path.join(repertoire, POINTEUR)
+    chemin_tmp = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(chemin_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'derniere_seance': derniere_seance}, f)
+    os.replace(chemin_tmp, chemin)
+
+    for ancienne in versions[:-1]:
+        # Sous Windows, une version encore projetée par un lecteur ne peut pas être supprimée
+        shutil.rmtree(os.path.join(repertoire, ancienne), ignore_errors=True)
+
+
+# Export de l'historique en cache vers le store binaire du ticker (étape d'ingestion)
+def exporter_store(ticker):
+    data = lire_historique(ticker)
+    if data is None:
+        return None
+    filigrane = lire_filigrane(ticker)
+    ecrire_store(data, repertoire_store(ticker), filigrane.get('derniere_seance') if filigrane else None)
+    return ouvrir_store(ticker)
+
+
+# Store courant du ticker ; None s'il n'existe pas ou s'il est en retard sur le cache
+# (dernière séance différente de celle du filigrane)
+def ouvrir_store(ticker):
+    repertoire = repertoire_store(ticker)
+    pointeur = lire_pointeur(repertoire)
+    if pointeur is None:
+        return None
+    filigrane = lire_filigrane(ticker)
+    if filigrane is not None and filigrane.get('derniere_seance') != pointeur['derniere_seance']:
+        return None
+    return StoreOHLCV(os.path.join(repertoire, pointeur['version']))
@@ -0,0 +1,198 @@
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+from cache_donnees import lire_filigrane, lire_historique, lire_historique_depuis, repertoire_ticker
+
+############
+# SUIVI DU DRAWDOWN EN CONTINU (PIC, CREUX, ÉPISODE, RÉCUPÉRATION)
+############
+
+# Seuil de récupération de la partie 5 : drawdown revenu au-dessus de -0,5 %
+SEUIL_RECUPERATION = -0.5
+
+
+def _date_json(date):
+    return date.strftime('%Y-%m-%d') if date is not None else None
+
+
+def _date_depuis_json(date):
+    return pd.Timestamp(date) if date is not None else None
+
+
+def _en_json(valeur):
+    return None if valeur != valeur else valeur
+
+
+def _depuis_json(valeur):
+    return np.nan if valeur is None else valeur
+
+
+# Mêmes définitions que la partie 5 :
+# - pic : plus haut historique (expanding().max(), NaN ignorés), daté de sa première atteinte
+# - drawdown : (Close - pic) / pic * 100
+# - creux : première date du drawdown minimal, avec le pic en vigueur à cette date
+# - récupération : première date, à partir du creux, où le drawdown repasse au-dessus du seuil
+# Chaque barre coûte O(1) ; l'épisode en cours commence à la date du pic courant.
+class SuiviDrawdown:
+    def __init__(self, seuil_recuperation=SEUIL_RECUPERATION):
+        self.seuil_recuperation = seuil_recuperation
+        self.pic = np.nan
+        self.date_pic = None
+        self.drawdown = np.nan
+        self.derniere_date = None
+        self.debut_episode = None
+        self.drawdown_max = np.nan
+        self.date_creux = None
+        self.prix_au_creux = np.nan
+        self.prix_au_pic = np.nan
+        self.date_pic_au_creux = None
+        self.date_recuperation = None
+
+    def ajouter(self, date, close):
+        date = pd.Timestamp(date)
+        close = float(close)
+        self.derniere_date = date
+
+        if close == close and (self.pic != self.pic or close > self.pic):
+            self.pic = close
+            self.date_pic = date
+        self.drawdown = ((close - self.pic) / self.pic) * 100
+        if self.drawdown != self.drawdown:
+            return self.drawdown
+
+        self.debut_episode = self.date_pic if self.drawdown < 0 else None
+
+        if self.drawdown_max != self.drawdown_max or self.drawdown < self.drawdown_max:
+            self.drawdown_max = self.drawdown
+            self.date_creux = date
+            self.prix_au_creux = close
+            self.prix_au_pic = self.pic
+            self.date_pic_au_creux = self.date_pic
+            self.date_recuperation = date if self.drawdown >= self.seuil_recuperation else None
+        elif self.date_recuperation is None and self.drawdown >= self.seuil_recuperation:
+            self.date_recuperation = date
+        return self.drawdown
+
+    # Amorçage vectorisé sur l'historique (mêmes calculs que Max_Historique / Drawdown),
+    # les barres suivantes passent par ajouter()
+    @classmethod
+    def depuis_historique(cls, dates, close, seuil_recuperation=SEUIL_RECUPERATION):
+        suivi = cls(seuil_recuperation)
+        dates = pd.DatetimeIndex(dates)
+        close = np.asarray(close, dtype=np.float64)
+        if len(close) == 0:
+            return suivi
+
+        max_historique = np.fmax.accumulate(close)
+        drawdown = ((close - max_historique) / max_historique) * 100
+        suivi.derniere_date = dates[-1]
+        suivi.drawdown = drawdown[-1]
+
+        def premiere_atteinte(prix):
+            return dates[np.flatnonzero(close == prix)[0]]
+
+        suivi.pic = max_historique[-1]
+        if suivi.pic == suivi.pic:
+            suivi.date_pic = premiere_atteinte(suivi.pic)
+        # Dernier drawdown défini (une barre NaN ne ferme ni n'ouvre d'épisode)
+        definis = np.flatnonzero(~np.isnan(drawdown))
+        if len(definis) > 0 and drawdown[definis[-1]] < 0:
+            suivi.debut_episode = suivi.date_pic
+
+        if np.isnan(drawdown).all():
+            return suivi
+        creux = int(np.nanargmin(drawdown))
+        suivi.drawdown_max = drawdown[creux]
+        suivi.date_creux = dates[creux]
+        suivi.prix_au_creux = close[creux]
+        suivi.prix_au_pic = max_historique[creux]
+        suivi.date_pic_au_creux = premiere_atteinte(suivi.prix_au_pic)
+
+        recuperation = np.flatnonzero(drawdown[creux:] >= seuil_recuperation)
+        if len(recuperation) > 0:
+            suivi.date_recuperation = dates[creux + recuperation[0]]
+        return suivi
+
+    @property
+    def jours_recuperation(self):
+        if self.date_recuperation is None:
+            return None
+        return (self.date_recuperation - self.date_creux).days
+
+    def etat(self):
+        return {
+            'seuil_recuperation': self.seuil_recuperation,
+            'pic': _en_json(self.pic), 'date_pic': _date_json(self.date_pic),
+            'drawdown': _en_json(self.drawdown), 'derniere_date': _date_json(self.derniere_date),
+            'debut_episode': _date_json(self.debut_episode),
+            'drawdown_max': _en_json(self.drawdown_max), 'date_creux': _date_json(self.date_creux),
+            'prix_au_creux': _en_json(self.prix_au_creux), 'prix_au_pic': _en_json(self.prix_au_pic),
+            'date_pic_au_creux': _date_json(self.date_pic_au_creux),
+            'date_recuperation': _date_json(self.date_recuperation),
+        }
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        suivi = cls(etat['seuil_recuperation'])
+        for nom in ('pic', 'drawdown', 'drawdown_max', 'prix_au_creux', 'prix_au_pic'):
+            setattr(suivi, nom, _depuis_json(etat[nom]))
+        for nom in ('date_pic', 'derniere_date', 'debut_episode', 'date_creux', 'date_pic_au_creux', 'date_recuperation'):
+            setattr(suivi, nom, _date_depuis_json(etat[nom]))
+        return suivi
+
+
+############
+# ÉTAT PAR TICKER DANS LE CACHE
+############
+
+def chemin_suivi_drawdown(ticker):
+    return os.path.join(repertoire_ticker(ticker), 'suivi_drawdown.json')
+
+
+def charger_suivi_drawdown(ticker):
+    chemin = chemin_suivi_drawdown(ticker)
+    if not os.path.exists(chemin):
+        return None, None
+    with open(chemin, encoding='utf-8') as f:
+        contenu = json.load(f)
+    return SuiviDrawdown.depuis_etat(contenu['etat']), contenu['filigrane']
+
+
+def sauver_suivi_drawdown(ticker, suivi, filigrane):
+    chemin = chemin_suivi_drawdown(ticker)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    chemin_tmp = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(chemin_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'filigrane': filigrane, 'etat': suivi.etat()}, f)
+    os.replace(chemin_tmp, chemin)
+
+
+# Seules les barres postérieures à l'état sauvegardé sont lues (segments récents
+# uniquement) et consommées ; si l'historique a été complété vers le passé, l'état est
+# reconstruit (amorçage vectorisé sur tout l'historique)
+def mettre_a_jour_suivi_drawdown(ticker):
+    suivi, filigrane_suivi = charger_suivi_drawdown(ticker)
+    filigrane = lire_filigrane(ticker)
+    if suivi is not None and filigrane is not None and filigrane == filigrane_suivi:
+        return suivi
+
+    if suivi is not None and suivi.derniere_date is not None and filigrane is not None \
+            and filigrane_suivi is not None and filigrane_suivi['debut'] == filigrane['debut']:
+        recentes = lire_historique_depuis(ticker, suivi.derniere_date)
+        # La dernière barre consommée doit toujours être en cache
+        if recentes is not None and recentes.index[0] == suivi.derniere_date:
+            recentes = recentes.iloc[1:]
+            for date, close in zip(recentes.index, recentes['Close'].to_numpy(dtype=np.float64)):
+                suivi.ajouter(date, close)
+            sauver_suivi_drawdown(ticker, suivi, filigrane)
+            return suivi
+
+    historique = lire_historique(ticker)
+    if historique is None:
+        return suivi
+    suivi = SuiviDrawdown.depuis_historique(historique.index, historique['Close'])
+
+    sauver_suivi_drawdown(ticker, suivi, filigrane)
+    return suivi
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+import pandas as pd
+from fenetres_temporelles import (
+    bornes_fenetre, ecart_type_temporel, extremum_temporel, maximum_temporel, minimum_temporel,
+    moyenne_temporelle,
+)
+
+############
+# TESTS DES FENÊTRES CALENDAIRES CONTRE rolling('30D') DE PANDAS
+############
+
+# Usage : python -m unittest test_fenetres_temporelles  (ou python -m pytest test_fenetres_temporelles.py)
+
+STATISTIQUES = {
+    'min': minimum_temporel,
+    'max': maximum_temporel,
+    'mean': moyenne_temporelle,
+    'std': ecart_type_temporel,
+}
+
+
+# Dates triées avec des trous de 0 à 9 jours : 0 donne des dates en double
+def dates_avec_doublons(nb, graine):
+    ecarts = np.random.default_rng(graine).choice([0, 1, 1, 1, 2, 3, 9], nb)
+    return np.datetime64('2020-01-01', 'ns') + np.cumsum(ecarts).astype('timedelta64[D]')
+
+
+def valeurs_bruitees(forme, graine):
+    generateur = np.random.default_rng(graine)
+    valeurs = 100 + np.cumsum(generateur.normal(0, 1, forme), axis=-1)
+    valeurs[generateur.random(forme) < 0.1] = np.nan
+    return valeurs
+
+
+def par_pandas(valeurs, dates, fenetre, statistique):
+    return getattr(pd.Series(valeurs, index=pd.DatetimeIndex(dates)).rolling(fenetre), statistique)().to_numpy()
+
+
+class TestFenetresTemporelles(unittest.TestCase):
+    def verifier(self, resultat, attendu):
+        np.testing.assert_array_equal(np.isnan(resultat), np.isnan(attendu))
+        np.testing.assert_allclose(resultat, attendu, rtol=1e-9, atol=1e-9)
+
+    def test_serie_comme_pandas(self):
+        dates = dates_avec_doublons(800, 0)
+        valeurs = valeurs_bruitees(800, 0)
+        valeurs[200:230] = np.nan
+        # '2W' est lue comme 14 jours ; pandas n'accepte que la durée fixe équivalente
+        for fenetre, fenetre_pandas in (('1D', '1D'), ('7D', '7D'), ('30D', '30D'), ('2W', '14D')):
+            for statistique, fonction in STATISTIQUES.items():
+                with self.subTest(fenetre=fenetre, statistique=statistique):
+                    self.verifier(fonction(valeurs, dates, fenetre),
+                                  par_pandas(valeurs, dates, fenetre_pandas, statistique))
+
+    def test_dates_communes_a_un_panel(self):
+        dates = dates_avec_doublons(500, 1)
+        panel = valeurs_bruitees((6, 500), 1)
+        for statistique, fonction in STATISTIQUES.items():
+            resultat = fonction(panel, dates, '30D')
+            for i, ligne in enumerate(panel):
+                with self.subTest(statistique=statistique, ligne=i):
+                    self.verifier(resultat[i], par_pandas(ligne, dates, '30D', statistique))
+
+    def test_dates_par_ligne(self):
+        dates = np.stack([dates_avec_doublons(500, graine) for graine in range(6)])
+        panel = valeurs_bruitees((6, 500), 2)
+        for statistique, fonction in STATISTIQUES.items():
+            resultat = fonction(panel, dates, '30D')
+            for i, ligne in enumerate(panel):
+                with self.subTest(statistique=statistique, ligne=i):
+                    self.verifier(resultat[i], par_pandas(ligne, dates[i], '30D', statistique))
+
+    def test_une_seule_ligne(self):
+        dates = dates_avec_doublons(300, 3)[None, :]
+        valeurs = valeurs_bruitees((1, 300), 3)
+        copie = valeurs.copy()
+        resultat = extremum_temporel(valeurs, dates, '30D', np.fmax)
+        np.testing.assert_array_equal(valeurs, copie)
+        self.verifier(resultat[0], par_pandas(valeurs[0], dates[0], '30D', 'max'))
+
+    def test_bornes_avec_doublons(self):
+        dates = np.array(['2024-01-01', '2024-01-02', '2024-01-02', '2024-01-31', '2024-02-01', '2024-02-01'],
+                         dtype='datetime64[ns]')
+        np.testing.assert_array_equal(bornes_fenetre(dates, '30D'), [0, 0, 0, 1, 3, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
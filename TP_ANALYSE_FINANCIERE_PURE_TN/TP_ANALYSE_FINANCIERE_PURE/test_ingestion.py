@@ -0,0 +1,102 @@
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import cache_donnees
+from fournisseurs import FournisseurHTTP
+from ingestion import FournisseurRobuste, SeauJetons, ingerer_univers
+from serveur_substitution import ServeurSubstitution
+
+############
+# TESTS DE L'INGESTION CONTRE LE SERVEUR LOCAL DE SUBSTITUTION
+############
+
+# Usage : python -m unittest test_ingestion  (ou python -m pytest test_ingestion.py)
+
+
+def barres(debut, fin):
+    dates = pd.bdate_range(debut, fin, name='Date', inclusive='left')
+    close = 100 + np.arange(len(dates), dtype=np.float64)
+    return pd.DataFrame({'Close': close, 'High': close + 1, 'Low': close - 1, 'Open': close,
+                         'Volume': 1000.0}, index=dates)
+
+
+class TestSeauJetons(unittest.TestCase):
+    def test_debit_limite(self):
+        seau = SeauJetons(debit=20, capacite=1)
+        debut = time.monotonic()
+        for _ in range(11):
+            seau.prendre()
+        # Le premier jeton est disponible tout de suite, les 10 suivants à 20 par seconde
+        self.assertGreaterEqual(time.monotonic() - debut, 10 / 20 * 0.9)
+
+    def test_rafale_dans_la_capacite(self):
+        seau = SeauJetons(debit=1, capacite=5)
+        debut = time.monotonic()
+        for _ in range(5):
+            seau.prendre()
+        self.assertLess(time.monotonic() - debut, 0.5)
+
+    def test_debit_respecte_par_le_serveur(self):
+        with ServeurSubstitution({'AAA': barres('2024-01-01', '2024-02-01')}) as serveur:
+            robuste = FournisseurRobuste(FournisseurHTTP(serveur.url), SeauJetons(debit=20, capacite=1))
+            for _ in range(6):
+                robuste.telecharger('AAA', '2024-01-01', '2024-02-01')
+            instants = [instant for _, instant in serveur.requetes]
+        self.assertGreaterEqual(instants[-1] - instants[0], 5 / 20 * 0.9)
+
+
+class TestNouvellesTentatives(unittest.TestCase):
+    def test_panne_passagere_reessayee(self):
+        with ServeurSubstitution({'AAA': barres('2024-01-01', '2024-02-01')}, {'AAA': 2}) as serveur:
+            robuste = FournisseurRobuste(FournisseurHTTP(serveur.url), SeauJetons(debit=100), nb_essais=3,
+                                         delai_initial=0.01)
+            data = robuste.telecharger('AAA', '2024-01-01', '2024-02-01')
+            self.assertEqual(serveur.nb_requetes('AAA'), 3)
+        self.assertEqual(len(data), len(barres('2024-01-01', '2024-02-01')))
+
+    def test_panne_persistante_remontee(self):
+        with ServeurSubstitution({'AAA': barres('2024-01-01', '2024-02-01')}, {'AAA': -1}) as serveur:
+            robuste = FournisseurRobuste(FournisseurHTTP(serveur.url), SeauJetons(debit=100), nb_essais=3,
+                                         delai_initial=0.01)
+            with self.assertRaises(Exception):
+                robuste.telecharger('AAA', '2024-01-01', '2024-02-01')
+            self.assertEqual(serveur.nb_requetes('AAA'), 3)
+
+    def test_ticker_inconnu_non_reessaye(self):
+        with ServeurSubstitution({}) as serveur:
+            robuste = FournisseurRobuste(FournisseurHTTP(serveur.url), SeauJetons(debit=100), nb_essais=3,
+                                         delai_initial=0.01)
+            self.assertIsNone(robuste.telecharger('ZZZ', '2024-01-01', '2024-02-01'))
+            self.assertEqual(serveur.nb_requetes('ZZZ'), 1)
+
+
+class TestIsolationDesEchecs(unittest.TestCase):
+    def setUp(self):
+        self.repertoire = tempfile.mkdtemp()
+        self.repertoire_initial = cache_donnees.REPERTOIRE_CACHE
+        cache_donnees.REPERTOIRE_CACHE = self.repertoire
+
+    def tearDown(self):
+        cache_donnees.REPERTOIRE_CACHE = self.repertoire_initial
+        shutil.rmtree(self.repertoire, ignore_errors=True)
+
+    def test_un_echec_ne_bloque_pas_le_lot(self):
+        donnees = {ticker: barres('2024-01-01', '2024-03-01') for ticker in ('AAA', 'BBB', 'CCC')}
+        with ServeurSubstitution(donnees, {'BBB': -1, 'CCC': 1}) as serveur:
+            succes, echecs = ingerer_univers(['AAA', 'BBB', 'CCC', 'ZZZ'], '2024-01-01', '2024-03-01',
+                                             FournisseurHTTP(serveur.url), nb_threads=4, debit=100,
+                                             statistiques=False)
+        self.assertEqual(succes, ['AAA', 'CCC'])
+        self.assertEqual(sorted(echecs), ['BBB', 'ZZZ'])
+        self.assertIn('HTTPError', echecs['BBB'])
+        self.assertEqual(echecs['ZZZ'], "Aucune donnée")
+        for ticker in succes:
+            historique = cache_donnees.lire_historique(ticker)
+            pd.testing.assert_frame_equal(historique, donnees[ticker], check_freq=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import numpy as np
+import pandas as pd
+from fenetres_temporelles import bornes_fenetre
+from kpi_glissants import kpi_glissants, quantile_glissant
+from moteur_kpi import JOURS_PAR_AN
+
+############
+# TESTS DU QUANTILE GLISSANT ET DES KPI GLISSANTS CONTRE NUMPY ET PANDAS
+############
+
+# Usage : python -m unittest test_kpi_glissants  (ou python -m pytest test_kpi_glissants.py)
+
+
+def close_aleatoire(nb, graine=0):
+    return 100 * np.exp(np.cumsum(np.random.default_rng(graine).normal(0, 0.02, nb)))
+
+
+# Séances ouvrées avec des trous (jours fériés, suspensions) pour les fenêtres calendaires
+def dates_irregulieres(nb, graine=0):
+    dates = pd.bdate_range('2015-01-01', periods=int(nb * 1.3))
+    gardees = np.sort(np.random.default_rng(graine).choice(len(dates), nb, replace=False))
+    return dates[gardees].to_numpy()
+
+
+# Quantile de chaque fenêtre [debuts[i], i] recalculé fenêtre par fenêtre
+def quantile_direct(valeurs, debuts, q, min_presentes=1):
+    resultat = np.full(len(valeurs), np.nan)
+    for i, debut in enumerate(debuts):
+        fenetre = valeurs[debut:i + 1]
+        if np.count_nonzero(~np.isnan(fenetre)) >= min_presentes:
+            resultat[i] = np.nanpercentile(fenetre, q)
+    return resultat
+
+
+class TestQuantileGlissant(unittest.TestCase):
+    def setUp(self):
+        generateur = np.random.default_rng(1)
+        # Valeurs arrondies : beaucoup d'ex aequo, plus des NaN isolés et en plage
+        self.valeurs = np.round(generateur.normal(0, 2, 600), 1)
+        self.valeurs[generateur.choice(600, 40, replace=False)] = np.nan
+        self.valeurs[300:320] = np.nan
+        self.debuts = np.maximum(np.arange(600) - 49, 0)
+
+    def test_comme_nanpercentile(self):
+        for q in (0, 5, 37.5, 50, 95, 100):
+            np.testing.assert_array_equal(quantile_glissant(self.valeurs, self.debuts, q),
+                                          quantile_direct(self.valeurs, self.debuts, q))
+
+    def test_min_presentes(self):
+        np.testing.assert_array_equal(quantile_glissant(self.valeurs, self.debuts, 5, min_presentes=40),
+                                      quantile_direct(self.valeurs, self.debuts, 5, min_presentes=40))
+
+    def test_fenetres_calendaires(self):
+        dates = dates_irregulieres(600)
+        debuts = bornes_fenetre(dates, '3M')
+        np.testing.assert_array_equal(quantile_glissant(self.valeurs, debuts, 5),
+                                      quantile_direct(self.valeurs, debuts, 5))
+
+    def test_panel_comme_lignes(self):
+        panel = np.stack([np.roll(self.valeurs, 37 * i) for i in range(5)])
+        dates = np.stack([dates_irregulieres(600, graine=i) for i in range(5)])
+        debuts = bornes_fenetre(dates, '2M')
+        resultat = quantile_glissant(panel, debuts, 5)
+        for i in range(len(panel)):
+            np.testing.assert_array_equal(resultat[i], quantile_direct(panel[i], debuts[i], 5))
+
+
+class TestKpiGlissants(unittest.TestCase):
+    def setUp(self):
+        self.close = close_aleatoire(1500)
+        self.close[[400, 900, 901]] = np.nan
+        self.dates = dates_irregulieres(1500)
+        self.rendements = pd.Series(self.close).pct_change(fill_method=None) * 100
+
+    def test_fenetre_en_seances(self):
+        resultats = kpi_glissants(self.close, self.dates, fenetres=(252,))
+        glissants = self.rendements.rolling(252)
+        np.testing.assert_allclose(resultats['Volatilite_252'], glissants.std() * np.sqrt(JOURS_PAR_AN),
+                                   rtol=1e-10)
+        np.testing.assert_allclose(resultats['Rendement_Moyen_252'], glissants.mean() * JOURS_PAR_AN,
+                                   rtol=1e-10, atol=1e-12)
+        var = quantile_direct(self.rendements.to_numpy(), np.maximum(np.arange(1500) - 251, 0), 5)
+        attendue = np.where(glissants.count() == 252, var, np.nan)
+        np.testing.assert_array_equal(resultats['VaR_95_252'], attendue)
+
+    def test_fenetre_calendaire(self):
+        resultats = kpi_glissants(self.close, self.dates, fenetres=('1Y',))
+        debuts = bornes_fenetre(self.dates, '1Y')
+        completes = debuts >= 1
+        rendements = self.rendements.to_numpy()
+        ecarts = [np.nanstd(rendements[d:i + 1], ddof=1) if d >= 1 else np.nan for i, d in enumerate(debuts)]
+        attendue = np.array(ecarts) * np.sqrt(JOURS_PAR_AN)
+        presentes = ~np.isnan(resultats['Volatilite_1Y'])
+        np.testing.assert_array_equal(presentes, ~np.isnan(attendue))
+        np.testing.assert_allclose(resultats['Volatilite_1Y'][presentes], attendue[presentes], rtol=1e-10)
+        np.testing.assert_array_equal(resultats['VaR_95_1Y'],
+                                      np.where(completes, quantile_direct(rendements, debuts, 5, 2), np.nan))
+
+    def test_panel_comme_series(self):
+        panel = np.stack([close_aleatoire(800, graine=i) for i in range(4)])
+        panel[1, 100:110] = np.nan
+        dates = np.stack([dates_irregulieres(800, graine=i) for i in range(4)])
+        resultats = kpi_glissants(panel, dates, fenetres=('1Y', 126))
+        for i in range(len(panel)):
+            seul = kpi_glissants(panel[i], dates[i], fenetres=('1Y', 126))
+            for nom, valeurs in seul.items():
+                np.testing.assert_allclose(resultats[nom][i], valeurs, rtol=1e-12, err_msg=nom)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+import pandas as pd
+from nettoyage_flux import COLONNES_REPORTEES, NettoyeurFlux, nettoyer_en_flux
+from variables_derivees import nettoyer_donnees
+
+############
+# TESTS DU NETTOYAGE EN FLUX CONTRE LES RÈGLES DE L'ÉTAPE 3.2 EN MÉMOIRE
+############
+
+# Usage : python -m unittest test_nettoyage_flux  (ou python -m pytest test_nettoyage_flux.py)
+
+
+# Étape 3.2 sur toute la table : interpolation de Close, forward-fill, doublons retirés
+def nettoyer_en_memoire(data):
+    data = data.copy()
+    data['Close'] = data['Close'].interpolate(method='linear')
+    for col in COLONNES_REPORTEES:
+        data[col] = data[col].ffill()
+    return data[~data.index.duplicated(keep='first')]
+
+
+# Minutes avec des NaN (dont en tête et en queue de Close) et des dates répétées
+def minutes_bruitees(nb, graine):
+    generateur = np.random.default_rng(graine)
+    pas = generateur.choice([0, 1, 1, 1, 2], nb)
+    pas[0] = 1
+    dates = pd.Timestamp('2024-03-01 09:30') + pd.to_timedelta(np.cumsum(pas), unit='min')
+    close = 100 + np.cumsum(generateur.normal(0, 0.1, nb))
+    data = pd.DataFrame({'Open': close, 'High': close + 0.5, 'Low': close - 0.5, 'Close': close,
+                         'Volume': generateur.integers(1, 1000, nb).astype(np.float64)},
+                        index=pd.DatetimeIndex(dates, name='Date'))
+    for col in data.columns:
+        data.loc[generateur.random(nb) < 0.15, col] = np.nan
+    data.iloc[:3, data.columns.get_loc('Close')] = np.nan
+    data.iloc[-4:, data.columns.get_loc('Close')] = np.nan
+    data.iloc[:2, data.columns.get_loc('Open')] = np.nan
+    data.iloc[100:140, data.columns.get_loc('Close')] = np.nan
+    return data
+
+
+def decouper(data, graine, taille_max=40):
+    tailles = np.random.default_rng(graine).integers(1, taille_max, len(data))
+    bornes = np.concatenate([[0], np.cumsum(tailles)])
+    bornes = bornes[bornes < len(data)]
+    return [data.iloc[debut:fin] for debut, fin in zip(bornes, np.append(bornes[1:], len(data)))]
+
+
+class TestNettoyageFlux(unittest.TestCase):
+    def test_morceaux_aleatoires_comme_en_memoire(self):
+        for graine in range(6):
+            data = minutes_bruitees(400, graine)
+            attendu = nettoyer_en_memoire(data)
+            for taille_max in (3, 20, 500):
+                nettoyeur = NettoyeurFlux()
+                resultat = pd.concat(nettoyer_en_flux(decouper(data, graine, taille_max), nettoyeur))
+                pd.testing.assert_frame_equal(resultat, attendu, check_freq=False)
+                self.assertEqual(nettoyeur.nb_doublons, int(data.index.duplicated().sum()))
+                self.assertEqual(nettoyeur.nan_par_colonne, data.isnull().sum().to_dict())
+
+    def test_doublons_a_la_frontiere_des_morceaux(self):
+        data = minutes_bruitees(60, 0)
+        dates = data.index.to_numpy().copy()
+        dates[20] = dates[19]
+        dates[21] = dates[19]
+        data.index = pd.DatetimeIndex(dates, name='Date')
+        attendu = nettoyer_en_memoire(data)
+        for coupure in (19, 20, 21, 22):
+            resultat = pd.concat(nettoyer_en_flux([data.iloc[:coupure], data.iloc[coupure:]]))
+            pd.testing.assert_frame_equal(resultat, attendu, check_freq=False)
+
+    def test_close_absent_partout(self):
+        data = minutes_bruitees(30, 1)
+        data['Close'] = np.nan
+        resultat = pd.concat(nettoyer_en_flux(decouper(data, 1, 5)))
+        pd.testing.assert_frame_equal(resultat, nettoyer_en_memoire(data), check_freq=False)
+
+    def test_table_entiere_comme_en_memoire(self):
+        data = minutes_bruitees(400, 3)
+        pd.testing.assert_frame_equal(nettoyer_donnees(data), nettoyer_en_memoire(data))
+
+    def test_dates_non_triees_refusees(self):
+        data = minutes_bruitees(30, 2)
+        with self.assertRaises(ValueError):
+            list(nettoyer_en_flux([data.iloc[10:], data.iloc[:10]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import math
+import unittest
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from indicateurs_techniques import bollinger
+from noyaux_indicateurs import ecart_type_mobile, moyenne_ecart_type_mobile, moyennes_mobiles
+
+############
+# TESTS DES NOYAUX GLISSANTS CONTRE UN CALCUL EXACT ET PANDAS
+############
+
+# Usage : python -m unittest test_noyaux_indicateurs  (ou python -m pytest test_noyaux_indicateurs.py)
+
+
+# Écart-type en deux passes (moyenne puis écarts) sur chaque fenêtre : la référence exacte
+def ecart_type_deux_passes(valeurs, fenetre):
+    fenetres = sliding_window_view(valeurs, fenetre, axis=-1)
+    ecart = fenetres.std(axis=-1, ddof=1)
+    return np.concatenate([np.full(valeurs.shape[:-1] + (fenetre - 1,), np.nan), ecart], axis=-1)
+
+
+def marche(niveau, pas, nb, graine=0):
+    return niveau + np.cumsum(np.random.default_rng(graine).normal(0, pas, nb))
+
+
+class TestEcartTypeMobile(unittest.TestCase):
+    def verifier_precision(self, valeurs, fenetre=20, tolerance=1e-12):
+        ecart = ecart_type_mobile(valeurs, fenetre)
+        exact = ecart_type_deux_passes(valeurs, fenetre)
+        np.testing.assert_array_equal(np.isnan(ecart), np.isnan(exact))
+        presents = ~np.isnan(exact)
+        np.testing.assert_allclose(ecart[presents], exact[presents], rtol=tolerance, atol=0)
+
+    def test_petits_mouvements_au_niveau_du_prix(self):
+        self.verifier_precision(marche(500.0, 0.01, 3000))
+
+    def test_grand_niveau(self):
+        self.verifier_precision(marche(600_000.0, 1.0, 3000, graine=1))
+
+    def test_serie_plate(self):
+        ecart = ecart_type_mobile(np.full(500, 50_000.0), 20)
+        np.testing.assert_array_equal(ecart[19:], 0.0)
+
+    def test_nan_comme_rolling(self):
+        valeurs = marche(100.0, 1.0, 400, graine=2)
+        valeurs[[0, 5, 57, 58, 399]] = np.nan
+        valeurs[200:230] = np.nan
+        for fenetre in (1, 7, 20, 399, 400, 401):
+            ecart = ecart_type_mobile(valeurs, fenetre)
+            attendu = pd.Series(valeurs).rolling(fenetre).std().to_numpy()
+            np.testing.assert_array_equal(np.isnan(ecart), np.isnan(attendu))
+            np.testing.assert_allclose(ecart, attendu, rtol=1e-9, atol=1e-12)
+
+    def test_panel_comme_series(self):
+        panel = np.stack([marche(100.0 * (i + 1), 1.0, 250, graine=i) for i in range(4)])
+        panel[2, 30] = np.nan
+        ecart = ecart_type_mobile(panel, 20)
+        for i, ligne in enumerate(panel):
+            np.testing.assert_array_equal(ecart[i], ecart_type_mobile(ligne, 20))
+
+    def test_moyenne_comme_rolling(self):
+        valeurs = marche(500.0, 0.01, 3000, graine=3)
+        valeurs[100] = np.nan
+        moyenne, _ = moyenne_ecart_type_mobile(valeurs, 20)
+        attendu = pd.Series(valeurs).rolling(20).mean().to_numpy()
+        np.testing.assert_array_equal(np.isnan(moyenne), np.isnan(attendu))
+        np.testing.assert_allclose(moyenne, attendu, rtol=1e-14)
+
+    def test_bollinger(self):
+        close = pd.Series(marche(600_000.0, 1.0, 1000, graine=4))
+        milieu, haute, basse = bollinger(close.to_numpy())
+        ecart = ecart_type_deux_passes(close.to_numpy(), 20)
+        np.testing.assert_allclose(milieu, close.rolling(20).mean(), rtol=1e-14)
+        np.testing.assert_allclose(haute, milieu + 2 * ecart, rtol=1e-14)
+        np.testing.assert_allclose(basse, milieu - 2 * ecart, rtol=1e-14)
+
+
+# Les sommes préfixes compensées donnent la moyenne correctement arrondie de chaque
+# fenêtre ; rolling().mean() additionne dans un autre ordre et peut différer du dernier
+# chiffre (ULP) : la comparaison avec pandas se fait donc à tolérance près
+class TestMoyennesMobiles(unittest.TestCase):
+    def setUp(self):
+        self.close = 100 * np.exp(np.cumsum(np.random.default_rng(5).normal(0, 0.02, 2000)))
+        self.close[[0, 300, 1200]] = np.nan
+        self.moyennes = moyennes_mobiles(self.close, (20, 50, 200))
+
+    def test_comme_rolling_au_dernier_ulp(self):
+        for fenetre, moyenne in self.moyennes.items():
+            attendu = pd.Series(self.close).rolling(fenetre).mean().to_numpy()
+            np.testing.assert_array_equal(np.isnan(moyenne), np.isnan(attendu))
+            np.testing.assert_array_max_ulp(moyenne[~np.isnan(attendu)], attendu[~np.isnan(attendu)], maxulp=64)
+
+    def test_somme_exacte(self):
+        moyenne = self.moyennes[50]
+        for fin in range(350, 2000, 97):
+            if 1200 <= fin < 1250:
+                continue
+            self.assertEqual(moyenne[fin], math.fsum(self.close[fin - 49:fin + 1]) / 50)
+
+    # Position de SMA 50 par rapport à SMA 200 (comparaisons <= / >= des croisements)
+    def test_position_des_moyennes_comme_pandas(self):
+        serie = pd.Series(self.close)
+        court, long = serie.rolling(50).mean().to_numpy(), serie.rolling(200).mean().to_numpy()
+        presentes = ~np.isnan(court) & ~np.isnan(long)
+        self.assertGreater(np.count_nonzero(np.diff(np.sign(court - long)[presentes])), 0)
+        np.testing.assert_array_equal((self.moyennes[50] >= self.moyennes[200])[presentes], (court >= long)[presentes])
+        np.testing.assert_array_equal((self.moyennes[50] <= self.moyennes[200])[presentes], (court <= long)[presentes])
+
+
+if __name__ == '__main__':
+    unittest.main()
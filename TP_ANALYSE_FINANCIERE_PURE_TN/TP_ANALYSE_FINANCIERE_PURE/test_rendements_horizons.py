@@ -0,0 +1,114 @@
+import unittest
+import numpy as np
+import pandas as pd
+from rendements_horizons import JOURS_PAR_ANNEE, rendements_horizons
+
+############
+# TESTS DES RENDEMENTS MULTI-HORIZONS CONTRE LE FILTRAGE PANDAS DES SCRIPTS
+############
+
+# Usage : python -m unittest test_rendements_horizons  (ou python -m pytest test_rendements_horizons.py)
+
+HORIZONS = ('5D', '1W', '2W', '1M', '3M', '6M', 'YTD', '1Y', '2Y', '3Y', '5Y')
+
+DECALAGES = {'D': lambda n: pd.Timedelta(days=n), 'W': lambda n: pd.Timedelta(weeks=n),
+             'M': lambda n: pd.DateOffset(months=n), 'Y': lambda n: pd.DateOffset(years=n)}
+
+
+def serie(debut, nb, graine):
+    generateur = np.random.default_rng(graine)
+    dates = pd.bdate_range(debut, periods=int(nb * 1.2))
+    dates = dates[np.sort(generateur.choice(len(dates), nb, replace=False))]
+    close = 100 * np.exp(np.cumsum(generateur.normal(0, 0.01, nb)))
+    return pd.Series(close, index=dates)
+
+
+# Départ de chaque horizon comme dans les scripts : data[data.index >= fin - durée], ou
+# la dernière séance de l'année précédente pour YTD ; None si l'historique ne couvre pas
+def depart_pandas(close, horizon):
+    fin = close.index[-1]
+    if horizon == 'YTD':
+        avant = close[close.index < pd.Timestamp(year=fin.year, month=1, day=1)]
+        return None if avant.empty else avant.index[-1]
+    cible = fin - DECALAGES[horizon[-1]](int(horizon[:-1]))
+    if cible < close.index[0]:
+        return None
+    return close[close.index >= cible].index[0]
+
+
+class TestRendementsHorizons(unittest.TestCase):
+    def verifier_serie(self, resultat, close):
+        for rang, horizon in enumerate(HORIZONS):
+            depart = depart_pandas(close, horizon)
+            with self.subTest(horizon=horizon):
+                if depart is None:
+                    self.assertFalse(resultat['couverts'][rang])
+                    self.assertTrue(np.isnan(resultat['rendement'][rang]))
+                    self.assertTrue(np.isnan(resultat['cagr'][rang]))
+                    continue
+                prix_debut, prix_fin = close[depart], close.iloc[-1]
+                annees = (close.index[-1] - depart).days / JOURS_PAR_ANNEE
+                self.assertEqual(pd.Timestamp(resultat['dates_debut'][rang]), depart)
+                self.assertAlmostEqual(resultat['rendement'][rang], (prix_fin - prix_debut) / prix_debut * 100,
+                                       places=10)
+                self.assertAlmostEqual(resultat['annees'][rang], annees, places=12)
+                self.assertAlmostEqual(resultat['cagr'][rang], ((prix_fin / prix_debut) ** (1 / annees) - 1) * 100,
+                                       places=8)
+
+    def test_serie_comme_pandas(self):
+        close = serie('2019-03-07', 700, 0)
+        self.verifier_serie(rendements_horizons(close.to_numpy(), close.index, HORIZONS), close)
+
+    def test_ytd_depuis_la_derniere_seance_de_l_annee_precedente(self):
+        close = serie('2022-06-01', 400, 1)
+        resultat = rendements_horizons(close.to_numpy(), close.index, ('YTD',))
+        annee = close.index[-1].year
+        self.assertEqual(pd.Timestamp(resultat['dates_debut'][0]), close[close.index.year < annee].index[-1])
+
+    def test_cagr_sur_la_duree_calendaire(self):
+        # Deux séances à deux ans d'écart : CAGR sur 731 / 365.25 ans, pas sur 2 / 252
+        close = pd.Series([100.0, 121.0], index=pd.to_datetime(['2020-01-01', '2022-01-01']))
+        resultat = rendements_horizons(close.to_numpy(), close.index, ('2Y',))
+        annees = 731 / JOURS_PAR_ANNEE
+        self.assertAlmostEqual(resultat['annees'][0], annees, places=12)
+        self.assertAlmostEqual(resultat['cagr'][0], (1.21 ** (1 / annees) - 1) * 100, places=10)
+
+    def test_horizon_non_couvert(self):
+        close = serie('2024-01-02', 60, 2)
+        resultat = rendements_horizons(close.to_numpy(), close.index, ('1Y', 'YTD', '5D'))
+        np.testing.assert_array_equal(resultat['couverts'], [False, False, True])
+        self.assertTrue(np.isnan(resultat['rendement'][:2]).all())
+        self.assertTrue(np.isnat(resultat['dates_debut'][:2]).all())
+
+    def test_dates_communes_a_un_panel(self):
+        series = [serie('2018-01-01', 900, graine) for graine in range(4)]
+        dates = series[0].index
+        panel = np.stack([s.to_numpy() for s in series])
+        resultat = rendements_horizons(panel, dates, HORIZONS)
+        for i, ligne in enumerate(panel):
+            seul = pd.Series(ligne, index=dates)
+            self.verifier_serie({nom: valeurs[i] for nom, valeurs in resultat.items()}, seul)
+
+    def test_dates_par_ligne_tassees(self):
+        # Panel tassé : séances cotées en tête de ligne, puis la dernière date répétée
+        series = [serie(debut, nb, graine) for graine, (debut, nb) in
+                  enumerate((('2017-05-01', 1200), ('2021-02-01', 300), ('2023-11-15', 40), ('2016-01-01', 1000)))]
+        largeur = max(len(s) for s in series)
+        derniere = max(s.index[-1] for s in series)
+        panel = np.full((len(series), largeur), np.nan)
+        dates = np.full((len(series), largeur), np.datetime64(derniere, 'ns'))
+        for i, s in enumerate(series):
+            panel[i, :len(s)] = s.to_numpy()
+            dates[i, :len(s)] = s.index.to_numpy()
+        nb_seances = np.array([len(s) for s in series])
+        resultat = rendements_horizons(panel, dates, HORIZONS, nb_seances)
+        for i, s in enumerate(series):
+            self.verifier_serie({nom: valeurs[i] for nom, valeurs in resultat.items()}, s)
+
+    def test_horizon_inconnu(self):
+        with self.assertRaises(ValueError):
+            rendements_horizons(np.ones(5), pd.bdate_range('2024-01-01', periods=5), ('1Q',))
+
+
+if __name__ == '__main__':
+    unittest.main()
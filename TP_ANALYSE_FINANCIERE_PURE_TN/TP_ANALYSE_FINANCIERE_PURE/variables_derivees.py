@@ -0,0 +1,250 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from cache_donnees import charger_donnees, ecrire_cache, empreinte_code, lire_filigrane, repertoire_ticker
+from noyaux_indicateurs import sommes_prefixes, moyenne_depuis_prefixes, ecart_type_mobile
+from indicateurs_techniques import ema, rsi, atr, stochastique, obv
+from croisements import signes_croisements
+from fenetres_temporelles import moyenne_temporelle, ecart_type_temporel, minimum_temporel, maximum_temporel
+
+############
+# MOTEUR DE VARIABLES DÉRIVÉES (PARTAGÉ PAR TOUTES LES PARTIES)
+############
+
+# Colonnes produites, dans l'ordre d'ajout au DataFrame
+COLONNES_DERIVEES = [
+    'Rendement_Quotidien', 'Rendement_Cumule', 'Log_Rendement',
+    'Annee', 'Mois', 'Jour_Semaine', 'Jour_Semaine_Nom', 'Trimestre',
+    'Volatilite_30j', 'Volatilite_90j', 'Range_Quotidien',
+    'SMA_20', 'SMA_50', 'SMA_200',
+    'Distance_Max_Historique', 'Max_Historique', 'Drawdown',
+]
+
+# Fenêtres calendaires (]t - durée, t]) disponibles à la demande
+COLONNES_TEMPORELLES = [
+    'SMA_30D', 'SMA_1Y', 'Volatilite_30D', 'Volatilite_90D', 'Support_1Y', 'Resistance_1Y',
+]
+
+# Indicateurs techniques disponibles à la demande (jamais ajoutés par défaut)
+COLONNES_INDICATEURS = [
+    'EMA_12', 'EMA_26', 'MACD', 'MACD_Signal', 'MACD_Histogramme', 'RSI_14',
+    'Bollinger_Haute', 'Bollinger_Basse', 'ATR_14', 'Stochastique_K', 'Stochastique_D', 'OBV',
+]
+
+
+############
+# GRAPHE DE DÉPENDANCES DES VARIABLES DÉRIVÉES
+############
+
+# Chaque variable est déclarée par (dépendances, fonction). La fonction reçoit l'index
+# des dates puis les tableaux NumPy de ses dépendances. Les noms préfixés par "_" sont
+# des intermédiaires partagés qui ne sont jamais ajoutés au DataFrame.
+# Les calculs portent sur le dernier axe : les mêmes fonctions servent pour une série
+# (dates,) et pour un panel (tickers, dates) du moteur de panel.
+
+
+def _decaler(valeurs):
+    decale = np.empty_like(valeurs)
+    decale[..., 0] = np.nan
+    decale[..., 1:] = valeurs[..., :-1]
+    return decale
+
+
+def _ecart_type_mobile(fenetre):
+    def ecart_type(index, rendement):
+        if rendement.ndim == 2:
+            return pd.DataFrame(rendement.T).rolling(window=fenetre).std().to_numpy().T
+        return pd.Series(rendement).rolling(window=fenetre).std().to_numpy()
+    return ecart_type
+
+
+# Toutes les moyennes mobiles partagent les sommes préfixes compensées de Close
+def _moyenne_mobile(fenetre):
+    return lambda index, prefixes: moyenne_depuis_prefixes(prefixes, fenetre)
+
+
+GRAPHE_VARIABLES = {
+    # Rendements (mêmes formules que pct_change / shift)
+    '_Ratio_Close': (('Close',), lambda index, close: close / _decaler(close)),
+    'Rendement_Quotidien': (('_Ratio_Close',), lambda index, ratio: (ratio - 1) * 100),
+    'Rendement_Cumule': (('Close',), lambda index, close: ((close / close[..., :1]) - 1) * 100),
+    'Log_Rendement': (('_Ratio_Close',), lambda index, ratio: np.log(ratio)),
+
+    # Variables temporelles
+    'Annee': ((), lambda index: index.year.to_numpy()),
+    'Mois': ((), lambda index: index.month.to_numpy()),
+    'Jour_Semaine': ((), lambda index: index.dayofweek.to_numpy()),  # 0=Lundi, 6=Dimanche
+    'Jour_Semaine_Nom': ((), lambda index: index.day_name().to_numpy()),
+    'Trimestre': ((), lambda index: index.quarter.to_numpy()),
+
+    # Volatilité mobile et range quotidien
+    'Volatilite_30j': (('Rendement_Quotidien',), _ecart_type_mobile(30)),
+    'Volatilite_90j': (('Rendement_Quotidien',), _ecart_type_mobile(90)),
+    'Range_Quotidien': (('High', 'Low', 'Close'), lambda index, high, low, close: ((high - low) / close) * 100),
+
+    # Moyennes mobiles (une seule somme cumulée pour toutes les fenêtres)
+    '_Prefixes_Close': (('Close',), lambda index, close: sommes_prefixes(close)),
+    'SMA_20': (('_Prefixes_Close',), _moyenne_mobile(20)),
+    'SMA_50': (('_Prefixes_Close',), _moyenne_mobile(50)),
+    'SMA_200': (('_Prefixes_Close',), _moyenne_mobile(200)),
+    'Croisement_SMA_50_200': (('SMA_50', 'SMA_200'), lambda index, court, long: signes_croisements(court, long) != 0),
+
+    # Fenêtres calendaires (module fenetres_temporelles), indépendantes du nombre de séances
+    'SMA_30D': (('Close',), lambda index, close: moyenne_temporelle(close, index, '30D')),
+    'SMA_1Y': (('Close',), lambda index, close: moyenne_temporelle(close, index, '1Y')),
+    'Volatilite_30D': (('Rendement_Quotidien',), lambda index, rendement: ecart_type_temporel(rendement, index, '30D')),
+    'Volatilite_90D': (('Rendement_Quotidien',), lambda index, rendement: ecart_type_temporel(rendement, index, '90D')),
+    'Support_1Y': (('Close',), lambda index, close: minimum_temporel(close, index, '1Y')),
+    'Resistance_1Y': (('Close',), lambda index, close: maximum_temporel(close, index, '1Y')),
+
+    # Plus haut historique (équivalent de expanding().max()), calculé une seule fois
+    'Max_Historique': (('Close',), lambda index, close: np.fmax.accumulate(close, axis=-1)),
+    'Drawdown': (('Close', 'Max_Historique'), lambda index, close, max_hist: ((close - max_hist) / max_hist) * 100),
+    'Distance_Max_Historique': (('Drawdown',), lambda index, drawdown: drawdown),
+
+    # Indicateurs techniques (module indicateurs_techniques), intermédiaires partagés
+    'EMA_12': (('Close',), lambda index, close: ema(close, 12)),
+    'EMA_26': (('Close',), lambda index, close: ema(close, 26)),
+    'MACD': (('EMA_12', 'EMA_26'), lambda index, court, long: court - long),
+    'MACD_Signal': (('MACD',), lambda index, ligne: ema(ligne, 9)),
+    'MACD_Histogramme': (('MACD', 'MACD_Signal'), lambda index, ligne, signal: ligne - signal),
+    'RSI_14': (('Close',), lambda index, close: rsi(close, 14)),
+    '_Ecart_Type_Close_20': (('Close',), lambda index, close: ecart_type_mobile(close, 20)),
+    'Bollinger_Haute': (('SMA_20', '_Ecart_Type_Close_20'), lambda index, milieu, ecart: milieu + 2 * ecart),
+    'Bollinger_Basse': (('SMA_20', '_Ecart_Type_Close_20'), lambda index, milieu, ecart: milieu - 2 * ecart),
+    'ATR_14': (('High', 'Low', 'Close'), lambda index, high, low, close: atr(high, low, close, 14)),
+    '_Stochastique': (('High', 'Low', 'Close'), lambda index, high, low, close: stochastique(high, low, close, 14, 3)),
+    'Stochastique_K': (('_Stochastique',), lambda index, stochastique_kd: stochastique_kd[0]),
+    'Stochastique_D': (('_Stochastique',), lambda index, stochastique_kd: stochastique_kd[1]),
+    'OBV': (('Close', 'Volume'), lambda index, close, volume: obv(close, volume)),
+}
+
+
+# Accès paresseux : une variable n'est calculée qu'à sa première lecture, avec ses
+# seules dépendances, puis mémorisée. Les variables jamais lues ne coûtent rien.
+class VariablesDerivees:
+    def __init__(self, data):
+        self.data = data
+        self.index = data.index
+        self.valeurs = {}
+
+    # Colonnes déjà présentes (données brutes ou variables relues du cache)
+    def est_source(self, nom):
+        return nom in self.data.columns
+
+    def source(self, nom):
+        return self.data[nom].to_numpy()
+
+    def __contains__(self, nom):
+        return nom in self.valeurs or self.est_source(nom) or nom in GRAPHE_VARIABLES
+
+    def __getitem__(self, nom):
+        if nom in self.valeurs:
+            return self.valeurs[nom]
+        if self.est_source(nom):
+            return self.source(nom)
+        if nom not in GRAPHE_VARIABLES:
+            raise KeyError(f"Variable dérivée inconnue : {nom}")
+
+        dependances, fonction = GRAPHE_VARIABLES[nom]
+        valeur = fonction(self.index, *[self[dependance] for dependance in dependances])
+        self.valeurs[nom] = valeur
+        return valeur
+
+    def calculees(self):
+        return [nom for nom in self.valeurs if not nom.startswith('_')]
+
+
+# Ajout au DataFrame des seules colonnes demandées (toutes par défaut)
+def calculer_variables_derivees(data, colonnes=None):
+    if colonnes is None:
+        colonnes = COLONNES_DERIVEES
+    variables = VariablesDerivees(data)
+    data = data.copy()
+    for col in colonnes:
+        data[col] = variables[col]
+    return data
+
+
+############
+# CACHE DES DONNÉES ENRICHIES
+############
+
+# Modules dont dépendent les formules des colonnes dérivées
+MODULES_ENRICHI = (
+    'variables_derivees', 'noyaux_indicateurs', 'indicateurs_techniques', 'croisements', 'fenetres_temporelles',
+)
+VERSION_ENRICHI = empreinte_code(*MODULES_ENRICHI)
+
+
+# Le nom du fichier contient la dernière séance connue et la version du code : un
+# rafraîchissement du cache brut ou une modification des formules invalide
+# automatiquement la version enrichie
+def chemin_enrichi(ticker, debut, fin):
+    filigrane = lire_filigrane(ticker)
+    derniere = filigrane.get('derniere_seance', 'inconnue') if filigrane else 'inconnue'
+    return os.path.join(repertoire_ticker(ticker), f"enrichi_{debut}_{fin}_{derniere}_{VERSION_ENRICHI}.parquet")
+
+
+def sauver_donnees_enrichies(ticker, debut, fin, data):
+    chemin = chemin_enrichi(ticker, debut, fin)
+    for ancien in glob.glob(os.path.join(repertoire_ticker(ticker), f"enrichi_{debut}_{fin}_*.parquet")):
+        if ancien != chemin:
+            os.remove(ancien)
+    ecrire_cache(data, chemin)
+
+
+# Étapes 3.2 et 3.3 du script principal sur les données brutes : interpolation linéaire
+# de Close, forward-fill des autres colonnes, première occurrence des dates en double,
+# tri chronologique
+def nettoyer_donnees(data):
+    data = data.copy()
+    if 'Close' in data.columns:
+        data['Close'] = data['Close'].interpolate(method='linear')
+    for col in ['Open', 'High', 'Low', 'Volume']:
+        if col in data.columns:
+            data[col] = data[col].ffill()
+    data = data[~data.index.duplicated(keep='first')]
+    return data if data.index.is_monotonic_increasing else data.sort_index()
+
+
+# Point d'entrée des parties 4 à 6 : chaque partie déclare les colonnes qu'elle lit.
+# Les colonnes déjà en cache sont relues (lecture Parquet des seules colonnes utiles),
+# les autres sont calculées à la demande puis ajoutées au cache. Les données brutes
+# passent toujours par le nettoyage de l'étape 3 avant le calcul, comme dans le script
+# principal : cache présent ou non, les parties lisent la même table.
+def charger_donnees_enrichies(ticker, debut, fin, colonnes=None):
+    if colonnes is None:
+        colonnes = COLONNES_DERIVEES
+
+    data = charger_donnees(ticker, debut, fin)
+    if data is None or data.empty:
+        return None
+    data = nettoyer_donnees(data)
+    colonnes_brutes = list(data.columns)
+
+    chemin = chemin_enrichi(ticker, debut, fin)
+    if os.path.exists(chemin):
+        try:
+            disponibles = pq.read_schema(chemin).names
+            manquantes = [col for col in colonnes if col not in disponibles]
+            if len(manquantes) == 0:
+                return pd.read_parquet(chemin, columns=colonnes_brutes + list(colonnes))
+
+            # Les dépendances déjà en cache (ex. Max_Historique) ne sont pas recalculées
+            complet = pd.read_parquet(chemin)
+            variables = VariablesDerivees(complet)
+            for col in manquantes:
+                complet[col] = variables[col]
+            sauver_donnees_enrichies(ticker, debut, fin, complet)
+            return complet[colonnes_brutes + list(colonnes)]
+        except (OSError, ValueError, KeyError):
+            # Fichier illisible ou incomplet (écriture interrompue, colonnes brutes
+            # différentes) : recalcul complet
+            pass
+
+    data = calculer_variables_derivees(data, colonnes)
+    sauver_donnees_enrichies(ticker, debut, fin, data)
+    return data